@@ -0,0 +1,181 @@
+-- ============================================
+-- GREENCITY DATA WAREHOUSE - TABLES D'AGRÉGATS
+-- Description: Cumuls journaliers et mensuels pour les tableaux de bord
+--   (maintenus par pentaho_etl/agregats.py après chaque chargement)
+-- Prérequis: create_datamarts.sql, etl_control (setup_etl_control_v2.sql)
+-- ============================================
+
+USE greencity_dw;
+
+-- Les moyennes sont stockées en (somme, nombre) pour rester cumulables:
+-- moyenne = SUM(somme_...) / SUM(nb_...) à n'importe quel niveau.
+
+-- Index sur date_modification: le rafraîchissement incrémental (agregats.py)
+-- cherche les faits modifiés depuis le dernier passage sans parcourir toute la table.
+-- Index des clés métier (bases créées avant leur ajout à create_datamarts.sql):
+-- charger_faits.py y retrouve les faits déjà chargés
+DROP PROCEDURE IF EXISTS sp_ajouter_index;
+
+DELIMITER //
+
+CREATE PROCEDURE sp_ajouter_index(IN p_table VARCHAR(64), IN p_index VARCHAR(64),
+                                  IN p_colonnes VARCHAR(255))
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM information_schema.STATISTICS
+                   WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = p_table
+                     AND INDEX_NAME = p_index) THEN
+        SET @instruction = CONCAT('ALTER TABLE ', p_table, ' ADD INDEX ', p_index,
+                                  ' (', p_colonnes, ')');
+        PREPARE requete FROM @instruction;
+        EXECUTE requete;
+        DEALLOCATE PREPARE requete;
+    END IF;
+END //
+
+DELIMITER ;
+
+CALL sp_ajouter_index('fait_consommation', 'idx_fait_conso_modification', 'date_modification');
+CALL sp_ajouter_index('fait_rentabilite', 'idx_fait_rent_modification', 'date_modification');
+CALL sp_ajouter_index('fait_environnement', 'idx_fait_env_modification', 'date_modification');
+CALL sp_ajouter_index('fait_consommation', 'idx_fait_conso_cle', 'id_compteur_fk, id_temps_fk, heure_mesure');
+CALL sp_ajouter_index('fait_rentabilite', 'idx_fait_rent_facture', 'id_facture');
+DROP PROCEDURE sp_ajouter_index;
+
+-- Jours à recalculer qu'aucun fait modifié ne signale: faits supprimés ou déplacés
+-- vers un autre jour (déclencheurs ci-dessous), mois basculés par partitions.py
+-- echanger (EXCHANGE PARTITION ne déclenche rien). agregats.py rafraichir recalcule
+-- les périodes de ces jours en plus de celles des faits modifiés.
+CREATE TABLE IF NOT EXISTS agg_periodes_a_recalculer (
+    source VARCHAR(64) NOT NULL,
+    id_temps_fk INT NOT NULL,
+    date_signalement TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (source, id_temps_fk),
+    INDEX idx_agg_periodes_signalement (source, date_signalement)
+);
+
+DROP TRIGGER IF EXISTS trg_fait_consommation_suppression;
+CREATE TRIGGER trg_fait_consommation_suppression AFTER DELETE ON fait_consommation FOR EACH ROW
+    INSERT INTO agg_periodes_a_recalculer (source, id_temps_fk) VALUES ('fait_consommation', OLD.id_temps_fk)
+    ON DUPLICATE KEY UPDATE date_signalement = CURRENT_TIMESTAMP;
+DROP TRIGGER IF EXISTS trg_fait_consommation_deplacement;
+CREATE TRIGGER trg_fait_consommation_deplacement AFTER UPDATE ON fait_consommation FOR EACH ROW
+    INSERT INTO agg_periodes_a_recalculer (source, id_temps_fk)
+    SELECT 'fait_consommation', OLD.id_temps_fk FROM DUAL WHERE OLD.id_temps_fk <> NEW.id_temps_fk
+    ON DUPLICATE KEY UPDATE date_signalement = CURRENT_TIMESTAMP;
+DROP TRIGGER IF EXISTS trg_fait_rentabilite_suppression;
+CREATE TRIGGER trg_fait_rentabilite_suppression AFTER DELETE ON fait_rentabilite FOR EACH ROW
+    INSERT INTO agg_periodes_a_recalculer (source, id_temps_fk) VALUES ('fait_rentabilite', OLD.id_temps_fk)
+    ON DUPLICATE KEY UPDATE date_signalement = CURRENT_TIMESTAMP;
+DROP TRIGGER IF EXISTS trg_fait_rentabilite_deplacement;
+CREATE TRIGGER trg_fait_rentabilite_deplacement AFTER UPDATE ON fait_rentabilite FOR EACH ROW
+    INSERT INTO agg_periodes_a_recalculer (source, id_temps_fk)
+    SELECT 'fait_rentabilite', OLD.id_temps_fk FROM DUAL WHERE OLD.id_temps_fk <> NEW.id_temps_fk
+    ON DUPLICATE KEY UPDATE date_signalement = CURRENT_TIMESTAMP;
+DROP TRIGGER IF EXISTS trg_fait_environnement_suppression;
+CREATE TRIGGER trg_fait_environnement_suppression AFTER DELETE ON fait_environnement FOR EACH ROW
+    INSERT INTO agg_periodes_a_recalculer (source, id_temps_fk) VALUES ('fait_environnement', OLD.id_temps_fk)
+    ON DUPLICATE KEY UPDATE date_signalement = CURRENT_TIMESTAMP;
+DROP TRIGGER IF EXISTS trg_fait_environnement_deplacement;
+CREATE TRIGGER trg_fait_environnement_deplacement AFTER UPDATE ON fait_environnement FOR EACH ROW
+    INSERT INTO agg_periodes_a_recalculer (source, id_temps_fk)
+    SELECT 'fait_environnement', OLD.id_temps_fk FROM DUAL WHERE OLD.id_temps_fk <> NEW.id_temps_fk
+    ON DUPLICATE KEY UPDATE date_signalement = CURRENT_TIMESTAMP;
+
+-- Consommation journalière par bâtiment et type d'énergie
+CREATE TABLE IF NOT EXISTS agg_conso_jour_batiment (
+    id_temps_fk INT NOT NULL,
+    id_batiment_fk INT NOT NULL,
+    id_region_fk INT NOT NULL,
+    id_type_energie_fk INT NOT NULL,
+    consommation_totale DECIMAL(18,4) NOT NULL,
+    nb_mesures INT NOT NULL,
+    somme_temperature DECIMAL(12,2),
+    nb_temperatures INT NOT NULL,
+    PRIMARY KEY (id_temps_fk, id_batiment_fk, id_region_fk, id_type_energie_fk),
+    INDEX idx_agg_conso_jour_batiment (id_batiment_fk)
+);
+
+-- Consommation mensuelle par région et type d'énergie
+CREATE TABLE IF NOT EXISTS agg_conso_mois_region (
+    annee INT NOT NULL,
+    mois INT NOT NULL,
+    id_region_fk INT NOT NULL,
+    id_type_energie_fk INT NOT NULL,
+    consommation_totale DECIMAL(18,4) NOT NULL,
+    nb_mesures INT NOT NULL,
+    somme_temperature DECIMAL(12,2),
+    nb_temperatures INT NOT NULL,
+    PRIMARY KEY (annee, mois, id_region_fk, id_type_energie_fk)
+);
+
+-- Chiffre d'affaires et marge mensuels par client (et région du bâtiment).
+-- nb_factures = COUNT(DISTINCT id_facture), comme v_rentabilite_client: id_facture
+-- n'est pas unique dans fait_rentabilite (doublons des chargements Pentaho). La somme
+-- sur les mois reste exacte tant que les lignes d'une facture partagent mois et région.
+-- (Base existante: python pentaho_etl/agregats.py reconstruire --agregats agg_rentabilite_mois_client)
+CREATE TABLE IF NOT EXISTS agg_rentabilite_mois_client (
+    annee INT NOT NULL,
+    mois INT NOT NULL,
+    id_client_fk INT NOT NULL,
+    id_region_fk INT NOT NULL,
+    chiffre_affaires DECIMAL(14,2) NOT NULL,
+    montant_ht DECIMAL(14,2) NOT NULL,
+    cout_energie DECIMAL(14,2) NOT NULL,
+    marge DECIMAL(14,2) NOT NULL,
+    consommation_totale DECIMAL(18,4) NOT NULL,
+    nb_factures INT NOT NULL,
+    PRIMARY KEY (annee, mois, id_client_fk, id_region_fk),
+    INDEX idx_agg_rent_region (id_region_fk)
+);
+
+-- Émissions CO2 mensuelles par bâtiment
+CREATE TABLE IF NOT EXISTS agg_environnement_mois_batiment (
+    annee INT NOT NULL,
+    mois INT NOT NULL,
+    id_batiment_fk INT NOT NULL,
+    id_region_fk INT NOT NULL,
+    emissions_co2_totales DECIMAL(14,2),
+    somme_taux_recyclage DECIMAL(12,4),
+    nb_taux_recyclage INT NOT NULL,
+    consommation_totale_kwh DECIMAL(18,4),
+    nb_rapports INT NOT NULL,
+    PRIMARY KEY (annee, mois, id_batiment_fk, id_region_fk),
+    INDEX idx_agg_env_region (id_region_fk)
+);
+
+-- Les vues d'analyse lisent les agrégats (mêmes colonnes que create_datamarts.sql)
+CREATE OR REPLACE VIEW v_consommation_region_mois AS
+SELECT
+    r.nom_region,
+    a.annee,
+    m.nom_mois,
+    te.libelle AS type_energie,
+    SUM(a.consommation_totale) AS consommation_totale,
+    SUM(a.somme_temperature) / NULLIF(SUM(a.nb_temperatures), 0) AS temperature_moyenne
+FROM agg_conso_mois_region a
+JOIN dim_region r ON a.id_region_fk = r.id_region_sk
+JOIN (SELECT DISTINCT annee, mois, nom_mois FROM dim_temps) m
+    ON a.annee = m.annee AND a.mois = m.mois
+JOIN dim_type_energie te ON a.id_type_energie_fk = te.id_type_energie_sk
+GROUP BY r.nom_region, a.annee, a.mois, m.nom_mois, te.libelle;
+
+CREATE OR REPLACE VIEW v_rentabilite_client AS
+SELECT
+    c.id_client,
+    c.nom,
+    c.type_client,
+    a.annee,
+    SUM(a.chiffre_affaires) AS chiffre_affaires,
+    SUM(a.marge) AS marge_totale,
+    SUM(a.consommation_totale) AS consommation_totale,
+    SUM(a.nb_factures) AS nb_factures
+FROM agg_rentabilite_mois_client a
+JOIN dim_client c ON a.id_client_fk = c.id_client_sk
+GROUP BY c.id_client, c.nom, c.type_client, a.annee;
+
+-- Suivi des rafraîchissements (une ligne par agrégat dans etl_control)
+INSERT IGNORE INTO etl_control (nom_source, derniere_extraction, nb_lignes_extraites, statut) VALUES
+('agg_conso_jour_batiment', '1900-01-01 00:00:00', 0, 'PENDING'),
+('agg_conso_mois_region', '1900-01-01 00:00:00', 0, 'PENDING'),
+('agg_rentabilite_mois_client', '1900-01-01 00:00:00', 0, 'PENDING'),
+('agg_environnement_mois_batiment', '1900-01-01 00:00:00', 0, 'PENDING');
@@ -114,7 +114,8 @@ CREATE TABLE fait_consommation (
     INDEX idx_fait_conso_temps (id_temps_fk),
     INDEX idx_fait_conso_batiment (id_batiment_fk),
     INDEX idx_fait_conso_region (id_region_fk),
-    INDEX idx_fait_conso_energie (id_type_energie_fk)
+    INDEX idx_fait_conso_energie (id_type_energie_fk),
+    INDEX idx_fait_conso_cle (id_compteur_fk, id_temps_fk, heure_mesure)
 );
 
 -- ============================================
@@ -201,7 +202,8 @@ CREATE TABLE fait_rentabilite (
     INDEX idx_fait_rent_client (id_client_fk),
     INDEX idx_fait_rent_batiment (id_batiment_fk),
     INDEX idx_fait_rent_region (id_region_fk),
-    INDEX idx_fait_rent_contrat (id_contrat_fk)
+    INDEX idx_fait_rent_contrat (id_contrat_fk),
+    INDEX idx_fait_rent_facture (id_facture)
 );
 
 -- Table de faits: Paiements (pour le suivi du recouvrement)
@@ -328,6 +330,8 @@ DELIMITER ;
 -- ============================================
 
 -- Générer la dimension temps pour la période 2022-2026
+-- (calendrier complet avec jours fériés: python pentaho_etl/calendrier.py --charger,
+--  mêmes id_temps à partir du 2022-01-01)
 CALL sp_generer_dim_temps('2022-01-01', '2026-12-31');
 
 -- Insérer les statuts de paiement
@@ -0,0 +1,632 @@
+# -*- coding: utf-8 -*-
+# benchmark.py - Mesures de performance des générateurs
+
+import argparse
+import contextlib
+import filecmp
+import gzip
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from config import *
+from generate_csv_files import CSVEnvironnementalGenerator
+from generate_json_files import FORMATS_SORTIE, JSONConsommationGenerator, pq, zstandard
+from generate_mysql_data import GreenCityDataGenerator
+from normalisation_dates import FORMATS_DATES, NormaliseurDates
+from serialisation import SERIALISEURS
+
+# ============================================
+# OUTILS DE MESURE
+# ============================================
+
+def jeu_de_donnees(nb_batiments, nb_regions=8):
+    """Construit des régions/bâtiments/compteurs synthétiques (sans Faker)"""
+    regions = [
+        {
+            'id_region': r['id'],
+            'nom_region': r['nom'],
+            'pays': r['pays'],
+            'ville': r['ville'],
+            'code_postal': r['code_postal']
+        }
+        for r in REGIONS_DATA[:nb_regions]
+    ]
+    types_batiment = ['Résidentiel', 'Commercial', 'Industriel', 'Mixte']
+    prefixe = {'Électricité': 'ELEC', 'Eau': 'EAU', 'Gaz': 'GAZ'}
+
+    batiments = []
+    compteurs = []
+    for i in range(nb_batiments):
+        batiment = {
+            'id_batiment': f"BAT{str(i+1).zfill(3)}",
+            'id_region': regions[i % len(regions)]['id_region'],
+            'surface_m2': 500 + (i * 37) % 14500,
+            'type_batiment': types_batiment[i % len(types_batiment)]
+        }
+        batiments.append(batiment)
+        for te in TYPES_ENERGIE:
+            compteurs.append({
+                'id_compteur': f"{prefixe[te['libelle']]}_{str(len(compteurs) + 1).zfill(4)}",
+                'id_batiment': batiment['id_batiment'],
+                'id_type_energie': te['id'],
+                'statut': 'Actif'
+            })
+    return regions, batiments, compteurs
+
+@contextlib.contextmanager
+def avec_volumes(**volumes):
+    """Applique `volumes` à CONFIG le temps du bloc, puis restaure CONFIG (même en cas d'erreur)"""
+    initial = dict(CONFIG)
+    CONFIG.update(volumes)
+    try:
+        yield CONFIG
+    finally:
+        CONFIG.clear()
+        CONFIG.update(initial)
+
+def sans_sortie():
+    """Masque les messages de progression des générateurs pendant une mesure"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+def mesurer(fonction, *args, **kwargs):
+    """Exécute une fonction et retourne (durée en s, pic mémoire Python en Mo)"""
+    tracemalloc.start()
+    debut = time.perf_counter()
+    fonction(*args, **kwargs)
+    duree = time.perf_counter() - debut
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duree, pic / (1024 * 1024)
+
+# ============================================
+# BENCHMARKS
+# ============================================
+
+def bench_json_streaming(tailles):
+    """Compare le pic mémoire d'un fichier JSON journalier en mode liste et en mode streaming"""
+
+    print(f"{'bâtiments':>10} {'mode':>10} {'durée (s)':>10} {'pic (Mo)':>10}")
+    for nb_batiments in tailles:
+        regions, batiments, compteurs = jeu_de_donnees(nb_batiments)
+        with tempfile.TemporaryDirectory() as output_dir:
+            for streaming in (False, True):
+                generator = JSONConsommationGenerator(batiments, compteurs, regions, streaming=streaming)
+                duree, pic = mesurer(
+                    generator.generer_fichier_json_journalier,
+                    'electricite', datetime(2025, 1, 1), output_dir
+                )
+                mode = 'streaming' if streaming else 'liste'
+                print(f"{nb_batiments:>10} {mode:>10} {duree:>10.2f} {pic:>10.2f}")
+
+def bench_json_index(tailles):
+    """Compare la recherche bâtiments/compteurs par balayage linéaire et par index"""
+
+    def recherche_lineaire(regions, batiments, compteurs, id_type_energie):
+        # Ancienne recherche: balayage complet des listes pour chaque région/bâtiment
+        nb = 0
+        for region in regions:
+            for batiment in [b for b in batiments if b['id_region'] == region['id_region']]:
+                nb += len([
+                    c for c in compteurs
+                    if c['id_batiment'] == batiment['id_batiment']
+                    and c['id_type_energie'] == id_type_energie
+                ])
+        return nb
+
+    def recherche_index(generator, id_type_energie):
+        nb = 0
+        for region in generator.regions:
+            for batiment in generator.batiments_par_region.get(region['id_region'], []):
+                nb += len(generator.compteurs_par_batiment.get(
+                    (batiment['id_batiment'], id_type_energie), []
+                ))
+        return nb
+
+    print(f"{'bâtiments':>10} {'linéaire (s)':>13} {'index (s)':>10} {'gain':>8} {'fichier (s)':>12}")
+    for nb_batiments in tailles:
+        regions, batiments, compteurs = jeu_de_donnees(nb_batiments)
+        generator = JSONConsommationGenerator(batiments, compteurs, regions)
+
+        debut = time.perf_counter()
+        recherche_lineaire(regions, batiments, compteurs, 1)
+        duree_lineaire = time.perf_counter() - debut
+
+        debut = time.perf_counter()
+        recherche_index(generator, 1)
+        duree_index = time.perf_counter() - debut
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            debut = time.perf_counter()
+            generator.generer_fichier_json_journalier('electricite', datetime(2025, 1, 1), output_dir)
+            duree_fichier = time.perf_counter() - debut
+
+        gain = duree_lineaire / duree_index if duree_index else float('inf')
+        print(f"{nb_batiments:>10} {duree_lineaire:>13.3f} {duree_index:>10.4f} "
+              f"{gain:>7.0f}x {duree_fichier:>12.2f}")
+
+def bench_mesures_numpy(tailles):
+    """Compare le débit de génération des mesures horaires: boucle Python et moteur NumPy"""
+
+    date = datetime(2025, 1, 1)
+    print(f"{'compteurs':>10} {'type':>12} {'python (mes/s)':>15} {'numpy (mes/s)':>14} "
+          f"{'gain':>7} {'+dicts (mes/s)':>15}")
+    for nb_batiments in tailles:
+        regions, batiments, compteurs = jeu_de_donnees(nb_batiments)
+        generator_python = JSONConsommationGenerator(batiments, compteurs, regions)
+        generator_numpy = JSONConsommationGenerator(batiments, compteurs, regions, moteur='numpy')
+
+        for type_energie in ['electricite', 'eau', 'gaz']:
+            ids = [b['id_batiment'] for b in batiments]
+            nb_mesures = len(ids) * 24
+
+            debut = time.perf_counter()
+            for compteur_id in ids:
+                generator_python.generer_mesures_horaires(compteur_id, type_energie, date)
+            duree_python = time.perf_counter() - debut
+
+            debut = time.perf_counter()
+            valeurs, doublons = generator_numpy.generer_mesures_vectorisees(type_energie, date, len(ids))
+            duree_numpy = time.perf_counter() - debut
+
+            # Coût complet jusqu'à la frontière d'écriture (création des dictionnaires)
+            dates_iso = [date.replace(hour=h).isoformat() for h in range(24)]
+            debut = time.perf_counter()
+            valeurs, doublons = generator_numpy.generer_mesures_vectorisees(type_energie, date, len(ids))
+            for i, compteur_id in enumerate(ids):
+                generator_numpy.materialiser_mesures(
+                    compteur_id, 'consommation', dates_iso, valeurs[0, i], doublons[0, i]
+                )
+            duree_dicts = time.perf_counter() - debut
+
+            print(f"{len(ids):>10} {type_energie:>12} {nb_mesures / duree_python:>15,.0f} "
+                  f"{nb_mesures / duree_numpy:>14,.0f} {duree_python / duree_numpy:>6.0f}x "
+                  f"{nb_mesures / duree_dicts:>15,.0f}")
+
+    # Vérification de la distribution (électricité, 20 000 compteurs-jours)
+    regions, batiments, compteurs = jeu_de_donnees(100)
+    generator_python = JSONConsommationGenerator(batiments, compteurs, regions)
+    generator_numpy = JSONConsommationGenerator(batiments, compteurs, regions, moteur='numpy')
+    valeurs_python = [
+        m['consommation_kWh']
+        for _ in range(20000)
+        for m in generator_python.generer_mesures_horaires('ELEC', 'electricite', date)[:24]
+    ]
+    valeurs_python = np.array([np.nan if v is None else v for v in valeurs_python])
+    valeurs_numpy = generator_numpy.generer_mesures_vectorisees('electricite', date, 20000)[0].ravel()
+
+    print(f"\n{'moteur':>8} {'manquantes':>11} {'négatives':>10} {'x100':>8} {'moyenne normale':>16}")
+    for moteur, valeurs in [('python', valeurs_python), ('numpy', valeurs_numpy)]:
+        normales = valeurs[(valeurs > 0) & (valeurs < 1000)]
+        print(f"{moteur:>8} {np.isnan(valeurs).mean():>11.4f} {(valeurs < 0).mean():>10.4f} "
+              f"{(valeurs >= 1000).mean():>8.4f} {normales.mean():>16.2f}")
+
+def relire_mesures(filepath, format_sortie):
+    """Relit un fichier de consommation et retourne son nombre de mesures"""
+
+    if format_sortie == 'json':
+        with open(filepath, encoding='utf-8') as f:
+            return sum(len(batiment['mesures']) for batiment in json.load(f))
+    if format_sortie == 'parquet':
+        return pq.read_table(filepath).num_rows
+    if format_sortie == 'jsonl.gz':
+        f = gzip.open(filepath, 'rt', encoding='utf-8')
+    elif format_sortie == 'jsonl.zst':
+        f = io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(filepath, 'rb')),
+                             encoding='utf-8')
+    else:
+        f = open(filepath, encoding='utf-8')
+    with f:
+        nb = 0
+        for ligne in f:
+            json.loads(ligne)
+            nb += 1
+        return nb
+
+def bench_formats(tailles):
+    """Compare les formats de sortie IoT: écriture, taille sur disque et relecture d'un jour"""
+
+    date = datetime(2025, 1, 1)
+    print(f"{'bâtiments':>10} {'format':>10} {'écriture (s)':>13} {'taille (Mo)':>12} "
+          f"{'ratio':>6} {'relecture (s)':>14} {'mesures':>9}")
+    for nb_batiments in tailles:
+        regions, batiments, compteurs = jeu_de_donnees(nb_batiments)
+        taille_json = None
+        for format_sortie in FORMATS_SORTIE:
+            try:
+                generator = JSONConsommationGenerator(batiments, compteurs, regions,
+                                                      format_sortie=format_sortie)
+            except ImportError as e:
+                print(f"{nb_batiments:>10} {format_sortie:>10}   ignoré: {e}")
+                continue
+
+            with tempfile.TemporaryDirectory() as output_dir:
+                # Même graine pour chaque format: les mêmes mesures sont écrites
+                debut = time.perf_counter()
+                fichiers = [
+                    generator.generer_fichier_json_tache(type_energie, date, output_dir, 42)
+                    for type_energie in ['electricite', 'eau', 'gaz']
+                ]
+                duree_ecriture = time.perf_counter() - debut
+                taille = sum(os.path.getsize(f) for f in fichiers)
+
+                debut = time.perf_counter()
+                nb_mesures = sum(relire_mesures(f, format_sortie) for f in fichiers)
+                duree_relecture = time.perf_counter() - debut
+
+            taille_json = taille_json or taille
+            print(f"{nb_batiments:>10} {format_sortie:>10} {duree_ecriture:>13.2f} "
+                  f"{taille / (1024 * 1024):>12.2f} {taille_json / taille:>5.1f}x "
+                  f"{duree_relecture:>14.2f} {nb_mesures:>9}")
+
+def bench_serialiseurs(tailles, nb_jours=365):
+    """Écrit une année de fichiers JSON journaliers avec chaque sérialiseur (écriture seule)"""
+
+    class GenerateurPregenere(JSONConsommationGenerator):
+        """Rejoue des bâtiments déjà générés: seule la sérialisation est mesurée"""
+        def iterer_batiments_json(self, type_energie, date):
+            return iter(self.jours[type_energie])
+
+    types_energie = ['electricite', 'eau', 'gaz']
+    date = datetime(2025, 1, 1)
+    print(f"{'bâtiments':>10} {'sérialiseur':>16} {'fichiers':>9} {'durée (s)':>10} "
+          f"{'Mo/s':>8} {'gain':>7}")
+    for nb_batiments in tailles:
+        regions, batiments, compteurs = jeu_de_donnees(nb_batiments)
+        jours = {
+            type_energie: list(JSONConsommationGenerator(batiments, compteurs, regions, moteur='numpy')
+                               .iterer_batiments_json(type_energie, date))
+            for type_energie in types_energie
+        }
+
+        def ecrire_annee(output_dir, ecrire):
+            octets = 0
+            for i in range(nb_jours):
+                for type_energie in types_energie:
+                    octets += os.path.getsize(ecrire(type_energie, date + timedelta(days=i), output_dir))
+            return octets
+
+        # Référence: json.dump dans un fichier texte (écriture d'origine)
+        def ecrire_json_dump(type_energie, jour, output_dir):
+            filepath = os.path.join(output_dir, f"{type_energie}_{jour.strftime('%d_%m_%Y')}.json")
+            with open(filepath, 'w', encoding='utf-8') as f:
+                json.dump(jours[type_energie], f, indent=2, ensure_ascii=False)
+            return filepath
+
+        ecritures = [('json.dump texte', ecrire_json_dump)]
+        for nom in SERIALISEURS:
+            try:
+                generator = GenerateurPregenere(batiments, compteurs, regions, serialiseur=nom)
+            except ImportError as e:
+                print(f"{nb_batiments:>10} {nom:>16}   ignoré: {e}")
+                continue
+            generator.jours = jours
+            ecritures.append((nom, generator.generer_fichier_json_journalier))
+
+        duree_reference = None
+        contenus = set()
+        for nom, ecrire in ecritures:
+            with tempfile.TemporaryDirectory() as output_dir:
+                debut = time.perf_counter()
+                octets = ecrire_annee(output_dir, ecrire)
+                duree = time.perf_counter() - debut
+                with open(ecrire('eau', date, output_dir), 'rb') as f:
+                    contenus.add(f.read())
+            duree_reference = duree_reference or duree
+            print(f"{nb_batiments:>10} {nom:>16} {nb_jours * len(types_energie):>9} {duree:>10.2f} "
+                  f"{octets / (1024 * 1024) / duree:>8.1f} {duree_reference / duree:>6.1f}x")
+        print(f"{'':>10} sorties identiques: {'oui' if len(contenus) == 1 else 'NON'}")
+
+def bench_sql_lots(tailles):
+    """Compare l'export SQL une ligne par INSERT et en INSERT multi-lignes"""
+
+    modes = [
+        ('ligne', {}),
+        ('lot 500', {'taille_lot': 500}),
+        ('lot 5000+tx', {'taille_lot': 5000, 'transactions': True}),
+    ]
+    print(f"{'contrats':>9} {'mode':>12} {'durée (s)':>10} {'INSERT':>9} {'taille (Mo)':>12}")
+    for nb_contrats in tailles:
+        with avec_volumes(nb_contrats=nb_contrats), sans_sortie():
+            generator = GreenCityDataGenerator()
+            generator.generer_toutes_donnees()
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            filename = os.path.join(output_dir, 'insert_data.sql')
+            for nom, options in modes:
+                with sans_sortie():
+                    debut = time.perf_counter()
+                    generator.generer_sql_inserts(filename, **options)
+                    duree = time.perf_counter() - debut
+                with open(filename, encoding='utf-8') as f:
+                    nb_inserts = sum(ligne.startswith('INSERT INTO') for ligne in f)
+                taille = os.path.getsize(filename) / (1024 * 1024)
+                print(f"{nb_contrats:>9} {nom:>12} {duree:>10.2f} {nb_inserts:>9} {taille:>12.2f}")
+
+def bench_flux_memoire(tailles):
+    """Compare le pic mémoire de l'étape MySQL: tables en mémoire et écriture en flux"""
+
+    def en_memoire(filename):
+        generator = GreenCityDataGenerator()
+        generator.generer_toutes_donnees()
+        return generator.generer_sql_inserts(filename)
+
+    def en_flux(filename):
+        generator = GreenCityDataGenerator()
+        generator.generer_dimensions()
+        return generator.generer_sql_inserts(filename, tables=generator.flux_tables())
+
+    print(f"{'contrats':>9} {'mode':>8} {'durée (s)':>10} {'pic (Mo)':>10}")
+    for nb_contrats in tailles:
+        with avec_volumes(nb_contrats=nb_contrats), tempfile.TemporaryDirectory() as output_dir:
+            filename = os.path.join(output_dir, 'insert_data.sql')
+            for nom, fonction in [('mémoire', en_memoire), ('flux', en_flux)]:
+                with sans_sortie():
+                    duree, pic = mesurer(fonction, filename)
+                print(f"{nb_contrats:>9} {nom:>8} {duree:>10.2f} {pic:>10.2f}")
+
+def bench_factures_index(tailles):
+    """Mesure le passage à l'échelle de la génération des factures (compteurs ∝ contrats)"""
+
+    print(f"{'contrats':>9} {'compteurs':>10} {'balayage (s)':>13} {'factures (s)':>13} {'µs/contrat':>11}")
+    for nb_contrats in tailles:
+        # Même ratio compteurs/contrats que la configuration par défaut
+        nb_batiments = max(1, nb_contrats * CONFIG['nb_batiments'] // CONFIG['nb_contrats'])
+        with avec_volumes(nb_contrats=nb_contrats, nb_batiments=nb_batiments), sans_sortie():
+            generator = GreenCityDataGenerator()
+            generator.generer_dimensions()
+
+        # Ancienne recherche: balayage linéaire des compteurs pour chaque contrat
+        debut = time.perf_counter()
+        for contrat in generator.contrats:
+            next(c for c in generator.compteurs if c['id_compteur'] == contrat['id_compteur'])
+        duree_balayage = time.perf_counter() - debut
+
+        debut = time.perf_counter()
+        for _ in generator.iterer_factures():
+            pass
+        duree = time.perf_counter() - debut
+
+        print(f"{nb_contrats:>9} {len(generator.compteurs):>10} {duree_balayage:>13.3f} "
+              f"{duree:>13.3f} {duree / nb_contrats * 1e6:>11.1f}")
+
+def bench_enregistrements(tailles):
+    """Compare la mémoire occupée par N factures: dicts formatés et enregistrements compacts"""
+
+    def memoire_liste(construire):
+        tracemalloc.start()
+        lignes = construire()
+        taille, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return len(lignes), taille / (1024 * 1024)
+
+    print(f"{'factures':>9} {'format':>14} {'mémoire (Mo)':>13} {'octets/facture':>15}")
+    for nb_factures in tailles:
+        # Assez de contrats pour produire nb_factures factures
+        with avec_volumes(nb_contrats=nb_factures // 6 + 1), sans_sortie():
+            generator = GreenCityDataGenerator()
+            generator.generer_dimensions()
+
+        formats = [
+            ('dict', lambda: [dict(f.items()) for f in itertools.islice(generator.iterer_factures(), nb_factures)]),
+            ('Enregistrement', lambda: list(itertools.islice(generator.iterer_factures(), nb_factures))),
+        ]
+        for nom, construire in formats:
+            nb, taille = memoire_liste(construire)
+            print(f"{nb:>9} {nom:>14} {taille:>13.1f} {taille * 1024 * 1024 / nb:>15.0f}")
+
+
+def bench_rapports_csv(tailles, nb_annees=5):
+    """Rapports CSV mensuels sur plusieurs années: séquentiel puis 1, 2 et 4 processus"""
+
+    debut, fin = datetime(2020, 1, 1), datetime(2020 + nb_annees - 1, 12, 31)
+    print(f"{'bâtiments':>10} {'processus':>10} {'rapports':>9} {'durée (s)':>10} {'lignes/s':>12}")
+    for nb_batiments in tailles:
+        regions, batiments, _ = jeu_de_donnees(nb_batiments)
+        generator = CSVEnvironnementalGenerator(batiments, regions)
+        with tempfile.TemporaryDirectory() as racine:
+            for workers in (None, 1, 2, 4):
+                output_dir = os.path.join(racine, str(workers))
+                with sans_sortie():
+                    debut_mesure = time.perf_counter()
+                    fichiers = generator.generer_tous_rapports(debut, fin, output_dir, workers=workers)
+                    duree = time.perf_counter() - debut_mesure
+                nb_lignes = sum(1 for f in fichiers for _ in open(f, encoding='utf-8')) - len(fichiers)
+                print(f"{nb_batiments:>10} {workers or 'global':>10} {len(fichiers):>9} "
+                      f"{duree:>10.2f} {nb_lignes / duree:>12,.0f}")
+            noms = sorted(os.listdir(os.path.join(racine, '1')))
+            identiques = all(
+                not filecmp.cmpfiles(os.path.join(racine, '1'), os.path.join(racine, str(w)),
+                                     noms, shallow=False)[1]
+                for w in (2, 4)
+            )
+            print(f"{'':>10} sorties identiques quel que soit le nombre de processus: "
+                  f"{'oui' if identiques else 'NON'}")
+
+
+def bench_dates(tailles):
+    """Normalise N dates aux formats de format_date_incorrect: ligne par ligne et vectorisé"""
+
+    def normaliser_ligne(texte):
+        # Référence: essai de chaque format sur chaque ligne
+        texte = texte.strip()
+        for _, format_date in FORMATS_DATES.values():
+            try:
+                if format_date is None:
+                    return datetime.fromtimestamp(float(texte))
+                return datetime.strptime(texte, format_date)
+            except ValueError:
+                continue
+        return None
+
+    rng = random.Random(42)
+    jours = [datetime(2024, 1, 1) + timedelta(days=i) for i in range(396)]
+    print(f"{'dates':>10} {'méthode':>14} {'durée (s)':>10} {'dates/s':>12} {'gain':>7}")
+    for nb_dates in tailles:
+        dates = []
+        for _ in range(nb_dates):
+            jour = rng.choice(jours)
+            if rng.random() < DEFAUTS_QUALITE['taux_format_date_incorrect']:
+                dates.append(rng.choice([jour.strftime('%d/%m/%Y'), jour.strftime('%m-%d-%Y'),
+                                         jour.strftime('%Y/%m/%d'), str(jour.timestamp())]))
+            else:
+                dates.append(jour.strftime('%Y-%m-%d'))
+        serie = pd.Series(dates)
+
+        methodes = [
+            ('ligne à ligne', lambda: pd.to_datetime(pd.Series([normaliser_ligne(d) for d in dates]))),
+            ('vectorisé', lambda: NormaliseurDates().normaliser(serie)),
+        ]
+        duree_reference = None
+        resultats = []
+        for nom, normaliser in methodes:
+            debut = time.perf_counter()
+            resultats.append(normaliser())
+            duree = time.perf_counter() - debut
+            duree_reference = duree_reference or duree
+            print(f"{nb_dates:>10} {nom:>14} {duree:>10.2f} {nb_dates / duree:>12,.0f} "
+                  f"{duree_reference / duree:>6.1f}x")
+        print(f"{'':>10} résultats identiques: {'oui' if resultats[0].equals(resultats[1]) else 'NON'}")
+
+
+def bench_suite(facteurs, sortie='output/benchmarks/suite.jsonl'):
+    """Chronomètre et profile la mémoire de chaque étape aux facteurs d'échelle donnés
+    
+    Une ligne JSON par (facteur, étape) est ajoutée à `sortie` pour suivre les régressions.
+    """
+
+    def taille_dossier(dossier):
+        return sum(os.path.getsize(os.path.join(dossier, nom)) for nom in os.listdir(dossier))
+
+    def lignes_csv(fichiers):
+        nb = 0
+        for fichier in fichiers:
+            with open(fichier, encoding='utf-8') as f:
+                nb += sum(1 for _ in f) - 1  # sans l'en-tête
+        return nb
+
+    os.makedirs(os.path.dirname(sortie) or '.', exist_ok=True)
+    horodatage = datetime.now().isoformat(timespec='seconds')
+    print(f"{'SF':>5} {'étape':>22} {'durée (s)':>10} {'pic (Mo)':>9} {'lignes':>9} {'lignes/s':>10}")
+
+    # CONFIG est remis dans son état initial après la dernière échelle
+    with avec_volumes(), open(sortie, 'a', encoding='utf-8') as f_sortie:
+        for facteur in facteurs:
+            appliquer_facteur_echelle(facteur)
+            generator = GreenCityDataGenerator()
+            resultats = []
+
+            def etape(nom, fonction, lignes=None, dossier=None):
+                with sans_sortie():
+                    duree, pic = mesurer(fonction)
+                nb_lignes = lignes() if lignes else None
+                resultat = {
+                    'horodatage': horodatage,
+                    'python': platform.python_version(),
+                    'sf': facteur,
+                    'etape': nom,
+                    'duree_s': round(duree, 4),
+                    'pic_mo': round(pic, 2),
+                    'lignes': nb_lignes,
+                    'lignes_par_s': round(nb_lignes / duree) if nb_lignes and duree else None,
+                    'octets': taille_dossier(dossier) if dossier else None,
+                }
+                resultats.append(resultat)
+                debit = f"{resultat['lignes_par_s']:,}" if resultat['lignes_par_s'] else '-'
+                print(f"{facteur:>5} {nom:>22} {duree:>10.2f} {pic:>9.1f} "
+                      f"{nb_lignes if nb_lignes is not None else '-':>9} {debit:>10}")
+
+            # Étapes generer_* de GreenCityDataGenerator, dans l'ordre des FK
+            for table, _ in generator.TABLES_SQL:
+                etape(f"generer_{table}", getattr(generator, f"generer_{table}"),
+                      lignes=lambda table=table: len(getattr(generator, table)))
+            nb_total = sum(len(getattr(generator, table)) for table, _ in generator.TABLES_SQL)
+
+            # Écrivains
+            with tempfile.TemporaryDirectory() as output_dir:
+                filename = os.path.join(output_dir, 'insert_data.sql')
+                etape('sql_ligne', lambda: generator.generer_sql_inserts(filename),
+                      lignes=lambda: nb_total, dossier=output_dir)
+            with tempfile.TemporaryDirectory() as output_dir:
+                filename = os.path.join(output_dir, 'insert_data.sql')
+                etape('sql_lot_1000', lambda: generator.generer_sql_inserts(filename, taille_lot=1000),
+                      lignes=lambda: nb_total, dossier=output_dir)
+            with tempfile.TemporaryDirectory() as output_dir:
+                etape('csv_tables', lambda: generator.generer_csv_tables(output_dir),
+                      lignes=lambda: nb_total, dossier=output_dir)
+
+            # Fichiers JSON IoT (une journée, trois types d'énergie)
+            json_generator = JSONConsommationGenerator(
+                generator.batiments, generator.compteurs, generator.regions
+            )
+            with tempfile.TemporaryDirectory() as output_dir:
+                etape('json_journee',
+                      lambda: json_generator.generer_tous_fichiers_json(
+                          datetime(2025, 1, 1), datetime(2025, 1, 1), output_dir),
+                      lignes=lambda: len(generator.compteurs) * 24, dossier=output_dir)
+
+            # Rapports CSV environnementaux (toute la période)
+            csv_generator = CSVEnvironnementalGenerator(generator.batiments, generator.regions)
+            with tempfile.TemporaryDirectory() as output_dir:
+                rapports = []
+                etape('csv_rapports',
+                      lambda: rapports.extend(csv_generator.generer_tous_rapports(DATE_DEBUT, DATE_FIN, output_dir)),
+                      lignes=lambda: lignes_csv(rapports),
+                      dossier=output_dir)
+
+            for resultat in resultats:
+                f_sortie.write(json.dumps(resultat, ensure_ascii=False) + "\n")
+
+    print(f"\nRésultats ajoutés à {sortie}")
+
+
+# Benchmark -> (fonction, tailles par défaut)
+BENCHMARKS = {
+    'dates': (bench_dates, [1000000, 5000000]),
+    'enregistrements': (bench_enregistrements, [100000, 1000000]),
+    'factures_index': (bench_factures_index, [1000, 4000, 16000]),
+    'flux_memoire': (bench_flux_memoire, [2000, 8000]),
+    'formats': (bench_formats, [100, 1000]),
+    'json_index': (bench_json_index, [100, 1000, 3000]),
+    'json_streaming': (bench_json_streaming, [100, 1000, 3000]),
+    'mesures_numpy': (bench_mesures_numpy, [1000, 10000]),
+    'rapports_csv': (bench_rapports_csv, [1000, 10000]),
+    'serialiseurs': (bench_serialiseurs, [50, 500]),
+    'sql_lots': (bench_sql_lots, [180, 3000]),
+    'suite': (bench_suite, [1, 10, 100]),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks des générateurs GreenCity")
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--tailles', type=float, nargs='+', default=None,
+                        help="Volumes à tester (bâtiments, contrats, factures ou facteurs "
+                             "d'échelle selon le benchmark; facteurs décimaux pour suite, ex. 0.1)")
+    parser.add_argument('--sortie', default='output/benchmarks/suite.jsonl',
+                        help="Fichier JSON Lines des résultats (benchmark suite)")
+    args = parser.parse_args()
+
+    fonction, tailles_defaut = BENCHMARKS[args.benchmark]
+    tailles = [int(t) if t.is_integer() else t for t in args.tailles] if args.tailles else tailles_defaut
+    if fonction is not bench_suite and any(isinstance(t, float) for t in tailles):
+        parser.error(f"--tailles: volumes entiers attendus pour {args.benchmark} "
+                     f"(facteurs décimaux: benchmark suite)")
+    if fonction is bench_suite:
+        bench_suite(tailles, args.sortie)
+    else:
+        fonction(tailles)
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,22 @@ CONFIG = {
     'nb_temperatures_par_region': 365,  # 1 an de données
 }
 
+# Volumes proportionnels au facteur d'échelle (les ratios restent fixes)
+VOLUMES_ECHELLE = ['nb_batiments', 'nb_clients', 'nb_contrats']
+CONFIG_BASE = dict(CONFIG)
+
+def appliquer_facteur_echelle(facteur):
+    """Met CONFIG à l'échelle SF (SF 1 = volumes de base), à la manière des benchmarks TPC
+    
+    Seuls les volumes absolus sont multipliés; les ratios (compteurs par bâtiment,
+    factures par contrat, taux de paiement, températures par région) et le nombre
+    de régions (limité à REGIONS_DATA) restent inchangés.
+    """
+    CONFIG.update(CONFIG_BASE)
+    for cle in VOLUMES_ECHELLE:
+        CONFIG[cle] = max(1, round(CONFIG_BASE[cle] * facteur))
+    return CONFIG
+
 # Période de données
 DATE_DEBUT = datetime(2024, 1, 1)
 DATE_FIN = datetime(2025, 1, 31)
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# enregistrements.py - Types compacts pour les lignes générées
+
+from datetime import date
+
+
+class Enregistrement:
+    """Ligne compacte: attributs en __slots__, dates en ordinaux, identifiants numériques
+
+    Se lit comme un dict (ligne['champ'], get, keys, copy): les dates et les
+    identifiants ne sont formatés qu'à la lecture, au moment de l'écriture.
+    Une valeur déjà sous forme de chaîne (ex: date au format incorrect) est
+    retournée telle quelle.
+    """
+    __slots__ = ()
+    DATES = ()          # Champs stockés en ordinal -> 'YYYY-MM-DD'
+    IDENTIFIANTS = {}   # Champ stocké en entier -> (préfixe, largeur)
+
+    def __init__(self, **valeurs):
+        for champ in self.__slots__:
+            setattr(self, champ, valeurs.get(champ))
+
+    def __getitem__(self, champ):
+        try:
+            valeur = getattr(self, champ)
+        except AttributeError:
+            raise KeyError(champ) from None
+        if isinstance(valeur, int):
+            if champ in self.DATES:
+                return date.fromordinal(valeur).isoformat()
+            if champ in self.IDENTIFIANTS:
+                prefixe, largeur = self.IDENTIFIANTS[champ]
+                return f"{prefixe}{str(valeur).zfill(largeur)}"
+        return valeur
+
+    def __setitem__(self, champ, valeur):
+        if champ not in self.__slots__:
+            raise KeyError(champ)
+        setattr(self, champ, valeur)
+
+    def __contains__(self, champ):
+        return champ in self.__slots__
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self.items())})"
+
+    def keys(self):
+        return self.__slots__
+
+    def items(self):
+        return [(champ, self[champ]) for champ in self.__slots__]
+
+    def get(self, champ, defaut=None):
+        try:
+            return self[champ]
+        except KeyError:
+            return defaut
+
+    def copy(self):
+        copie = type(self).__new__(type(self))
+        for champ in self.__slots__:
+            setattr(copie, champ, getattr(self, champ))
+        return copie
+
+
+class Batiment(Enregistrement):
+    __slots__ = ('id_batiment', 'id_region', 'nom_batiment', 'adresse',
+                 'surface_m2', 'type_batiment', 'nb_etages', 'annee_construction')
+
+
+class Compteur(Enregistrement):
+    __slots__ = ('id_compteur', 'id_batiment', 'id_type_energie',
+                 'date_installation', 'statut')
+    DATES = ('date_installation',)
+
+
+class Client(Enregistrement):
+    __slots__ = ('id_client', 'nom', 'prenom', 'email', 'telephone',
+                 'type_client', 'adresse', 'id_region', 'date_inscription', 'statut')
+    DATES = ('date_inscription',)
+    IDENTIFIANTS = {'id_client': ('CLI', 5)}
+
+
+class Facture(Enregistrement):
+    __slots__ = ('id_facture', 'id_contrat', 'date_emission', 'date_echeance',
+                 'periode_debut', 'periode_fin', 'montant_ht', 'tva', 'montant_ttc',
+                 'cout_energie', 'consommation', 'statut_paiement')
+    DATES = ('date_emission', 'date_echeance', 'periode_debut', 'periode_fin')
+    IDENTIFIANTS = {'id_facture': ('FAC', 8)}
+
+
+class Paiement(Enregistrement):
+    __slots__ = ('id_paiement', 'id_facture', 'date_paiement', 'montant',
+                 'mode_paiement', 'reference_transaction')
+    DATES = ('date_paiement',)
+    IDENTIFIANTS = {'id_paiement': ('PAY', 8), 'id_facture': ('FAC', 8)}
+
+
+class Temperature(Enregistrement):
+    __slots__ = ('id_region', 'date_mesure', 'temperature_min',
+                 'temperature_max', 'temperature_moyenne')
+    DATES = ('date_mesure',)
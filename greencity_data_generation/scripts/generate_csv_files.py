@@ -2,17 +2,46 @@
 # generate_csv_files.py - Génération des fichiers CSV environnementaux
 
 import csv
+import hashlib
 import random
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from config import *
+from manifeste import empreinte, empreinte_fichier
 
 random.seed(42)
 
+# Base d'émission CO2 (kg/m²) selon le type de bâtiment
+EMISSION_BASE = {
+    'Résidentiel': 0.15,
+    'Commercial': 0.25,
+    'Industriel': 0.45,
+    'Mixte': 0.20
+}
+
+# Colonnes des rapports mensuels
+COLONNES_RAPPORT = ['id_region', 'id_batiment', 'date_rapport', 'emission_CO2_kg', 'taux_recyclage']
+
 class CSVEnvironnementalGenerator:
     def __init__(self, batiments, regions):
         self.batiments = batiments
         self.regions = regions
+        # Source aléatoire: le générateur global par défaut, une instance
+        # dédiée par mois quand les rapports ont chacun leur graine (voir graine_mois)
+        self.aleatoire = random
+        # Rapports conservés par le manifeste lors du dernier generer_tous_rapports
+        self.fichiers_inchanges = []
+        # Émission de base de chaque bâtiment (surface x base du type), calculée une fois
+        self.emissions_base = [
+            (
+                batiment['id_region'],
+                batiment['id_batiment'],
+                abs(batiment.get('surface_m2', 1000))  # abs pour gérer les erreurs
+                * EMISSION_BASE.get(batiment.get('type_batiment', 'Commercial'), 0.20)
+            )
+            for batiment in batiments
+        ]
     
     def generer_rapport_mensuel(self, mois, annee, output_dir='output/csv'):
         """Génère un rapport environnemental mensuel"""
@@ -25,122 +54,185 @@ class CSVEnvironnementalGenerator:
         else:
             date_rapport = datetime(annee, mois + 1, 1) - timedelta(days=1)
         
-        filename = f"env_reports_{str(mois).zfill(2)}_{annee}.csv"
-        filepath = os.path.join(output_dir, filename)
+        filepath = self.chemin_rapport(mois, annee, output_dir)
+        date_iso = date_rapport.strftime('%Y-%m-%d')
+        date_fr = date_rapport.strftime('%d/%m/%Y')
         
+        # Variation saisonnière (plus d'émissions en hiver)
+        saison = (1.3, 1.8) if mois in [11, 12, 1, 2, 3] else (0.8, 1.2)
+        
+        uniform = self.aleatoire.uniform
+        tirage = self.aleatoire.random
         rows = []
         
-        for batiment in self.batiments:
-            # Émissions CO2 basées sur le type de bâtiment
-            type_bat = batiment.get('type_batiment', 'Commercial')
-            surface = abs(batiment.get('surface_m2', 1000))  # abs pour gérer les erreurs
-            
-            # Base d'émission par m² selon le type
-            emission_base = {
-                'Résidentiel': 0.15,
-                'Commercial': 0.25,
-                'Industriel': 0.45,
-                'Mixte': 0.20
-            }
-            
-            base = emission_base.get(type_bat, 0.20)
-            
-            # Variation saisonnière (plus d'émissions en hiver)
-            if mois in [11, 12, 1, 2, 3]:
-                facteur_saison = random.uniform(1.3, 1.8)
-            else:
-                facteur_saison = random.uniform(0.8, 1.2)
-            
-            emission_co2 = round(surface * base * facteur_saison * random.uniform(0.8, 1.2), 2)
-            taux_recyclage = round(random.uniform(0.45, 0.85), 2)
-            
-            row = {
-                'id_region': batiment['id_region'],
-                'id_batiment': batiment['id_batiment'],
-                'date_rapport': date_rapport.strftime('%Y-%m-%d'),
-                'emission_CO2_kg': emission_co2,
-                'taux_recyclage': taux_recyclage
-            }
+        for id_region, id_batiment, emission_base in self.emissions_base:
+            facteur_saison = uniform(*saison)
+            emission_co2 = round(emission_base * facteur_saison * uniform(0.8, 1.2), 2)
+            taux_recyclage = round(uniform(0.45, 0.85), 2)
+            emission = emission_co2
+            date = date_iso
             
             # Introduire des défauts de qualité
             
             # Valeur manquante
-            if random.random() < DEFAUTS_QUALITE['taux_valeurs_manquantes']:
-                row['emission_CO2_kg'] = ''
+            if tirage() < DEFAUTS_QUALITE['taux_valeurs_manquantes']:
+                emission = ''
             
             # Valeur incohérente (négative ou très élevée)
-            if random.random() < DEFAUTS_QUALITE['taux_valeurs_incoherentes']:
-                if random.random() < 0.5:
-                    row['emission_CO2_kg'] = -abs(emission_co2)
+            if tirage() < DEFAUTS_QUALITE['taux_valeurs_incoherentes']:
+                if tirage() < 0.5:
+                    emission = -abs(emission_co2)
                 else:
-                    row['taux_recyclage'] = round(random.uniform(1.5, 2.0), 2)  # >100%
+                    taux_recyclage = round(uniform(1.5, 2.0), 2)  # >100%
             
             # Format de date incorrect
-            if random.random() < DEFAUTS_QUALITE['taux_format_date_incorrect']:
-                row['date_rapport'] = date_rapport.strftime('%d/%m/%Y')
+            if tirage() < DEFAUTS_QUALITE['taux_format_date_incorrect']:
+                date = date_fr
             
             # Espaces inutiles
-            if random.random() < DEFAUTS_QUALITE['taux_espaces_inutiles']:
-                row['id_batiment'] = f"  {row['id_batiment']}  "
+            if tirage() < DEFAUTS_QUALITE['taux_espaces_inutiles']:
+                id_batiment = f"  {id_batiment}  "
             
-            rows.append(row)
+            rows.append((id_region, id_batiment, date, emission, taux_recyclage))
         
         # Ajouter quelques doublons
         nb_doublons = int(len(rows) * DEFAUTS_QUALITE['taux_doublons'])
         for _ in range(nb_doublons):
-            rows.append(random.choice(rows).copy())
+            rows.append(self.aleatoire.choice(rows))
         
         # Écrire le fichier CSV
         with open(filepath, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=['id_region', 'id_batiment', 'date_rapport', 
-                                                    'emission_CO2_kg', 'taux_recyclage'])
-            writer.writeheader()
+            writer = csv.writer(f)
+            writer.writerow(COLONNES_RAPPORT)
             writer.writerows(rows)
         
         return filepath, len(rows)
     
-    def generer_tous_rapports(self, date_debut, date_fin, output_dir='output/csv'):
-        """Génère tous les rapports mensuels pour une période"""
+    def chemin_rapport(self, mois, annee, output_dir='output/csv'):
+        """Chemin du rapport d'un mois"""
+        return os.path.join(output_dir, f"env_reports_{str(mois).zfill(2)}_{annee}.csv")
+    
+    def generer_rapport_tache(self, mois, annee, output_dir, graine):
+        """Génère un rapport mensuel avec une graine propre au mois"""
+        self.aleatoire = random.Random(graine_mois(graine, mois, annee))
+        return self.generer_rapport_mensuel(mois, annee, output_dir)
+    
+    def generer_tous_rapports(self, date_debut, date_fin, output_dir='output/csv',
+                              manifeste=None, graine=42, workers=None):
+        """Génère tous les rapports mensuels pour une période
+        
+        Avec workers=N, les mois sont répartis sur N processus et chaque rapport
+        a sa propre graine: le résultat est identique quel que soit N.
+        Sans workers, la génération reste séquentielle sur le générateur global.
+        
+        Avec un manifeste (graine par mois obligatoire, workers=1 par défaut), les
+        rapports dont les paramètres et le contenu n'ont pas changé sont conservés:
+        ils restent dans la liste retournée et sont aussi listés dans fichiers_inchanges.
+        """
         print("\n" + "="*60)
         print("📄 GÉNÉRATION DES FICHIERS CSV ENVIRONNEMENTAUX")
         print("="*60 + "\n")
         
-        fichiers_generes = []
+        mois = []
         date_courante = date_debut
-        
         while date_courante <= date_fin:
-            filepath, nb_rows = self.generer_rapport_mensuel(
-                date_courante.month,
-                date_courante.year,
-                output_dir
-            )
-            fichiers_generes.append(filepath)
-            print(f"  ✓ {os.path.basename(filepath)} - {nb_rows} enregistrements")
-            
+            mois.append((date_courante.month, date_courante.year))
             # Passer au mois suivant
             if date_courante.month == 12:
                 date_courante = datetime(date_courante.year + 1, 1, 1)
             else:
                 date_courante = datetime(date_courante.year, date_courante.month + 1, 1)
         
-        print(f"\n✅ {len(fichiers_generes)} fichiers CSV générés dans {output_dir}")
+        if manifeste is not None and workers is None:
+            workers = 1
+        self.fichiers_inchanges = []
+        
+        if workers is None:
+            fichiers_generes = []
+            for m, annee in mois:
+                filepath, nb_rows = self.generer_rapport_mensuel(m, annee, output_dir)
+                print(f"  ✓ {os.path.basename(filepath)} - {nb_rows} enregistrements")
+                fichiers_generes.append(filepath)
+            print(f"\n✅ {len(fichiers_generes)} fichiers CSV générés dans {output_dir}")
+            return fichiers_generes
+        
+        taches = [(m, annee, output_dir, graine) for m, annee in mois]
+        cles = {}
+        inchanges = set()
+        if manifeste is not None:
+            parametres = empreinte(self.batiments, DEFAUTS_QUALITE, graine, empreinte_fichier(__file__))
+            for m, annee in mois:
+                filepath = self.chemin_rapport(m, annee, output_dir)
+                cle = empreinte(parametres, f"{annee}-{str(m).zfill(2)}")
+                if manifeste.a_jour(filepath, cle):
+                    inchanges.add(filepath)
+                else:
+                    cles[filepath] = cle
+            taches = [t for t in taches if self.chemin_rapport(*t[:3]) not in inchanges]
+        
+        if workers > 1:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_initialiser_worker,
+                initargs=(self.batiments, self.regions)
+            ) as executor:
+                resultats = dict(zip(
+                    [self.chemin_rapport(*t[:3]) for t in taches],
+                    executor.map(_executer_tache, taches)
+                ))
+        else:
+            resultats = {
+                self.chemin_rapport(*t[:3]): self.generer_rapport_tache(*t) for t in taches
+            }
+        
+        fichiers_generes = []
+        for m, annee in mois:
+            filepath = self.chemin_rapport(m, annee, output_dir)
+            if filepath in inchanges:
+                print(f"  ↺ {os.path.basename(filepath)} - inchangé (manifeste)")
+            else:
+                _, nb_rows = resultats[filepath]
+                if filepath in cles:
+                    manifeste.enregistrer(filepath, cles[filepath])
+                print(f"  ✓ {os.path.basename(filepath)} - {nb_rows} enregistrements")
+            fichiers_generes.append(filepath)
+        
+        self.fichiers_inchanges = [f for f in fichiers_generes if f in inchanges]
+        print(f"\n✅ {len(fichiers_generes) - len(inchanges)} fichiers CSV générés dans {output_dir} "
+              f"({workers} processus)")
+        if manifeste is not None:
+            print(f"   ↺ {len(inchanges)} fichiers inchangés conservés (manifeste)")
         return fichiers_generes
 
 
+def graine_mois(graine, mois, annee):
+    """Graine déterministe d'un rapport mensuel, indépendante des autres mois"""
+    cle = f"{graine}|{annee}-{str(mois).zfill(2)}".encode('utf-8')
+    return int.from_bytes(hashlib.sha256(cle).digest()[:8], 'big')
+
+
+# Générateur propre à chaque processus du pool (initialisé une seule fois)
+_generator_worker = None
+
+def _initialiser_worker(batiments, regions):
+    global _generator_worker
+    _generator_worker = CSVEnvironnementalGenerator(batiments, regions)
+
+def _executer_tache(tache):
+    return _generator_worker.generer_rapport_tache(*tache)
+
+
 def generer_exemple_csv():
     """Génère les fichiers CSV d'exemple"""
-    from generate_mysql_data import GreenCityDataGenerator
+    from generate_mysql_data import JeuDeDonnees
     
-    # Générer d'abord les données de base
-    generator = GreenCityDataGenerator()
-    generator.generer_regions()
-    generator.generer_types_energie()
-    generator.generer_batiments()
+    # Seules les tables nécessaires (bâtiments, régions) sont générées
+    donnees = JeuDeDonnees()
     
     # Générer les fichiers CSV pour 2024
     csv_gen = CSVEnvironnementalGenerator(
-        generator.batiments,
-        generator.regions
+        donnees.batiments,
+        donnees.regions
     )
     
     csv_gen.generer_tous_rapports(
@@ -1,72 +1,201 @@
 # -*- coding: utf-8 -*-
 # generate_json_files.py - Génération des fichiers JSON de consommation IoT
 
-import json
+import gzip
+import hashlib
 import random
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from config import *
+from manifeste import empreinte, empreinte_fichier
+from serialisation import TAILLE_TAMPON, choisir_serialiseur
+
+try:
+    import numpy as np
+except ImportError:  # Le moteur vectorisé est optionnel
+    np = None
+
+try:
+    import zstandard
+except ImportError:  # Format jsonl.zst optionnel
+    zstandard = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Format parquet optionnel
+    pa = pq = None
+
+# Format de sortie -> extension des fichiers journaliers
+FORMATS_SORTIE = {
+    'json': '.json',            # Tableau de bâtiments indenté (format historique)
+    'jsonl': '.jsonl',          # Une mesure par ligne, JSON compact
+    'jsonl.gz': '.jsonl.gz',
+    'jsonl.zst': '.jsonl.zst',
+    'parquet': '.parquet',      # Colonnes, partitionné par type_energie et date
+}
 
 random.seed(42)
 
 class JSONConsommationGenerator:
-    def __init__(self, batiments, compteurs, regions):
+    def __init__(self, batiments, compteurs, regions, streaming=False, moteur='python',
+                 format_sortie='json', serialiseur=None):
         self.batiments = batiments
         self.compteurs = compteurs
         self.regions = regions
+        # En mode streaming, chaque bâtiment est écrit dès qu'il est généré
+        # (mémoire constante quel que soit le nombre de bâtiments)
+        self.streaming = streaming
+        # Fichiers conservés par le manifeste lors du dernier generer_tous_fichiers_json
+        self.fichiers_inchanges = []
+        
+        # Moteur de génération des mesures: 'python' (mesure par mesure)
+        # ou 'numpy' (toutes les mesures du jour tirées en un seul bloc)
+        if moteur not in ('python', 'numpy'):
+            raise ValueError(f"Moteur inconnu: {moteur}")
+        if moteur == 'numpy' and np is None:
+            raise ImportError("Le moteur 'numpy' nécessite le paquet numpy")
+        self.moteur = moteur
+        self.rng = np.random.default_rng(42) if moteur == 'numpy' else None
+        
+        if format_sortie not in FORMATS_SORTIE:
+            raise ValueError(f"Format de sortie inconnu: {format_sortie}")
+        if format_sortie == 'jsonl.zst' and zstandard is None:
+            raise ImportError("Le format 'jsonl.zst' nécessite le paquet zstandard")
+        if format_sortie == 'parquet' and pa is None:
+            raise ImportError("Le format 'parquet' nécessite le paquet pyarrow")
+        self.format_sortie = format_sortie
+        
+        # Sérialiseur JSON (octets): orjson si installé, sinon la bibliothèque standard
+        self.serialiseur = choisir_serialiseur(serialiseur)
+        
+        # Source aléatoire des mesures: le générateur global du module par défaut,
+        # une instance dédiée par tâche en génération parallèle (voir graine_tache)
+        self.aleatoire = random
+        
+        # Index construits une seule fois: région → bâtiments et
+        # (bâtiment, type d'énergie) → compteurs
+        self.batiments_par_region = {}
+        for batiment in self.batiments:
+            self.batiments_par_region.setdefault(batiment['id_region'], []).append(batiment)
         
+        self.compteurs_par_batiment = {}
+        for compteur in self.compteurs:
+            cle = (compteur['id_batiment'], compteur['id_type_energie'])
+            self.compteurs_par_batiment.setdefault(cle, []).append(compteur)
+        
+    def tirer_mesure(self, type_energie, heure, mois, facteur=1.0):
+        """Tire une valeur de consommation (avec défauts de qualité): (clé, valeur)
+        
+        `facteur` ramène la consommation horaire à un pas plus fin (ex. 15/60).
+        """
+        # Valeurs de consommation réalistes par type
+        if type_energie == 'electricite':
+            base_conso = self.aleatoire.uniform(80, 200)
+            # Plus de consommation en journée (8h-18h)
+            if 8 <= heure <= 18:
+                base_conso *= self.aleatoire.uniform(1.2, 1.8)
+            cle_conso = 'consommation_kWh'
+        elif type_energie == 'eau':
+            base_conso = self.aleatoire.uniform(0.5, 3.0)
+            # Plus de consommation le matin et soir
+            if heure in [7, 8, 9, 18, 19, 20]:
+                base_conso *= self.aleatoire.uniform(1.5, 2.5)
+            cle_conso = 'consommation_m3'
+        else:  # gaz
+            base_conso = self.aleatoire.uniform(2.0, 8.0)
+            # Plus de consommation en hiver (basé sur le mois)
+            if mois in [11, 12, 1, 2, 3]:
+                base_conso *= self.aleatoire.uniform(1.5, 2.5)
+            cle_conso = 'consommation_m3'
+        base_conso *= facteur
+        
+        # Parfois valeur manquante
+        if self.aleatoire.random() < DEFAUTS_QUALITE['taux_valeurs_manquantes']:
+            return cle_conso, None
+        # Parfois valeur incohérente (négative ou très élevée)
+        if self.aleatoire.random() < DEFAUTS_QUALITE['taux_valeurs_incoherentes']:
+            return cle_conso, round(-base_conso if self.aleatoire.random() < 0.5 else base_conso * 100, 2)
+        return cle_conso, round(base_conso, 2)
+    
     def generer_mesures_horaires(self, compteur_id, type_energie, date_mesure, nb_heures=24):
         """Génère des mesures horaires pour un compteur"""
         mesures = []
         
         for heure in range(nb_heures):
             datetime_mesure = date_mesure.replace(hour=heure, minute=0, second=0)
-            
-            # Valeurs de consommation réalistes par type
-            if type_energie == 'electricite':
-                base_conso = random.uniform(80, 200)
-                # Plus de consommation en journée (8h-18h)
-                if 8 <= heure <= 18:
-                    base_conso *= random.uniform(1.2, 1.8)
-                cle_conso = 'consommation_kWh'
-            elif type_energie == 'eau':
-                base_conso = random.uniform(0.5, 3.0)
-                # Plus de consommation le matin et soir
-                if heure in [7, 8, 9, 18, 19, 20]:
-                    base_conso *= random.uniform(1.5, 2.5)
-                cle_conso = 'consommation_m3'
-            else:  # gaz
-                base_conso = random.uniform(2.0, 8.0)
-                # Plus de consommation en hiver (basé sur le mois)
-                if date_mesure.month in [11, 12, 1, 2, 3]:
-                    base_conso *= random.uniform(1.5, 2.5)
-                cle_conso = 'consommation_m3'
-            
-            # Introduire des défauts de qualité
-            mesure = {
+            cle_conso, valeur = self.tirer_mesure(type_energie, heure, date_mesure.month)
+            mesures.append({
                 'compteur_id': compteur_id,
-                'date_mesure': datetime_mesure.isoformat()
-            }
-            
-            # Parfois valeur manquante
-            if random.random() < DEFAUTS_QUALITE['taux_valeurs_manquantes']:
-                mesure[cle_conso] = None
-            # Parfois valeur incohérente (négative ou très élevée)
-            elif random.random() < DEFAUTS_QUALITE['taux_valeurs_incoherentes']:
-                mesure[cle_conso] = round(-base_conso if random.random() < 0.5 else base_conso * 100, 2)
-            else:
-                mesure[cle_conso] = round(base_conso, 2)
-            
-            mesures.append(mesure)
+                'date_mesure': datetime_mesure.isoformat(),
+                cle_conso: valeur
+            })
         
         # Ajouter quelques doublons
-        if random.random() < DEFAUTS_QUALITE['taux_doublons'] * 5:  # 5% de chance de doublon
-            mesures.append(random.choice(mesures).copy())
+        if self.aleatoire.random() < DEFAUTS_QUALITE['taux_doublons'] * 5:  # 5% de chance de doublon
+            mesures.append(self.aleatoire.choice(mesures).copy())
         
         return mesures
     
-    def generer_fichier_json_journalier(self, type_energie, date, output_dir='output/json'):
-        """Génère un fichier JSON pour un type d'énergie et une date"""
+    def generer_mesures_vectorisees(self, type_energie, date_debut, nb_compteurs, nb_jours=1, nb_heures=24):
+        """Génère en un seul bloc les mesures de nb_compteurs compteurs sur nb_jours jours
+        
+        Retourne (valeurs, doublons): valeurs de forme (nb_jours, nb_compteurs, nb_heures)
+        avec NaN pour les valeurs manquantes, et doublons de forme (nb_jours, nb_compteurs)
+        contenant l'heure de la mesure dupliquée ou -1.
+        """
+        rng = self.rng
+        forme = (nb_jours, nb_compteurs, nb_heures)
+        heures = np.arange(nb_heures)
+        
+        # Mêmes modèles de consommation que generer_mesures_horaires
+        if type_energie == 'electricite':
+            valeurs = rng.uniform(80, 200, forme)
+            # Plus de consommation en journée (8h-18h)
+            pic = (heures >= 8) & (heures <= 18)
+            valeurs[:, :, pic] *= rng.uniform(1.2, 1.8, (nb_jours, nb_compteurs, pic.sum()))
+        elif type_energie == 'eau':
+            valeurs = rng.uniform(0.5, 3.0, forme)
+            # Plus de consommation le matin et soir
+            pic = np.isin(heures, [7, 8, 9, 18, 19, 20])
+            valeurs[:, :, pic] *= rng.uniform(1.5, 2.5, (nb_jours, nb_compteurs, pic.sum()))
+        else:  # gaz
+            valeurs = rng.uniform(2.0, 8.0, forme)
+            # Plus de consommation en hiver (basé sur le mois de chaque jour)
+            mois = np.array([(date_debut + timedelta(days=j)).month for j in range(nb_jours)])
+            hiver = np.isin(mois, [11, 12, 1, 2, 3])
+            valeurs[hiver] *= rng.uniform(1.5, 2.5, (hiver.sum(), nb_compteurs, nb_heures))
+        
+        # Défauts de qualité: valeurs manquantes, puis incohérentes (négatives ou x100)
+        manquantes = rng.random(forme) < DEFAUTS_QUALITE['taux_valeurs_manquantes']
+        incoherentes = ~manquantes & (rng.random(forme) < DEFAUTS_QUALITE['taux_valeurs_incoherentes'])
+        negatives = rng.random(forme) < 0.5
+        valeurs = np.where(incoherentes, np.where(negatives, -valeurs, valeurs * 100), valeurs)
+        valeurs = np.round(valeurs, 2)
+        valeurs[manquantes] = np.nan
+        
+        # Doublons: 5% de chance par compteur et par jour
+        doublons = np.where(
+            rng.random((nb_jours, nb_compteurs)) < DEFAUTS_QUALITE['taux_doublons'] * 5,
+            rng.integers(0, nb_heures, (nb_jours, nb_compteurs)),
+            -1
+        )
+        
+        return valeurs, doublons
+    
+    def materialiser_mesures(self, compteur_id, cle_conso, dates_iso, valeurs, doublon):
+        """Convertit une ligne de valeurs vectorisées en liste de mesures (format JSON)"""
+        mesures = [
+            {'compteur_id': compteur_id, 'date_mesure': date_iso, cle_conso: None if v != v else v}
+            for date_iso, v in zip(dates_iso, valeurs.tolist())
+        ]
+        if doublon >= 0:
+            mesures.append(mesures[doublon].copy())
+        return mesures
+    
+    def iterer_batiments_json(self, type_energie, date):
+        """Produit un à un les objets bâtiment (avec leurs mesures) d'un fichier journalier"""
         
         type_map = {
             'electricite': {'prefixe': 'ELEC', 'unite': 'kWh', 'id': 1},
@@ -75,22 +204,28 @@ class JSONConsommationGenerator:
         }
         
         config_type = type_map[type_energie]
-        data = []
+        
+        # Moteur NumPy: toutes les mesures du jour sont tirées en un seul bloc,
+        # les dictionnaires ne sont créés qu'au moment de l'écriture
+        if self.moteur == 'numpy':
+            compteurs_type = [c for c in self.compteurs if c['id_type_energie'] == config_type['id']]
+            valeurs, doublons = self.generer_mesures_vectorisees(type_energie, date, len(compteurs_type))
+            ligne_compteur = {c['id_compteur']: i for i, c in enumerate(compteurs_type)}
+            cle_conso = 'consommation_kWh' if type_energie == 'electricite' else 'consommation_m3'
+            dates_iso = [date.replace(hour=h, minute=0, second=0).isoformat() for h in range(24)]
         
         # Grouper par région
         for region in self.regions:
             region_id = region['id_region']
             
             # Trouver les bâtiments de cette région
-            batiments_region = [b for b in self.batiments if b['id_region'] == region_id]
+            batiments_region = self.batiments_par_region.get(region_id, [])
             
             for batiment in batiments_region:
                 # Trouver les compteurs de ce bâtiment pour ce type d'énergie
-                compteurs_batiment = [
-                    c for c in self.compteurs 
-                    if c['id_batiment'] == batiment['id_batiment'] 
-                    and c['id_type_energie'] == config_type['id']
-                ]
+                compteurs_batiment = self.compteurs_par_batiment.get(
+                    (batiment['id_batiment'], config_type['id']), []
+                )
                 
                 if compteurs_batiment:
                     batiment_data = {
@@ -103,28 +238,144 @@ class JSONConsommationGenerator:
                     }
                     
                     for compteur in compteurs_batiment:
-                        mesures = self.generer_mesures_horaires(
-                            compteur['id_compteur'],
-                            type_energie,
-                            date
-                        )
+                        if self.moteur == 'numpy':
+                            i = ligne_compteur[compteur['id_compteur']]
+                            mesures = self.materialiser_mesures(
+                                compteur['id_compteur'], cle_conso, dates_iso,
+                                valeurs[0, i], doublons[0, i]
+                            )
+                        else:
+                            mesures = self.generer_mesures_horaires(
+                                compteur['id_compteur'],
+                                type_energie,
+                                date
+                            )
                         batiment_data['mesures'].extend(mesures)
                     
-                    data.append(batiment_data)
+                    yield batiment_data
+    
+    def ecrire_json_streaming(self, batiments_json, f):
+        """Écrit les bâtiments au fil de l'eau, au même format que json.dump(indent=2)"""
+        premier = True
+        for batiment_data in batiments_json:
+            bloc = self.serialiseur.dumps(batiment_data, indent=True)
+            f.write(b'[\n  ' if premier else b',\n  ')
+            f.write(bloc.replace(b'\n', b'\n  '))
+            premier = False
+        f.write(b'[]' if premier else b'\n]')
+    
+    def iterer_lignes_mesures(self, batiments_json, champs=('id_region', 'id_batiment')):
+        """Aplatit les bâtiments: une ligne par mesure, précédée des champs du bâtiment
         
-        # Écrire le fichier JSON
-        mois_str = date.strftime('%m_%Y')
-        jour_str = date.strftime('%d')
-        filename = f"{type_energie.capitalize()}_consumption_{jour_str}_{mois_str}.json"
-        filepath = os.path.join(output_dir, filename)
+        Le type d'énergie et la date, constants dans un fichier, ne sont pas répétés.
+        """
+        for batiment_data in batiments_json:
+            contexte = {champ: batiment_data[champ] for champ in champs}
+            for mesure in batiment_data['mesures']:
+                yield {**contexte, **mesure}
+    
+    def ecrire_json_lines(self, batiments_json, f):
+        """Écrit une mesure par ligne en JSON compact"""
+        dumps = self.serialiseur.dumps
+        for ligne in self.iterer_lignes_mesures(batiments_json):
+            f.write(dumps(ligne))
+            f.write(b'\n')
+    
+    def ouvrir_json_lines(self, filepath):
+        """Ouvre un fichier JSON Lines en écriture binaire, compressé selon le format"""
+        if self.format_sortie == 'jsonl.gz':
+            # Niveau 6 (celui de zlib): bien plus rapide que 9 pour un gain de taille minime
+            return gzip.open(filepath, 'wb', compresslevel=6)
+        if self.format_sortie == 'jsonl.zst':
+            compresseur = zstandard.ZstdCompressor(level=3)
+            return compresseur.stream_writer(open(filepath, 'wb', buffering=TAILLE_TAMPON))
+        return open(filepath, 'wb', buffering=TAILLE_TAMPON)
+    
+    def ecrire_parquet(self, batiments_json, filepath):
+        """Écrit les mesures d'un jour en Parquet (colonnes id_region ... consommation)"""
+        colonnes = {'id_region': [], 'id_batiment': [], 'unite': [],
+                    'compteur_id': [], 'date_mesure': [], 'consommation': []}
+        for ligne in self.iterer_lignes_mesures(batiments_json, ('id_region', 'id_batiment', 'unite')):
+            colonnes['id_region'].append(ligne['id_region'])
+            colonnes['id_batiment'].append(ligne['id_batiment'])
+            colonnes['unite'].append(ligne['unite'])
+            colonnes['compteur_id'].append(ligne['compteur_id'])
+            colonnes['date_mesure'].append(datetime.fromisoformat(ligne['date_mesure']))
+            colonnes['consommation'].append(
+                ligne.get('consommation_kWh', ligne.get('consommation_m3'))
+            )
+        table = pa.table({
+            'id_region': pa.array(colonnes['id_region'], type=pa.string()),
+            'id_batiment': pa.array(colonnes['id_batiment'], type=pa.string()),
+            'unite': pa.array(colonnes['unite'], type=pa.string()),
+            'compteur_id': pa.array(colonnes['compteur_id'], type=pa.string()),
+            'date_mesure': pa.array(colonnes['date_mesure'], type=pa.timestamp('s')),
+            'consommation': pa.array(colonnes['consommation'], type=pa.float64()),
+        })
+        pq.write_table(table, filepath, compression='zstd')
+    
+    def generer_fichier_json_journalier(self, type_energie, date, output_dir='output/json'):
+        """Génère le fichier d'un type d'énergie et d'une date, au format de sortie choisi"""
+        batiments_json = self.iterer_batiments_json(type_energie, date)
+        filepath = self.chemin_fichier_json(type_energie, date, output_dir)
+        
+        if self.format_sortie == 'parquet':
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            self.ecrire_parquet(batiments_json, filepath)
+            return filepath
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        if self.format_sortie != 'json':
+            with self.ouvrir_json_lines(filepath) as f:
+                self.ecrire_json_lines(batiments_json, f)
+            return filepath
+        
+        # Écrire le fichier JSON (octets, tampon large)
+        with open(filepath, 'wb', buffering=TAILLE_TAMPON) as f:
+            if self.streaming:
+                self.ecrire_json_streaming(batiments_json, f)
+            else:
+                f.write(self.serialiseur.dumps(list(batiments_json), indent=True))
         
         return filepath
     
-    def generer_tous_fichiers_json(self, date_debut, date_fin, output_dir='output/json'):
-        """Génère tous les fichiers JSON pour une période"""
+    def chemin_fichier_json(self, type_energie, date, output_dir='output/json'):
+        """Chemin du fichier d'un type d'énergie et d'une date
+        
+        En Parquet, partitionnement Hive: <type_energie=...>/<date=...>/part-0.parquet,
+        relu comme un seul jeu de données par pyarrow.parquet.read_table(output_dir).
+        """
+        if self.format_sortie == 'parquet':
+            return os.path.join(output_dir, f"type_energie={type_energie}",
+                                f"date={date.strftime('%Y-%m-%d')}", "part-0.parquet")
+        mois_str = date.strftime('%m_%Y')
+        jour_str = date.strftime('%d')
+        filename = f"{type_energie.capitalize()}_consumption_{jour_str}_{mois_str}"
+        return os.path.join(output_dir, filename + FORMATS_SORTIE[self.format_sortie])
+    
+    def empreinte_parametres(self, graine):
+        """Empreinte de tout ce dont dépend un fichier, hors (date, type d'énergie)"""
+        return empreinte(self.batiments, self.compteurs, self.regions, DEFAUTS_QUALITE,
+                         graine, self.moteur, self.format_sortie, empreinte_fichier(__file__))
+    
+    def generer_fichier_json_tache(self, type_energie, date, output_dir, graine):
+        """Génère un fichier journalier avec une graine propre à (graine, date, type)"""
+        graine_fichier = graine_tache(graine, date, type_energie)
+        self.aleatoire = random.Random(graine_fichier)
+        if self.moteur == 'numpy':
+            self.rng = np.random.default_rng(graine_fichier)
+        return self.generer_fichier_json_journalier(type_energie, date, output_dir)
+    
+    def generer_tous_fichiers_json(self, date_debut, date_fin, output_dir='output/json',
+                                   workers=None, graine=42, manifeste=None):
+        """Génère tous les fichiers JSON pour une période
+        
+        Avec workers=N, les tâches (date, type) sont réparties sur N processus et
+        chaque fichier a sa propre graine: le résultat est identique quel que soit N.
+        Sans workers, la génération reste séquentielle sur le générateur global.
+        
+        Avec un manifeste (graine par fichier obligatoire, workers=1 par défaut),
+        les fichiers dont les paramètres et le contenu n'ont pas changé sont conservés.
+        """
         print("\n" + "="*60)
         print("📄 GÉNÉRATION DES FICHIERS JSON DE CONSOMMATION")
         print("="*60 + "\n")
@@ -137,6 +388,55 @@ class JSONConsommationGenerator:
         date_courante = date_debut
         total_jours = (date_fin - date_debut).days + 1
         
+        if manifeste is not None and workers is None:
+            workers = 1
+        self.fichiers_inchanges = []
+        
+        if workers is not None:
+            taches = [
+                (type_energie, date_debut + timedelta(days=i), output_dir, graine)
+                for i in range(total_jours)
+                for type_energie in types_energie
+            ]
+            
+            cles = {}
+            inchanges = []
+            if manifeste is not None:
+                parametres = self.empreinte_parametres(graine)
+                a_generer = []
+                for tache in taches:
+                    filepath = self.chemin_fichier_json(tache[0], tache[1], output_dir)
+                    cle = empreinte(parametres, tache[0], tache[1].strftime('%Y-%m-%d'))
+                    if manifeste.a_jour(filepath, cle):
+                        inchanges.append(filepath)
+                    else:
+                        a_generer.append(tache)
+                        cles[filepath] = cle
+                taches = a_generer
+            
+            if workers > 1:
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_initialiser_worker,
+                    initargs=(self.batiments, self.compteurs, self.regions, self.streaming, self.moteur,
+                              self.format_sortie, self.serialiseur.nom)
+                ) as executor:
+                    resultats = executor.map(_executer_tache, taches, chunksize=len(types_energie))
+                    fichiers_generes = self._suivre_progression(resultats, taches, date_debut, total_jours)
+            else:
+                resultats = (self.generer_fichier_json_tache(*tache) for tache in taches)
+                fichiers_generes = self._suivre_progression(resultats, taches, date_debut, total_jours)
+            
+            for filepath in fichiers_generes:
+                if filepath in cles:
+                    manifeste.enregistrer(filepath, cles[filepath])
+            
+            print(f"\n✅ {len(fichiers_generes)} fichiers JSON générés dans {output_dir} ({workers} processus)")
+            if manifeste is not None:
+                print(f"   ↺ {len(inchanges)} fichiers inchangés conservés (manifeste)")
+            self.fichiers_inchanges = inchanges
+            return fichiers_generes + inchanges
+        
         for i, _ in enumerate(range(total_jours)):
             for type_energie in types_energie:
                 filepath = self.generer_fichier_json_journalier(
@@ -153,24 +453,50 @@ class JSONConsommationGenerator:
         
         print(f"\n✅ {len(fichiers_generes)} fichiers JSON générés dans {output_dir}")
         return fichiers_generes
+    
+    def _suivre_progression(self, resultats, taches, date_debut, total_jours):
+        """Collecte les fichiers (dans l'ordre des tâches) et affiche l'avancement par jour"""
+        fichiers_generes = []
+        for n, filepath in enumerate(resultats):
+            fichiers_generes.append(filepath)
+            date_jour = taches[n][1]
+            if n == len(taches) - 1 or taches[n + 1][1] != date_jour:
+                i = (date_jour - date_debut).days
+                if (i + 1) % 30 == 0 or i == total_jours - 1:
+                    print(f"  ✓ Jour {i+1}/{total_jours} traité - {date_jour.strftime('%Y-%m-%d')}")
+        return fichiers_generes
+
+
+def graine_tache(graine, date, type_energie):
+    """Graine déterministe d'un fichier, indépendante de l'ordre d'exécution"""
+    cle = f"{graine}|{date.strftime('%Y-%m-%d')}|{type_energie}".encode('utf-8')
+    return int.from_bytes(hashlib.sha256(cle).digest()[:8], 'big')
+
+
+# Générateur propre à chaque processus du pool (initialisé une seule fois)
+_generator_worker = None
+
+def _initialiser_worker(batiments, compteurs, regions, streaming, moteur, format_sortie, serialiseur):
+    global _generator_worker
+    _generator_worker = JSONConsommationGenerator(batiments, compteurs, regions, streaming, moteur,
+                                                  format_sortie, serialiseur)
+
+def _executer_tache(tache):
+    return _generator_worker.generer_fichier_json_tache(*tache)
 
 
 def generer_exemple_json():
     """Génère quelques fichiers JSON d'exemple"""
-    from generate_mysql_data import GreenCityDataGenerator
+    from generate_mysql_data import JeuDeDonnees
     
-    # Générer d'abord les données de base
-    generator = GreenCityDataGenerator()
-    generator.generer_regions()
-    generator.generer_types_energie()
-    generator.generer_batiments()
-    generator.generer_compteurs()
+    # Seules les tables nécessaires (compteurs, bâtiments, régions) sont générées
+    donnees = JeuDeDonnees()
     
     # Générer les fichiers JSON pour janvier 2025
     json_gen = JSONConsommationGenerator(
-        generator.batiments,
-        generator.compteurs,
-        generator.regions
+        donnees.batiments,
+        donnees.compteurs,
+        donnees.regions
     )
     
     # Générer pour une semaine d'exemple
@@ -1,12 +1,18 @@
 # -*- coding: utf-8 -*-
 # generate_mysql_data.py - Génération des données MySQL avec relations
 
+import csv
+import itertools
+import os
 import random
 import string
+import time
+from array import array
 from datetime import datetime, timedelta
 from faker import Faker
 import mysql.connector
 from config import *
+from enregistrements import Batiment, Client, Compteur, Facture, Paiement, Temperature
 
 fake = Faker('fr_FR')
 Faker.seed(42)
@@ -24,6 +30,8 @@ class GreenCityDataGenerator:
         self.paiements = []
         self.tarifs = []
         self.temperatures = []
+        # Début de la prochaine période à facturer par contrat (tenu à jour par iterer_factures)
+        self.reprises_factures = {}
         
     # ============================================
     # FONCTIONS UTILITAIRES POUR DÉFAUTS DE QUALITÉ
@@ -104,16 +112,16 @@ class GreenCityDataGenerator:
             id_region = random.choice(self.regions)['id_region']
             nom = f"{random.choice(noms_batiments)} {fake.last_name()}"
             
-            batiment = {
-                'id_batiment': f"BAT{str(i+1).zfill(3)}",
-                'id_region': id_region,
-                'nom_batiment': self.ajouter_espaces(nom),
-                'adresse': self.valeur_manquante(fake.street_address()),
-                'surface_m2': round(random.uniform(500, 15000), 2),
-                'type_batiment': random.choice(types_batiment),
-                'nb_etages': random.randint(1, 5),
-                'annee_construction': random.randint(1980, 2023)
-            }
+            batiment = Batiment(
+                id_batiment=f"BAT{str(i+1).zfill(3)}",
+                id_region=id_region,
+                nom_batiment=self.ajouter_espaces(nom),
+                adresse=self.valeur_manquante(fake.street_address()),
+                surface_m2=round(random.uniform(500, 15000), 2),
+                type_batiment=random.choice(types_batiment),
+                nb_etages=random.randint(1, 5),
+                annee_construction=random.randint(1980, 2023)
+            )
             
             # Introduire quelques incohérences (surface négative)
             if random.random() < DEFAUTS_QUALITE['taux_valeurs_incoherentes']:
@@ -141,16 +149,16 @@ class GreenCityDataGenerator:
             for type_energie in self.types_energie:
                 prefixe = {'Électricité': 'ELEC', 'Eau': 'EAU', 'Gaz': 'GAZ'}
                 
-                compteur = {
-                    'id_compteur': f"{prefixe[type_energie['libelle']]}_{str(compteur_id).zfill(4)}",
-                    'id_batiment': batiment['id_batiment'],
-                    'id_type_energie': type_energie['id_type_energie'],
-                    'date_installation': fake.date_between(
+                compteur = Compteur(
+                    id_compteur=f"{prefixe[type_energie['libelle']]}_{str(compteur_id).zfill(4)}",
+                    id_batiment=batiment['id_batiment'],
+                    id_type_energie=type_energie['id_type_energie'],
+                    date_installation=fake.date_between(
                         start_date=datetime(2015, 1, 1),
                         end_date=datetime(2023, 12, 31)
-                    ).strftime('%Y-%m-%d'),
-                    'statut': random.choice(statuts)
-                }
+                    ).toordinal(),
+                    statut=random.choice(statuts)
+                )
                 self.compteurs.append(compteur)
                 compteur_id += 1
         
@@ -177,21 +185,21 @@ class GreenCityDataGenerator:
             if random.random() < DEFAUTS_QUALITE['taux_valeurs_incoherentes']:
                 email = email.replace('@', '@@')
             
-            client = {
-                'id_client': f"CLI{str(i+1).zfill(5)}",
-                'nom': self.ajouter_espaces(nom),
-                'prenom': self.valeur_manquante(prenom),
-                'email': self.valeur_manquante(email),
-                'telephone': self.valeur_manquante(fake.phone_number()),
-                'type_client': type_client,
-                'adresse': fake.address().replace('\n', ', '),
-                'id_region': id_region,
-                'date_inscription': fake.date_between(
+            client = Client(
+                id_client=i + 1,
+                nom=self.ajouter_espaces(nom),
+                prenom=self.valeur_manquante(prenom),
+                email=self.valeur_manquante(email),
+                telephone=self.valeur_manquante(fake.phone_number()),
+                type_client=type_client,
+                adresse=fake.address().replace('\n', ', '),
+                id_region=id_region,
+                date_inscription=fake.date_between(
                     start_date=datetime(2020, 1, 1),
                     end_date=datetime(2024, 12, 31)
-                ).strftime('%Y-%m-%d'),
-                'statut': random.choices(['Actif', 'Inactif'], weights=[0.9, 0.1])[0]
-            }
+                ).toordinal(),
+                statut=random.choices(['Actif', 'Inactif'], weights=[0.9, 0.1])[0]
+            )
             self.clients.append(client)
         
         print(f"   ✓ {len(self.clients)} clients générés")
@@ -269,21 +277,50 @@ class GreenCityDataGenerator:
     def generer_factures(self):
         """Génère les factures (FK: id_contrat)"""
         print("🧾 Génération des factures...")
+        self.factures.extend(self.iterer_factures())
+        print(f"   ✓ {len(self.factures)} factures générées")
+        return self.factures
+    
+    def iterer_factures(self, reprises=None, fin=None, premier_id=1):
+        """Produit les factures une à une, sans les conserver
+        
+        Sans reprises: périodes jusqu'à DATE_FIN, au plus nb_factures_par_contrat par contrat.
+        Avec reprises/fin (reprise incrémentale): pour chaque contrat de `reprises`
+        (id_contrat -> début de la prochaine période), toutes les périodes de 30 jours
+        qui commencent au plus tard à fin, numérotées à partir de premier_id.
+        
+        self.reprises_factures reçoit, pour chaque contrat encore à facturer, le début
+        de la période suivant la dernière facture produite: la reprise suivante part
+        de là, sans trou ni doublon même pour un contrat arrêté par la limite.
+        """
+        # Index des compteurs construit une fois: recherche O(1) par contrat
+        compteurs_par_id = {c['id_compteur']: c for c in self.compteurs}
+        limite = CONFIG['nb_factures_par_contrat'] if reprises is None else None
         
-        facture_id = 1
+        facture_id = premier_id
         for contrat in self.contrats:
             # Trouver le compteur et son type d'énergie
-            compteur = next(c for c in self.compteurs if c['id_compteur'] == contrat['id_compteur'])
+            compteur = compteurs_par_id[contrat['id_compteur']]
             type_energie_id = compteur['id_type_energie']
             
             date_debut_contrat = datetime.strptime(contrat['date_debut'], '%Y-%m-%d')
-            date_fin_contrat = datetime.strptime(contrat['date_fin'], '%Y-%m-%d') if contrat['date_fin'] else datetime(2025, 1, 31)
+            fin_reelle = datetime.strptime(contrat['date_fin'], '%Y-%m-%d') if contrat['date_fin'] else None
+            date_fin_contrat = fin_reelle or datetime(2025, 1, 31)
             
             # Générer une facture par mois
             date_courante = date_debut_contrat
             mois_count = 0
             
-            while date_courante < date_fin_contrat and mois_count < CONFIG['nb_factures_par_contrat']:
+            if reprises is not None:
+                # Reprise: contrats non soldés facturés jusqu'à fin, à partir de la
+                # période qui suit leur dernière facture
+                if contrat['id_contrat'] not in reprises:
+                    continue
+                date_courante = reprises[contrat['id_contrat']]
+                borne = fin + timedelta(days=1)
+                date_fin_contrat = min(fin_reelle, borne) if fin_reelle else borne
+            
+            while date_courante < date_fin_contrat and (limite is None or mois_count < limite):
                 periode_debut = date_courante
                 periode_fin = date_courante + timedelta(days=30)
                 
@@ -309,66 +346,76 @@ class GreenCityDataGenerator:
                     weights=[0.75, 0.15, 0.10]
                 )[0]
                 
-                facture = {
-                    'id_facture': f"FAC{str(facture_id).zfill(8)}",
-                    'id_contrat': contrat['id_contrat'],
-                    'date_emission': periode_fin.strftime('%Y-%m-%d'),
-                    'date_echeance': (periode_fin + timedelta(days=30)).strftime('%Y-%m-%d'),
-                    'periode_debut': periode_debut.strftime('%Y-%m-%d'),
-                    'periode_fin': periode_fin.strftime('%Y-%m-%d'),
-                    'montant_ht': montant_ht,
-                    'tva': tva,
-                    'montant_ttc': montant_ttc,
-                    'cout_energie': cout_energie,
-                    'consommation': consommation,
-                    'statut_paiement': statut
-                }
+                facture = Facture(
+                    id_facture=facture_id,
+                    id_contrat=contrat['id_contrat'],
+                    date_emission=periode_fin.toordinal(),
+                    date_echeance=periode_fin.toordinal() + 30,
+                    periode_debut=periode_debut.toordinal(),
+                    periode_fin=periode_fin.toordinal(),
+                    montant_ht=montant_ht,
+                    tva=tva,
+                    montant_ttc=montant_ttc,
+                    cout_energie=cout_energie,
+                    consommation=consommation,
+                    statut_paiement=statut
+                )
                 
                 # Introduire quelques incohérences
                 if random.random() < DEFAUTS_QUALITE['taux_valeurs_incoherentes']:
-                    facture['montant_ht'] = -facture['montant_ht']
+                    facture.montant_ht = -facture.montant_ht
                 
-                self.factures.append(facture)
+                yield facture
                 facture_id += 1
                 date_courante += timedelta(days=30)
                 mois_count += 1
-        
-        print(f"   ✓ {len(self.factures)} factures générées")
-        return self.factures
+            
+            # Contrat actif ou arrêté avant sa date de fin: reste à facturer
+            if fin_reelle is None or date_courante < fin_reelle:
+                self.reprises_factures[contrat['id_contrat']] = date_courante
+            else:
+                self.reprises_factures.pop(contrat['id_contrat'], None)
     
     def generer_paiements(self):
         """Génère les paiements (FK: id_facture)"""
         print("💳 Génération des paiements...")
-        
-        modes_paiement = ['Virement', 'Carte bancaire', 'Prélèvement', 'Chèque', 'Espèces']
-        paiement_id = 1
-        
-        for facture in self.factures:
-            if facture['statut_paiement'] == 'Payée':
-                date_echeance = datetime.strptime(facture['date_echeance'], '%Y-%m-%d')
-                
-                # Date de paiement (avant ou après échéance)
-                jours_decalage = random.randint(-15, 10)
-                date_paiement = date_echeance + timedelta(days=jours_decalage)
-                
-                paiement = {
-                    'id_paiement': f"PAY{str(paiement_id).zfill(8)}",
-                    'id_facture': facture['id_facture'],
-                    'date_paiement': date_paiement.strftime('%Y-%m-%d'),
-                    'montant': facture['montant_ttc'],
-                    'mode_paiement': random.choice(modes_paiement),
-                    'reference_transaction': ''.join(random.choices(string.ascii_uppercase + string.digits, k=12))
-                }
-                self.paiements.append(paiement)
-                paiement_id += 1
-        
+        factures_payees = (
+            (f.id_facture, f.date_echeance, f.montant_ttc)
+            for f in self.factures if f.statut_paiement == 'Payée'
+        )
+        self.paiements.extend(self.iterer_paiements(factures_payees))
         print(f"   ✓ {len(self.paiements)} paiements générés")
         return self.paiements
     
+    def iterer_paiements(self, factures_payees, premier_id=1):
+        """Produit les paiements à partir des tuples (numéro facture, échéance en ordinal, montant_ttc)"""
+        modes_paiement = ['Virement', 'Carte bancaire', 'Prélèvement', 'Chèque', 'Espèces']
+        paiement_id = premier_id
+        
+        for numero_facture, date_echeance, montant_ttc in factures_payees:
+            # Date de paiement (avant ou après échéance)
+            jours_decalage = random.randint(-15, 10)
+            
+            paiement = Paiement(
+                id_paiement=paiement_id,
+                id_facture=numero_facture,
+                date_paiement=date_echeance + jours_decalage,
+                montant=montant_ttc,
+                mode_paiement=random.choice(modes_paiement),
+                reference_transaction=''.join(random.choices(string.ascii_uppercase + string.digits, k=12))
+            )
+            yield paiement
+            paiement_id += 1
+    
     def generer_temperatures(self):
         """Génère les températures (FK: id_region)"""
         print("🌡️ Génération des températures...")
-        
+        self.temperatures.extend(self.iterer_temperatures())
+        print(f"   ✓ {len(self.temperatures)} enregistrements de température générés")
+        return self.temperatures
+    
+    def iterer_temperatures(self, debut=None, fin=None):
+        """Produit les températures journalières de chaque région (par défaut DATE_DEBUT → DATE_FIN)"""
         # Températures moyennes par saison
         temp_base = {
             'hiver': {'min': -5, 'max': 10, 'moy': 3},
@@ -378,9 +425,9 @@ class GreenCityDataGenerator:
         }
         
         for region in self.regions:
-            date_courante = DATE_DEBUT
+            date_courante = debut or DATE_DEBUT
             
-            while date_courante <= DATE_FIN:
+            while date_courante <= (fin or DATE_FIN):
                 mois = date_courante.month
                 
                 # Déterminer la saison
@@ -396,23 +443,20 @@ class GreenCityDataGenerator:
                 base = temp_base[saison]
                 variation = random.uniform(-3, 3)
                 
-                temp = {
-                    'id_region': region['id_region'],
-                    'date_mesure': date_courante.strftime('%Y-%m-%d'),
-                    'temperature_min': round(base['min'] + variation, 2),
-                    'temperature_max': round(base['max'] + variation, 2),
-                    'temperature_moyenne': round(base['moy'] + variation, 2)
-                }
+                temp = Temperature(
+                    id_region=region['id_region'],
+                    date_mesure=date_courante.toordinal(),
+                    temperature_min=round(base['min'] + variation, 2),
+                    temperature_max=round(base['max'] + variation, 2),
+                    temperature_moyenne=round(base['moy'] + variation, 2)
+                )
                 
                 # Parfois format de date incorrect
                 if random.random() < DEFAUTS_QUALITE['taux_format_date_incorrect']:
                     temp['date_mesure'] = date_courante.strftime('%d/%m/%Y')
                 
-                self.temperatures.append(temp)
+                yield temp
                 date_courante += timedelta(days=1)
-        
-        print(f"   ✓ {len(self.temperatures)} enregistrements de température générés")
-        return self.temperatures
 
     # ============================================
     # EXPORT SQL
@@ -426,8 +470,95 @@ class GreenCityDataGenerator:
             return f"'{value.replace(chr(39), chr(39)+chr(39))}'"
         return str(value)
     
-    def generer_sql_inserts(self, filename='output/sql/insert_data.sql'):
-        """Génère le fichier SQL avec tous les INSERT"""
+    # Colonnes exportées par table, dans l'ordre des FK
+    TABLES_SQL = [
+        ('regions', ['id_region', 'nom_region', 'pays', 'ville', 'code_postal']),
+        ('types_energie', ['id_type_energie', 'libelle', 'unite']),
+        ('batiments', ['id_batiment', 'id_region', 'nom_batiment', 'adresse',
+                       'surface_m2', 'type_batiment', 'nb_etages', 'annee_construction']),
+        ('compteurs', ['id_compteur', 'id_batiment', 'id_type_energie',
+                       'date_installation', 'statut']),
+        ('clients', ['id_client', 'nom', 'prenom', 'email', 'telephone',
+                     'type_client', 'adresse', 'id_region', 'date_inscription', 'statut']),
+        ('contrats', ['id_contrat', 'id_client', 'id_compteur',
+                      'date_debut', 'date_fin', 'statut']),
+        ('tarifs', ['id_type_energie', 'cout_achat_unitaire',
+                    'prix_vente_unitaire', 'date_debut', 'date_fin']),
+        ('factures', ['id_facture', 'id_contrat', 'date_emission',
+                      'date_echeance', 'periode_debut', 'periode_fin', 'montant_ht', 'tva',
+                      'montant_ttc', 'cout_energie', 'consommation', 'statut_paiement']),
+        ('paiements', ['id_paiement', 'id_facture', 'date_paiement',
+                       'montant', 'mode_paiement', 'reference_transaction']),
+        ('temperatures', ['id_region', 'date_mesure', 'temperature_min',
+                          'temperature_max', 'temperature_moyenne']),
+    ]
+    
+    def tables_materialisees(self):
+        """Tables déjà générées en mémoire: (table, colonnes, lignes)"""
+        return [(table, colonnes, getattr(self, table)) for table, colonnes in self.TABLES_SQL]
+    
+    def flux_tables(self):
+        """Tables dans l'ordre des FK, factures/paiements/températures produites à la volée
+        
+        Les tables de référence doivent avoir été générées (generer_dimensions). Chaque
+        flux ne peut être parcouru qu'une fois, dans l'ordre: seul l'état nécessaire
+        aux paiements (id_facture, date_echeance, montant_ttc des factures payées,
+        dans des tableaux typés) est conservé entre les factures et les paiements.
+        """
+        flux = self.flux_faits(self.iterer_factures(), self.iterer_temperatures())
+        return [(table, colonnes, flux.get(table, getattr(self, table)))
+                for table, colonnes in self.TABLES_SQL]
+    
+    def flux_increment(self, reprises_factures, temperatures_depuis, fin,
+                       premiere_facture, premier_paiement):
+        """Tables de faits d'une reprise incrémentale (factures, paiements, températures)
+        
+        Seules les périodes postérieures au watermark sont produites (pour les factures,
+        à partir de la reprise de chaque contrat); les numéros FAC/PAY continuent à
+        partir de premiere_facture / premier_paiement.
+        """
+        flux = self.flux_faits(
+            self.iterer_factures(reprises_factures, fin, premiere_facture),
+            self.iterer_temperatures(temperatures_depuis, fin),
+            premier_paiement
+        )
+        return [(table, colonnes, flux[table])
+                for table, colonnes in self.TABLES_SQL if table in flux]
+    
+    def flux_faits(self, factures, temperatures, premier_paiement=1):
+        """Flux factures/paiements/températures, les paiements suivant les factures payées"""
+        # État compact des factures payées: numéro, échéance (ordinal), montant TTC
+        numeros = array('q')
+        echeances = array('l')
+        montants = array('d')
+        
+        def factures_avec_suivi():
+            for facture in factures:
+                if facture.statut_paiement == 'Payée':
+                    numeros.append(facture.id_facture)
+                    echeances.append(facture.date_echeance)
+                    montants.append(facture.montant_ttc)
+                yield facture
+        
+        return {
+            'factures': factures_avec_suivi(),
+            'paiements': self.iterer_paiements(zip(numeros, echeances, montants), premier_paiement),
+            'temperatures': temperatures,
+        }
+    
+    def generer_sql_inserts(self, filename='output/sql/insert_data.sql', taille_lot=None,
+                            transactions=False, taille_max_octets=1024 * 1024, tables=None):
+        """Génère le fichier SQL avec tous les INSERT
+        
+        tables: (table, colonnes, lignes) à écrire, par défaut les tables en mémoire;
+        flux_tables() permet d'écrire les lignes au fur et à mesure de leur génération.
+        Retourne le nombre de lignes écrites par table.
+        
+        Par défaut une instruction INSERT par ligne. Avec taille_lot=N, les lignes
+        sont regroupées en INSERT multi-lignes d'au plus N lignes et taille_max_octets
+        octets (à garder sous max_allowed_packet). Avec transactions=True, chaque table
+        est chargée dans une transaction explicite avec UNIQUE_CHECKS désactivé.
+        """
         print("\n📄 Génération du fichier SQL...")
         
         with open(filename, 'w', encoding='utf-8') as f:
@@ -438,115 +569,141 @@ class GreenCityDataGenerator:
             f.write("USE greencity_facturation;\n\n")
             
             # Désactiver les contraintes FK temporairement
-            f.write("SET FOREIGN_KEY_CHECKS = 0;\n\n")
-            
-            # REGIONS
-            f.write("-- REGIONS\n")
-            for r in self.regions:
-                f.write(f"INSERT INTO regions (id_region, nom_region, pays, ville, code_postal) VALUES "
-                       f"({self.escape_sql(r['id_region'])}, {self.escape_sql(r['nom_region'])}, "
-                       f"{self.escape_sql(r['pays'])}, {self.escape_sql(r['ville'])}, "
-                       f"{self.escape_sql(r['code_postal'])});\n")
-            
-            # TYPES_ENERGIE
-            f.write("\n-- TYPES_ENERGIE\n")
-            for te in self.types_energie:
-                f.write(f"INSERT INTO types_energie (id_type_energie, libelle, unite) VALUES "
-                       f"({te['id_type_energie']}, {self.escape_sql(te['libelle'])}, "
-                       f"{self.escape_sql(te['unite'])});\n")
+            f.write("SET FOREIGN_KEY_CHECKS = 0;\n")
+            if transactions:
+                f.write("SET UNIQUE_CHECKS = 0;\n")
+            f.write("\n")
             
-            # BATIMENTS
-            f.write("\n-- BATIMENTS\n")
-            for b in self.batiments:
-                f.write(f"INSERT INTO batiments (id_batiment, id_region, nom_batiment, adresse, "
-                       f"surface_m2, type_batiment, nb_etages, annee_construction) VALUES "
-                       f"({self.escape_sql(b['id_batiment'])}, {self.escape_sql(b['id_region'])}, "
-                       f"{self.escape_sql(b['nom_batiment'])}, {self.escape_sql(b['adresse'])}, "
-                       f"{b['surface_m2']}, {self.escape_sql(b['type_batiment'])}, "
-                       f"{b['nb_etages']}, {b['annee_construction']});\n")
-            
-            # COMPTEURS
-            f.write("\n-- COMPTEURS\n")
-            for c in self.compteurs:
-                f.write(f"INSERT INTO compteurs (id_compteur, id_batiment, id_type_energie, "
-                       f"date_installation, statut) VALUES "
-                       f"({self.escape_sql(c['id_compteur'])}, {self.escape_sql(c['id_batiment'])}, "
-                       f"{c['id_type_energie']}, {self.escape_sql(c['date_installation'])}, "
-                       f"{self.escape_sql(c['statut'])});\n")
-            
-            # CLIENTS
-            f.write("\n-- CLIENTS\n")
-            for cl in self.clients:
-                f.write(f"INSERT INTO clients (id_client, nom, prenom, email, telephone, "
-                       f"type_client, adresse, id_region, date_inscription, statut) VALUES "
-                       f"({self.escape_sql(cl['id_client'])}, {self.escape_sql(cl['nom'])}, "
-                       f"{self.escape_sql(cl['prenom'])}, {self.escape_sql(cl['email'])}, "
-                       f"{self.escape_sql(cl['telephone'])}, {self.escape_sql(cl['type_client'])}, "
-                       f"{self.escape_sql(cl['adresse'])}, {self.escape_sql(cl['id_region'])}, "
-                       f"{self.escape_sql(cl['date_inscription'])}, {self.escape_sql(cl['statut'])});\n")
-            
-            # CONTRATS
-            f.write("\n-- CONTRATS\n")
-            for ct in self.contrats:
-                f.write(f"INSERT INTO contrats (id_contrat, id_client, id_compteur, "
-                       f"date_debut, date_fin, statut) VALUES "
-                       f"({self.escape_sql(ct['id_contrat'])}, {self.escape_sql(ct['id_client'])}, "
-                       f"{self.escape_sql(ct['id_compteur'])}, {self.escape_sql(ct['date_debut'])}, "
-                       f"{self.escape_sql(ct['date_fin'])}, {self.escape_sql(ct['statut'])});\n")
-            
-            # TARIFS
-            f.write("\n-- TARIFS\n")
-            for t in self.tarifs:
-                f.write(f"INSERT INTO tarifs (id_type_energie, cout_achat_unitaire, "
-                       f"prix_vente_unitaire, date_debut, date_fin) VALUES "
-                       f"({t['id_type_energie']}, {t['cout_achat_unitaire']}, "
-                       f"{t['prix_vente_unitaire']}, {self.escape_sql(t['date_debut'])}, "
-                       f"{self.escape_sql(t['date_fin'])});\n")
-            
-            # FACTURES
-            f.write("\n-- FACTURES\n")
-            for fa in self.factures:
-                f.write(f"INSERT INTO factures (id_facture, id_contrat, date_emission, "
-                       f"date_echeance, periode_debut, periode_fin, montant_ht, tva, "
-                       f"montant_ttc, cout_energie, consommation, statut_paiement) VALUES "
-                       f"({self.escape_sql(fa['id_facture'])}, {self.escape_sql(fa['id_contrat'])}, "
-                       f"{self.escape_sql(fa['date_emission'])}, {self.escape_sql(fa['date_echeance'])}, "
-                       f"{self.escape_sql(fa['periode_debut'])}, {self.escape_sql(fa['periode_fin'])}, "
-                       f"{fa['montant_ht']}, {fa['tva']}, {fa['montant_ttc']}, "
-                       f"{fa['cout_energie']}, {fa['consommation']}, "
-                       f"{self.escape_sql(fa['statut_paiement'])});\n")
-            
-            # PAIEMENTS
-            f.write("\n-- PAIEMENTS\n")
-            for p in self.paiements:
-                f.write(f"INSERT INTO paiements (id_paiement, id_facture, date_paiement, "
-                       f"montant, mode_paiement, reference_transaction) VALUES "
-                       f"({self.escape_sql(p['id_paiement'])}, {self.escape_sql(p['id_facture'])}, "
-                       f"{self.escape_sql(p['date_paiement'])}, {p['montant']}, "
-                       f"{self.escape_sql(p['mode_paiement'])}, "
-                       f"{self.escape_sql(p['reference_transaction'])});\n")
-            
-            # TEMPERATURES
-            f.write("\n-- TEMPERATURES\n")
-            for t in self.temperatures:
-                f.write(f"INSERT INTO temperatures (id_region, date_mesure, temperature_min, "
-                       f"temperature_max, temperature_moyenne) VALUES "
-                       f"({self.escape_sql(t['id_region'])}, {self.escape_sql(t['date_mesure'])}, "
-                       f"{t['temperature_min']}, {t['temperature_max']}, "
-                       f"{t['temperature_moyenne']});\n")
+            nb_lignes = {}
+            for i, (table, colonnes, lignes) in enumerate(tables or self.tables_materialisees()):
+                f.write(f"{'' if i == 0 else chr(10)}-- {table.upper()}\n")
+                if transactions:
+                    f.write("START TRANSACTION;\n")
+                
+                debut_insert = f"INSERT INTO {table} ({', '.join(colonnes)}) VALUES"
+                valeurs = (
+                    f"({', '.join(self.escape_sql(ligne[c]) for c in colonnes)})"
+                    for ligne in lignes
+                )
+                
+                if taille_lot is None:
+                    nb = 0
+                    for v in valeurs:
+                        f.write(f"{debut_insert} {v};\n")
+                        nb += 1
+                else:
+                    nb = self.ecrire_inserts_par_lot(f, debut_insert, valeurs, taille_lot, taille_max_octets)
+                
+                if transactions:
+                    f.write("COMMIT;\n")
+                nb_lignes[table] = nb
             
-            # Réactiver les contraintes FK
+            # Réactiver les contraintes
+            if transactions:
+                f.write("\nSET UNIQUE_CHECKS = 1;")
             f.write("\nSET FOREIGN_KEY_CHECKS = 1;\n")
         
         print(f"   ✓ Fichier SQL généré: {filename}")
+        return nb_lignes
+    
+    def ecrire_inserts_par_lot(self, f, debut_insert, valeurs, taille_lot, taille_max_octets):
+        """Écrit des INSERT multi-lignes limités en nombre de lignes et en octets"""
+        nb = 0
+        lot = []
+        taille = len(debut_insert.encode('utf-8'))
+        for v in valeurs:
+            taille_v = len(v.encode('utf-8')) + 2  # ",\n"
+            if lot and (len(lot) >= taille_lot or taille + taille_v > taille_max_octets):
+                f.write(f"{debut_insert}\n" + ",\n".join(lot) + ";\n")
+                lot = []
+                taille = len(debut_insert.encode('utf-8'))
+            lot.append(v)
+            taille += taille_v
+            nb += 1
+        if lot:
+            f.write(f"{debut_insert}\n" + ",\n".join(lot) + ";\n")
+        return nb
 
-    def generer_toutes_donnees(self):
-        """Génère toutes les données dans l'ordre correct"""
-        print("\n" + "="*60)
-        print("🚀 GÉNÉRATION DES DONNÉES GREENCITY")
-        print("="*60 + "\n")
+    # ============================================
+    # CHARGEMENT DIRECT MYSQL
+    # ============================================
+    
+    def charger_mysql(self, config=None, taille_lot=1000, taille_pool=2, tables=None):
+        """Charge toutes les tables dans MySQL par executemany, par lots, dans l'ordre des FK
         
-        # Ordre important pour respecter les FK
+        tables: comme pour generer_sql_inserts (tables en mémoire ou flux_tables()).
+        Retourne, pour chaque table, le nombre de lignes, la durée et le débit.
+        """
+        from mysql.connector import pooling
+        
+        print("\n🗄️ Chargement direct dans MySQL...")
+        pool = pooling.MySQLConnectionPool(
+            pool_name='greencity',
+            pool_size=taille_pool,
+            **(config or MYSQL_CONFIG)
+        )
+        
+        statistiques = {}
+        for table, colonnes, lignes in tables or self.tables_materialisees():
+            requete = (f"INSERT INTO {table} ({', '.join(colonnes)}) "
+                       f"VALUES ({', '.join(['%s'] * len(colonnes))})")
+            
+            connexion = pool.get_connection()
+            curseur = connexion.cursor()
+            try:
+                curseur.execute("SET FOREIGN_KEY_CHECKS = 0")
+                debut = time.perf_counter()
+                # executemany regroupe chaque lot en un seul INSERT multi-lignes
+                nb_lignes = 0
+                tuples = (tuple(ligne[c] for c in colonnes) for ligne in lignes)
+                for lot in iter(lambda: list(itertools.islice(tuples, taille_lot)), []):
+                    curseur.executemany(requete, lot)
+                    nb_lignes += len(lot)
+                connexion.commit()
+                duree = time.perf_counter() - debut
+            except Exception:
+                connexion.rollback()
+                raise
+            finally:
+                # Rétabli ici, succès ou échec: la connexion retourne au pool
+                try:
+                    curseur.execute("SET FOREIGN_KEY_CHECKS = 1")
+                finally:
+                    curseur.close()
+                    connexion.close()  # Rend la connexion au pool
+            
+            debit = nb_lignes / duree if duree > 0 else 0
+            statistiques[table] = {'lignes': nb_lignes, 'duree_s': duree, 'lignes_par_s': debit}
+            print(f"   ✓ {table}: {nb_lignes} lignes en {duree:.2f} s ({debit:,.0f} lignes/s)")
+        
+        return statistiques
+    
+    # ============================================
+    # EXPORT CSV
+    # ============================================
+    
+    def generer_csv_tables(self, output_dir='output/tables', tables=None):
+        """Écrit un fichier CSV par table (tables en mémoire ou flux_tables())"""
+        print("\n📄 Génération des fichiers CSV des tables...")
+        os.makedirs(output_dir, exist_ok=True)
+        
+        nb_lignes = {}
+        for table, colonnes, lignes in tables or self.tables_materialisees():
+            filepath = os.path.join(output_dir, f"{table}.csv")
+            with open(filepath, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(colonnes)
+                nb = 0
+                for ligne in lignes:
+                    writer.writerow([ligne[c] for c in colonnes])
+                    nb += 1
+            nb_lignes[table] = nb
+            print(f"   ✓ {filepath} - {nb} lignes")
+        
+        return nb_lignes
+
+    def generer_dimensions(self):
+        """Génère les tables de référence, nécessaires aux factures/paiements/températures"""
         self.generer_regions()
         self.generer_types_energie()
         self.generer_batiments()
@@ -554,6 +711,15 @@ class GreenCityDataGenerator:
         self.generer_clients()
         self.generer_contrats()
         self.generer_tarifs()
+    
+    def generer_toutes_donnees(self):
+        """Génère toutes les données dans l'ordre correct"""
+        print("\n" + "="*60)
+        print("🚀 GÉNÉRATION DES DONNÉES GREENCITY")
+        print("="*60 + "\n")
+        
+        # Ordre important pour respecter les FK
+        self.generer_dimensions()
         self.generer_factures()
         self.generer_paiements()
         self.generer_temperatures()
@@ -574,9 +740,62 @@ class GreenCityDataGenerator:
         print("="*60 + "\n")
 
 
+class JeuDeDonnees:
+    """Tables de GreenCityDataGenerator générées à la demande, au premier accès
+
+    `donnees.compteurs` génère compteurs et leurs dépendances (bâtiments, régions,
+    types d'énergie), puis les conserve. Les dépendances sont générées dans l'ordre
+    de generer_toutes_donnees: la chaîne régions → compteurs utilisée par les
+    fichiers JSON/CSV est donc identique à celle d'une génération complète.
+    Une table déjà remplie dans le générateur (generer_toutes_donnees, flux) est réutilisée.
+    """
+
+    # Table -> tables nécessaires à sa génération, dans l'ordre de generer_toutes_donnees
+    DEPENDANCES = {
+        'regions': [],
+        'types_energie': [],
+        'batiments': ['regions'],
+        'compteurs': ['batiments', 'types_energie'],
+        'clients': ['regions'],
+        'contrats': ['clients', 'compteurs'],
+        'tarifs': ['types_energie'],
+        'factures': ['contrats', 'compteurs'],
+        'paiements': ['factures'],
+        'temperatures': ['regions'],
+    }
+
+    def __init__(self, generateur=None):
+        self.generateur = generateur if generateur is not None else GreenCityDataGenerator()
+        self.generees = set()
+
+    def __getattr__(self, table):
+        if table not in JeuDeDonnees.DEPENDANCES:
+            raise AttributeError(f"Table inconnue: {table}")
+        self.charger(table)
+        return getattr(self.generateur, table)
+
+    def dependances(self, *tables):
+        """Tables demandées et toutes leurs dépendances (transitives)"""
+        a_visiter = list(tables)
+        resultat = set()
+        while a_visiter:
+            table = a_visiter.pop()
+            if table not in resultat:
+                resultat.add(table)
+                a_visiter.extend(self.DEPENDANCES[table])
+        return resultat
+
+    def charger(self, *tables):
+        """Génère (une seule fois) les tables demandées et leurs dépendances"""
+        requises = self.dependances(*tables)
+        for table in self.DEPENDANCES:
+            if table in requises and table not in self.generees:
+                if not getattr(self.generateur, table):
+                    getattr(self.generateur, f"generer_{table}")()
+                self.generees.add(table)
+
+
 if __name__ == "__main__":
-    import os
-    
     # Créer les dossiers de sortie
     os.makedirs('output/sql', exist_ok=True)
     os.makedirs('output/json', exist_ok=True)
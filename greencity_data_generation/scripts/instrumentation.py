@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+# instrumentation.py - Mesures par étape (durée, CPU, mémoire, débit) en JSON Lines
+
+import cProfile
+import functools
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows: pas de pic RSS
+    resource = None
+
+
+def pic_rss_mo():
+    """Pic de mémoire résidente du processus (et de ses processus enfants terminés), en Mo"""
+    if resource is None:
+        return None
+    pic = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+              resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss est en Ko sous Linux, en octets sous macOS
+    return round(pic / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def temps_cpu():
+    """Temps CPU consommé par le processus et ses processus enfants (pool de workers)"""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def octets_ecrits(dossiers, depuis):
+    """Taille des fichiers des dossiers de sortie modifiés depuis `depuis` (timestamp)"""
+    total = 0
+    for dossier in dossiers:
+        for racine, _, fichiers in os.walk(dossier):
+            for nom in fichiers:
+                chemin = os.path.join(racine, nom)
+                stat = os.stat(chemin)
+                if stat.st_mtime >= depuis:
+                    total += stat.st_size
+    return total
+
+
+class Instrumentation:
+    """Chronomètre les étapes et écrit une ligne JSON par étape terminée
+
+    fichier: fichier JSON Lines des mesures (None = aucune écriture)
+    dossier_profil: si renseigné, un profil cProfile <étape>.prof par étape principale
+    dossiers_sortie: dossiers surveillés pour compter les octets écrits
+    Sans fichier ni dossier_profil, etape() ne mesure rien (ni horloges, ni RSS,
+    ni parcours des dossiers de sortie).
+
+    pic_rss_processus_mo est le pic du processus depuis son démarrage (ru_maxrss),
+    pas celui de l'étape: il ne fait que croître d'une étape à la suivante.
+    """
+
+    def __init__(self, fichier=None, dossier_profil=None, dossiers_sortie=()):
+        self.fichier = fichier
+        self.dossier_profil = dossier_profil
+        self.dossiers_sortie = list(dossiers_sortie)
+        self.pile = []
+        self.mesures = []
+        self.actif = bool(fichier or dossier_profil)
+        if fichier:
+            os.makedirs(os.path.dirname(fichier) or '.', exist_ok=True)
+        if dossier_profil:
+            os.makedirs(dossier_profil, exist_ok=True)
+
+    @contextmanager
+    def etape(self, nom, profiler=False):
+        """Mesure le bloc; l'appelant peut renseigner mesure['lignes'] ou mesure['fichiers']"""
+        if not self.actif:
+            yield {'etape': nom, 'lignes': None, 'fichiers': None}
+            return
+        mesure = {
+            'etape': nom,
+            'parent': self.pile[-1] if self.pile else None,
+            'debut': datetime.now().isoformat(timespec='seconds'),
+            'lignes': None,
+            'fichiers': None,
+        }
+        profil = cProfile.Profile() if profiler and self.dossier_profil else None
+
+        self.pile.append(nom)
+        debut_horloge = time.time()
+        debut = time.perf_counter()
+        debut_cpu = temps_cpu()
+        if profil:
+            profil.enable()
+        try:
+            yield mesure
+        finally:
+            if profil:
+                profil.disable()
+                profil.dump_stats(os.path.join(self.dossier_profil, f"{nom}.prof"))
+            duree = time.perf_counter() - debut
+            self.pile.pop()
+
+            mesure['duree_s'] = round(duree, 4)
+            mesure['cpu_s'] = round(temps_cpu() - debut_cpu, 4)
+            mesure['pic_rss_processus_mo'] = pic_rss_mo()
+            mesure['lignes_par_s'] = round(mesure['lignes'] / duree) if mesure['lignes'] and duree else None
+            mesure['octets'] = octets_ecrits(self.dossiers_sortie, debut_horloge)
+            self.enregistrer(mesure)
+
+    def enregistrer(self, mesure):
+        self.mesures.append(mesure)
+        if self.fichier:
+            with open(self.fichier, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(mesure, ensure_ascii=False) + "\n")
+
+    def instrumenter(self, objet, noms=None):
+        """Remplace les méthodes generer_* de l'instance (ou `noms`) par des versions mesurées"""
+        if noms is None:
+            noms = [nom for nom in dir(type(objet))
+                    if nom.startswith('generer_') and callable(getattr(objet, nom))]
+        for nom in noms:
+            setattr(objet, nom, self._envelopper(f"{type(objet).__name__}.{nom}", getattr(objet, nom)))
+        return objet
+
+    def _envelopper(self, nom, methode):
+        @functools.wraps(methode)
+        def methode_mesuree(*args, **kwargs):
+            with self.etape(nom) as mesure:
+                resultat = methode(*args, **kwargs)
+                mesure.update(self.volume(resultat))
+            return resultat
+        return methode_mesuree
+
+    @staticmethod
+    def volume(resultat):
+        """Déduit le volume produit de la valeur de retour d'une méthode generer_*"""
+        if isinstance(resultat, dict) and resultat:
+            valeurs = list(resultat.values())
+            if all(isinstance(v, int) for v in valeurs):
+                return {'lignes': sum(valeurs)}  # lignes écrites par table
+            if all(isinstance(v, dict) and 'lignes' in v for v in valeurs):
+                return {'lignes': sum(v['lignes'] for v in valeurs)}  # statistiques de charger_mysql
+        if isinstance(resultat, list):
+            if resultat and all(isinstance(r, str) for r in resultat):
+                return {'fichiers': len(resultat)}
+            return {'lignes': len(resultat)}
+        return {}
@@ -1,63 +1,346 @@
 # main.py - Script principal de génération
 
+import argparse
 import os
-from datetime import datetime
-from generate_mysql_data import GreenCityDataGenerator
-from generate_json_files import JSONConsommationGenerator
+import sys
+from datetime import datetime, timedelta
+from generate_mysql_data import GreenCityDataGenerator, JeuDeDonnees
+from generate_json_files import FORMATS_SORTIE, JSONConsommationGenerator
+from serialisation import SERIALISEURS
 from generate_csv_files import CSVEnvironnementalGenerator
-from config import DATE_DEBUT, DATE_FIN
+from instrumentation import Instrumentation
+from manifeste import FICHIER_MANIFESTE, Manifeste
+from watermark import (FICHIER_WATERMARK, avancer, avancer_factures, charger_watermark,
+                       dernier_mois_complet, etat_aleatoire, jusqua, mois_suivant,
+                       reprises_factures, restaurer_etat_aleatoire, sauvegarder_watermark)
+from config import CONFIG, DATE_DEBUT, DATE_FIN, appliquer_facteur_echelle
+
+# Étapes de la génération complète
+ETAPES = ['mysql', 'json', 'csv']
+
+def parse_arguments():
+    """Options de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Génération des données GreenCity")
+    parser.add_argument('--scale', type=float, default=1,
+                        help="Facteur d'échelle des volumes (SF 1 = config.CONFIG)")
+    parser.add_argument('--streaming-json', action='store_true',
+                        help="Écrit les fichiers JSON bâtiment par bâtiment (mémoire constante)")
+    parser.add_argument('--moteur', choices=['python', 'numpy'], default='python',
+                        help="Moteur de génération des mesures horaires IoT")
+    parser.add_argument('--format-json', choices=list(FORMATS_SORTIE), default='json',
+                        help="Format des fichiers de consommation IoT (json indenté, JSON Lines "
+                             "compact ou compressé, Parquet partitionné)")
+    parser.add_argument('--serialiseur', choices=list(SERIALISEURS), default=None,
+                        help="Sérialiseur JSON (par défaut orjson s'il est installé, sinon json)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Nombre de processus pour les fichiers JSON et les rapports CSV "
+                             "(graine par fichier)")
+    parser.add_argument('--json-periode-complete', action='store_true',
+                        help="Génère les fichiers JSON de DATE_DEBUT à DATE_FIN au lieu de 2 semaines")
+    parser.add_argument('--sql-lot', type=int, default=None,
+                        help="Nombre de lignes par INSERT multi-lignes dans insert_data.sql")
+    parser.add_argument('--sql-transactions', action='store_true',
+                        help="Charge chaque table dans une transaction avec UNIQUE_CHECKS=0")
+    parser.add_argument('--charger-mysql', action='store_true',
+                        help="Charge aussi les tables directement dans MySQL (config.MYSQL_CONFIG)")
+    parser.add_argument('--flux', choices=['sql', 'csv', 'mysql'], default=None,
+                        help="Écrit factures/paiements/températures au fil de leur génération "
+                             "(mémoire constante) vers une seule destination")
+    parser.add_argument('--metriques', default=None, metavar='FICHIER',
+                        help="Ajoute une ligne JSON par étape et par méthode generer_* "
+                             "(durée, CPU, pic RSS, lignes/s, octets écrits)")
+    parser.add_argument('--profil', default=None, metavar='DOSSIER',
+                        help="Écrit un profil cProfile <étape>.prof par étape principale")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Ne génère que la période postérieure au watermark "
+                             "(factures, paiements, températures, jours JSON, mois CSV)")
+    parser.add_argument('--jusqua', type=lambda d: datetime.strptime(d, '%Y-%m-%d'),
+                        default=datetime.combine(datetime.today(), datetime.min.time()),
+                        metavar='AAAA-MM-JJ',
+                        help="Fin de la période incrémentale (par défaut: aujourd'hui)")
+    parser.add_argument('--watermark', default=FICHIER_WATERMARK, metavar='FICHIER',
+                        help="Point de reprise lu par --incremental, mis à jour à chaque génération")
+    parser.add_argument('--etapes', nargs='+', choices=ETAPES, default=ETAPES,
+                        help="Étapes à exécuter; sans mysql, seules les tables utiles aux fichiers "
+                             "JSON/CSV (régions, bâtiments, compteurs) sont générées")
+    parser.add_argument('--cache', action='store_true',
+                        help="Conserve les fichiers JSON/CSV dont les paramètres de génération "
+                             "n'ont pas changé (manifeste output/.manifeste.json, graine par fichier)")
+    args = parser.parse_args()
+    if args.flux == 'mysql' and args.charger_mysql:
+        parser.error("--flux mysql charge déjà MySQL: retirer --charger-mysql")
+    if args.flux and args.charger_mysql:
+        parser.error(f"--flux écrit vers une seule destination (un flux ne se lit qu'une fois): "
+                     f"utiliser --flux mysql au lieu de --flux {args.flux} --charger-mysql")
+    if args.incremental and set(args.etapes) != set(ETAPES):
+        parser.error("--incremental reprend toutes les étapes à partir du watermark")
+    if args.incremental and (args.charger_mysql or args.json_periode_complete):
+        parser.error("--incremental écrit vers une seule destination (--flux) sur la période du watermark")
+    return args
+
+def nb_lignes(resultat, table):
+    """Lignes écrites pour une table (compteurs de generer_* ou statistiques de charger_mysql)"""
+    valeur = resultat[table]
+    return valeur['lignes'] if isinstance(valeur, dict) else valeur
+
+def generer_increment(args, instrumentation, mesurer, manifeste=None):
+    """Génère uniquement la période entre le watermark et --jusqua, puis avance le watermark
+    
+    Les tables de référence sont régénérées à l'identique (même graine), la séquence
+    aléatoire reprend l'état sauvegardé et les numéros FAC/PAY continuent: deux
+    chaînes de reprises identiques produisent les mêmes fichiers.
+    """
+    watermark = charger_watermark(args.watermark)
+    if watermark is None:
+        sys.exit(f"❌ Aucun watermark ({args.watermark}): lancer d'abord une génération complète")
+    fin = args.jusqua
+    print(f"🔁 Reprise incrémentale jusqu'au {fin.strftime('%Y-%m-%d')} (watermark: {args.watermark})")
+    
+    # ============================================
+    # ÉTAPE 1: Factures, paiements et températures de la période
+    # ============================================
+    print("\n📦 ÉTAPE 1: Génération incrémentale des données MySQL...")
+    mysql_generator = GreenCityDataGenerator()
+    if mesurer:
+        instrumentation.instrumenter(mysql_generator)
+    mysql_generator.generer_dimensions()
+    if len(mysql_generator.contrats) != watermark['contrats']['dernier_id']:
+        sys.exit(f"❌ {len(mysql_generator.contrats)} contrats générés, {watermark['contrats']['dernier_id']} "
+                 f"dans le watermark: configuration modifiée, relancer une génération complète")
+    reprises = reprises_factures(watermark)
+    if reprises is None:
+        sys.exit(f"❌ Watermark sans reprise par contrat ({args.watermark}): relancer une génération complète")
+    restaurer_etat_aleatoire(watermark['aleatoire'])
+    
+    factures_debut = jusqua(watermark, 'factures') + timedelta(days=1)
+    temperatures_debut = jusqua(watermark, 'temperatures') + timedelta(days=1)
+    if min(factures_debut, temperatures_debut) > fin:
+        print(f"   ✓ Données déjà générées jusqu'au {fin.strftime('%Y-%m-%d')}")
+    else:
+        with instrumentation.etape('etape_1_mysql', profiler=True) as mesure:
+            tables = mysql_generator.flux_increment(
+                reprises,
+                temperatures_debut,
+                fin,
+                watermark['factures']['dernier_id'] + 1,
+                watermark['paiements']['dernier_id'] + 1
+            )
+            suffixe = f"increment_{fin.strftime('%Y%m%d')}"
+            if args.flux == 'csv':
+                resultat = mysql_generator.generer_csv_tables(f"output/tables/{suffixe}", tables=tables)
+            elif args.flux == 'mysql':
+                resultat = mysql_generator.charger_mysql(taille_lot=args.sql_lot or 1000, tables=tables)
+            else:
+                resultat = mysql_generator.generer_sql_inserts(
+                    f"output/sql/insert_data_{suffixe}.sql",
+                    taille_lot=args.sql_lot,
+                    transactions=args.sql_transactions,
+                    tables=tables
+                )
+            mesure.update(Instrumentation.volume(resultat))
+        
+        # Les contrats absents des reprises sont soldés: rien à reporter
+        avancer_factures(watermark, mysql_generator.reprises_factures, fin,
+                         watermark['factures']['dernier_id'] + nb_lignes(resultat, 'factures'),
+                         watermark['paiements']['dernier_id'] + nb_lignes(resultat, 'paiements'))
+        avancer(watermark, 'temperatures', fin)
+    
+    # ============================================
+    # ÉTAPE 2: Jours JSON manquants (une graine par fichier)
+    # ============================================
+    json_debut = jusqua(watermark, 'json') + timedelta(days=1)
+    if json_debut <= fin:
+        print("\n📦 ÉTAPE 2: Génération des fichiers JSON (consommation IoT)...")
+        json_generator = JSONConsommationGenerator(
+            mysql_generator.batiments,
+            mysql_generator.compteurs,
+            mysql_generator.regions,
+            streaming=args.streaming_json,
+            moteur=args.moteur,
+            format_sortie=args.format_json,
+            serialiseur=args.serialiseur
+        )
+        with instrumentation.etape('etape_2_json', profiler=True) as mesure:
+            fichiers = json_generator.generer_tous_fichiers_json(
+                json_debut, fin, 'output/json', workers=args.workers or 1, manifeste=manifeste
+            )
+            inchanges = len(json_generator.fichiers_inchanges)
+            mesure['fichiers'] = len(fichiers) - inchanges
+            mesure['fichiers_inchanges'] = inchanges
+        if manifeste:
+            manifeste.sauvegarder()
+        avancer(watermark, 'json', fin)
+    
+    # ============================================
+    # ÉTAPE 3: Mois CSV entièrement écoulés
+    # ============================================
+    csv_debut = mois_suivant(jusqua(watermark, 'csv'))
+    csv_fin = dernier_mois_complet(fin)
+    if csv_debut <= csv_fin:
+        print("\n📦 ÉTAPE 3: Génération des fichiers CSV (rapports environnementaux)...")
+        csv_generator = CSVEnvironnementalGenerator(
+            mysql_generator.batiments,
+            mysql_generator.regions
+        )
+        with instrumentation.etape('etape_3_csv', profiler=True) as mesure:
+            fichiers = csv_generator.generer_tous_rapports(csv_debut, csv_fin, 'output/csv',
+                                                           manifeste=manifeste, workers=args.workers)
+            inchanges = len(csv_generator.fichiers_inchanges)
+            mesure['fichiers'] = len(fichiers) - inchanges
+            mesure['fichiers_inchanges'] = inchanges
+        if manifeste:
+            manifeste.sauvegarder()
+        avancer(watermark, 'csv', csv_fin)
+    
+    watermark['aleatoire'] = etat_aleatoire()
+    sauvegarder_watermark(watermark, args.watermark)
+    
+    print("\n" + "="*70)
+    print("✅ REPRISE INCRÉMENTALE TERMINÉE")
+    print("="*70)
+    for source in ['factures', 'paiements', 'temperatures', 'json', 'csv']:
+        print(f"   • {source:<13} jusqu'au {watermark[source]['jusqua']}")
+    print("="*70 + "\n")
 
 def main():
+    args = parse_arguments()
+    appliquer_facteur_echelle(args.scale)
+    
     print("\n" + "="*70)
     print("🌿 GREENCITY - SYSTÈME DE GÉNÉRATION DE DONNÉES")
     print("="*70)
     print(f"📅 Période: {DATE_DEBUT.strftime('%Y-%m-%d')} → {DATE_FIN.strftime('%Y-%m-%d')}")
+    print(f"📏 Facteur d'échelle: SF {args.scale:g} ({CONFIG['nb_batiments']} bâtiments, "
+          f"{CONFIG['nb_clients']} clients, {CONFIG['nb_contrats']} contrats)")
     print("="*70 + "\n")
     
     # Créer les dossiers de sortie
     for folder in ['output/sql', 'output/json', 'output/csv']:
         os.makedirs(folder, exist_ok=True)
     
+    # Mesures par étape (etape() ne mesure rien sans --metriques ni --profil)
+    instrumentation = Instrumentation(
+        fichier=args.metriques,
+        dossier_profil=args.profil,
+        dossiers_sortie=['output/sql', 'output/json', 'output/csv', 'output/tables']
+    )
+    mesurer = bool(args.metriques or args.profil)
+    manifeste = Manifeste(FICHIER_MANIFESTE) if args.cache else None
+    
+    if args.incremental:
+        generer_increment(args, instrumentation, mesurer, manifeste)
+        return
+    
+    mysql_generator = GreenCityDataGenerator()
+    if mesurer:
+        instrumentation.instrumenter(mysql_generator)
+    # Tables générées à la demande: sans l'étape 1, seules celles des fichiers JSON/CSV
+    donnees = JeuDeDonnees(mysql_generator)
+    
     # ============================================
     # ÉTAPE 1: Générer les données MySQL
     # ============================================
-    print("\n📦 ÉTAPE 1: Génération des données MySQL...")
-    mysql_generator = GreenCityDataGenerator()
-    mysql_generator.generer_toutes_donnees()
-    mysql_generator.generer_sql_inserts()
+    if 'mysql' in args.etapes:
+        print("\n📦 ÉTAPE 1: Génération des données MySQL...")
+        with instrumentation.etape('etape_1_mysql', profiler=True) as mesure:
+            if args.flux:
+                # Tables de référence en mémoire, grandes tables écrites au fil de l'eau
+                mysql_generator.generer_dimensions()
+                tables = mysql_generator.flux_tables()
+                if args.flux == 'sql':
+                    resultat = mysql_generator.generer_sql_inserts(
+                        taille_lot=args.sql_lot,
+                        transactions=args.sql_transactions,
+                        tables=tables
+                    )
+                elif args.flux == 'csv':
+                    resultat = mysql_generator.generer_csv_tables(tables=tables)
+                else:
+                    resultat = mysql_generator.charger_mysql(taille_lot=args.sql_lot or 1000, tables=tables)
+            else:
+                mysql_generator.generer_toutes_donnees()
+                resultat = mysql_generator.generer_sql_inserts(
+                    taille_lot=args.sql_lot,
+                    transactions=args.sql_transactions
+                )
+                if args.charger_mysql:
+                    mysql_generator.charger_mysql(taille_lot=args.sql_lot or 1000)
+            mesure.update(Instrumentation.volume(resultat))
     
     # ============================================
     # ÉTAPE 2: Générer les fichiers JSON IoT
     # ============================================
-    print("\n📦 ÉTAPE 2: Génération des fichiers JSON (consommation IoT)...")
-    json_generator = JSONConsommationGenerator(
-        mysql_generator.batiments,
-        mysql_generator.compteurs,
-        mysql_generator.regions
-    )
+    if 'json' in args.etapes:
+        print("\n📦 ÉTAPE 2: Génération des fichiers JSON (consommation IoT)...")
+        json_generator = JSONConsommationGenerator(
+            donnees.batiments,
+            donnees.compteurs,
+            donnees.regions,
+            streaming=args.streaming_json,
+            moteur=args.moteur,
+            format_sortie=args.format_json,
+            serialiseur=args.serialiseur
+        )
     
-    # Générer pour une période réduite (1 mois pour l'exemple)
-    # Vous pouvez étendre à toute la période en production
-    json_generator.generer_tous_fichiers_json(
-        datetime(2025, 1, 1),
-        datetime(2025, 1, 14),  # 2 semaines pour l'exemple
-        'output/json'
-    )
+        # Générer pour une période réduite (2 semaines pour l'exemple)
+        # --json-periode-complete étend à toute la période en production
+        if args.json_periode_complete:
+            json_debut, json_fin = DATE_DEBUT, DATE_FIN
+        else:
+            json_debut, json_fin = datetime(2025, 1, 1), datetime(2025, 1, 14)
+    
+        with instrumentation.etape('etape_2_json', profiler=True) as mesure:
+            fichiers = json_generator.generer_tous_fichiers_json(
+                json_debut,
+                json_fin,
+                'output/json',
+                workers=args.workers,
+                manifeste=manifeste
+            )
+            inchanges = len(json_generator.fichiers_inchanges)
+            mesure['fichiers'] = len(fichiers) - inchanges
+            mesure['fichiers_inchanges'] = inchanges
+        if manifeste:
+            manifeste.sauvegarder()
     
     # ============================================
     # ÉTAPE 3: Générer les fichiers CSV environnementaux
     # ============================================
-    print("\n📦 ÉTAPE 3: Génération des fichiers CSV (rapports environnementaux)...")
-    csv_generator = CSVEnvironnementalGenerator(
-        mysql_generator.batiments,
-        mysql_generator.regions
-    )
+    if 'csv' in args.etapes:
+        print("\n📦 ÉTAPE 3: Génération des fichiers CSV (rapports environnementaux)...")
+        csv_generator = CSVEnvironnementalGenerator(
+            donnees.batiments,
+            donnees.regions
+        )
     
-    csv_generator.generer_tous_rapports(
-        DATE_DEBUT,
-        DATE_FIN,
-        'output/csv'
-    )
+        with instrumentation.etape('etape_3_csv', profiler=True) as mesure:
+            fichiers = csv_generator.generer_tous_rapports(
+                DATE_DEBUT,
+                DATE_FIN,
+                'output/csv',
+                manifeste=manifeste,
+                workers=args.workers
+            )
+            inchanges = len(csv_generator.fichiers_inchanges)
+            mesure['fichiers'] = len(fichiers) - inchanges
+            mesure['fichiers_inchanges'] = inchanges
+        if manifeste:
+            manifeste.sauvegarder()
+    
+    # Point de reprise pour les prochaines générations incrémentales: chaque contrat
+    # reprend après sa dernière facture (nb_factures_par_contrat arrête la plupart
+    # des contrats bien avant DATE_FIN)
+    if set(args.etapes) == set(ETAPES):
+        watermark = {'contrats': {'dernier_id': len(mysql_generator.contrats)}}
+        avancer_factures(watermark, mysql_generator.reprises_factures, DATE_FIN - timedelta(days=1),
+                         nb_lignes(resultat, 'factures'), nb_lignes(resultat, 'paiements'))
+        avancer(watermark, 'temperatures', DATE_FIN)
+        avancer(watermark, 'json', json_fin)
+        avancer(watermark, 'csv', DATE_FIN)
+        watermark['aleatoire'] = etat_aleatoire()
+        sauvegarder_watermark(watermark, args.watermark)
+    else:
+        print(f"\nℹ️  Watermark non mis à jour (étapes: {', '.join(args.etapes)})")
     
     # ============================================
     # RÉSUMÉ FINAL
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# manifeste.py - Cache des fichiers générés: un fichier inchangé n'est pas réécrit
+
+import hashlib
+import json
+import os
+
+FICHIER_MANIFESTE = 'output/.manifeste.json'
+
+
+def _serialiser(valeur):
+    """Enregistrements (lus comme des dict) et dates dans l'empreinte JSON"""
+    if hasattr(valeur, 'items'):
+        return dict(valeur.items())
+    return str(valeur)
+
+
+def empreinte(*valeurs):
+    """sha256 d'un ensemble de paramètres de génération"""
+    contenu = json.dumps(valeurs, sort_keys=True, ensure_ascii=False, default=_serialiser)
+    return hashlib.sha256(contenu.encode('utf-8')).hexdigest()
+
+
+def empreinte_fichier(chemin, taille_bloc=1024 * 1024):
+    """sha256 du contenu d'un fichier"""
+    h = hashlib.sha256()
+    with open(chemin, 'rb') as f:
+        for bloc in iter(lambda: f.read(taille_bloc), b''):
+            h.update(bloc)
+    return h.hexdigest()
+
+
+class Manifeste:
+    """Associe à chaque fichier généré la clé de ses paramètres et l'empreinte de son contenu
+
+    Un fichier est à jour si sa clé n'a pas changé et si son contenu est
+    toujours celui qui a été écrit (ni supprimé, ni modifié à la main).
+    """
+
+    def __init__(self, chemin=FICHIER_MANIFESTE):
+        self.chemin = chemin
+        self.entrees = {}
+        if os.path.exists(chemin):
+            with open(chemin, encoding='utf-8') as f:
+                self.entrees = json.load(f)
+
+    def a_jour(self, fichier, cle):
+        entree = self.entrees.get(os.path.normpath(fichier))
+        return (entree is not None and entree['cle'] == cle
+                and os.path.exists(fichier)
+                and empreinte_fichier(fichier) == entree['sha256'])
+
+    def enregistrer(self, fichier, cle):
+        self.entrees[os.path.normpath(fichier)] = {'cle': cle, 'sha256': empreinte_fichier(fichier)}
+
+    def sauvegarder(self):
+        os.makedirs(os.path.dirname(self.chemin) or '.', exist_ok=True)
+        temporaire = self.chemin + '.tmp'
+        with open(temporaire, 'w', encoding='utf-8') as f:
+            json.dump(self.entrees, f, indent=2, sort_keys=True)
+        os.replace(temporaire, self.chemin)
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# normalisation_dates.py - Normalisation vectorisée des dates mal formatées
+#
+# Les générateurs injectent des dates au format %d/%m/%Y, %m-%d-%Y, %Y/%m/%d ou
+# str(datetime.timestamp()) (format_date_incorrect). Le normaliseur traite une
+# colonne entière: chaque valeur distincte n'est détectée (classe de regex) et
+# parsée qu'une fois, puis le résultat est redistribué sur toutes les lignes.
+
+import argparse
+import glob
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Classe de format -> (regex de détection, format strptime; None = timestamp Unix)
+FORMATS_DATES = {
+    'aaaa-mm-jj': (r'\d{4}-\d{1,2}-\d{1,2}', '%Y-%m-%d'),
+    'jj/mm/aaaa': (r'\d{1,2}/\d{1,2}/\d{4}', '%d/%m/%Y'),
+    'mm-jj-aaaa': (r'\d{1,2}-\d{1,2}-\d{4}', '%m-%d-%Y'),
+    'aaaa/mm/jj': (r'\d{4}/\d{1,2}/\d{1,2}', '%Y/%m/%d'),
+    'timestamp': (r'\d{9,10}(?:\.\d+)?', None),
+}
+
+
+def parser_timestamps(valeurs):
+    """str(datetime.timestamp()) -> datetime local, comme datetime.fromtimestamp"""
+    return pd.to_datetime([datetime.fromtimestamp(float(v)) for v in valeurs])
+
+
+class NormaliseurDates:
+    """Détecte le format de chaque date et la convertit en datetime64 (NaT si invalide)
+
+    `formats` restreint les classes acceptées (ex. celles d'une transformation
+    Pentaho). Le cache valeur -> date est conservé d'un appel à l'autre: les
+    colonnes suivantes (fichiers, lots) ne reparsent que les valeurs nouvelles.
+    """
+
+    def __init__(self, formats=None):
+        formats = formats or list(FORMATS_DATES)
+        inconnus = set(formats) - set(FORMATS_DATES)
+        if inconnus:
+            raise ValueError(f"Formats de date inconnus: {', '.join(sorted(inconnus))}")
+        self.formats = {nom: FORMATS_DATES[nom] for nom in formats}
+        self.cache = {}
+        self.cache_formats = {}
+
+    def _parser_nouvelles(self, valeurs):
+        """Détecte et parse les valeurs absentes du cache (une fois par valeur distincte)"""
+        nettoyees = pd.Series(valeurs, dtype=object).str.strip()
+        dates = pd.Series(pd.NaT, index=nettoyees.index, dtype='datetime64[ns]')
+        classes = pd.Series(None, index=nettoyees.index, dtype=object)
+        for nom, (regex, format_date) in self.formats.items():
+            masque = nettoyees.str.fullmatch(regex, na=False) & classes.isna()
+            if not masque.any():
+                continue
+            classes[masque] = nom
+            if format_date is None:
+                dates[masque] = parser_timestamps(nettoyees[masque]).values
+            else:
+                dates[masque] = pd.to_datetime(nettoyees[masque], format=format_date,
+                                               errors='coerce').values
+        self.cache.update(zip(valeurs, dates.values))
+        self.cache_formats.update(
+            (v, c if isinstance(c, str) else None) for v, c in zip(valeurs, classes.values)
+        )
+
+    def _distinctes(self, serie):
+        """Codes de chaque ligne et valeurs distinctes, après ajout des nouvelles au cache"""
+        codes, distinctes = pd.factorize(pd.Series(serie, dtype=object))
+        nouvelles = [v for v in distinctes if v not in self.cache]
+        if nouvelles:
+            self._parser_nouvelles(nouvelles)
+        return codes, distinctes
+
+    def normaliser(self, serie):
+        """Colonne de textes -> colonne datetime64 (NaT pour vide, invalide ou format refusé)"""
+        codes, distinctes = self._distinctes(serie)
+        valeurs = np.array([self.cache[v] for v in distinctes], dtype='datetime64[ns]')
+        resultat = np.full(len(codes), np.datetime64('NaT'), dtype='datetime64[ns]')
+        trouves = codes >= 0
+        resultat[trouves] = valeurs[codes[trouves]]
+        return pd.Series(resultat, index=getattr(serie, 'index', None))
+
+    def normaliser_texte(self, serie, format_sortie='%Y-%m-%d'):
+        """Colonne de textes -> dates au format unique `format_sortie` ('' si invalide)"""
+        return self.normaliser(serie).dt.strftime(format_sortie).fillna('')
+
+    def detecter_formats(self, serie):
+        """Classe de format de chaque valeur (None si aucune classe ne correspond)"""
+        codes, distinctes = self._distinctes(serie)
+        classes = np.array([self.cache_formats[v] for v in distinctes] + [None], dtype=object)
+        return pd.Series(classes[codes], index=getattr(serie, 'index', None))
+
+    def profil(self, serie):
+        """Nombre de valeurs par classe de format, et de dates invalides"""
+        dates = self.normaliser(serie)
+        classes = self.detecter_formats(serie)
+        profil = classes.fillna('non reconnu').value_counts().to_dict()
+        profil['invalides'] = int(dates.isna().sum())
+        return profil
+
+
+def normaliser_dates(serie, formats=None, format_sortie=None):
+    """Raccourci: datetime64, ou texte si `format_sortie` est donné"""
+    normaliseur = NormaliseurDates(formats)
+    if format_sortie:
+        return normaliseur.normaliser_texte(serie, format_sortie)
+    return normaliseur.normaliser(serie)
+
+
+def main():
+    """Validation des données générées: formats de date rencontrés dans des CSV"""
+    parser = argparse.ArgumentParser(description="Profil des formats de date de fichiers CSV")
+    parser.add_argument('fichiers', nargs='+', help="Fichiers CSV (motifs glob acceptés)")
+    parser.add_argument('--colonne', default='date_rapport', help="Colonne de dates à analyser")
+    parser.add_argument('--sep', default=',', help="Séparateur des fichiers CSV")
+    args = parser.parse_args()
+
+    normaliseur = NormaliseurDates()
+    total = {}
+    for motif in args.fichiers:
+        for fichier in sorted(glob.glob(motif)):
+            colonne = pd.read_csv(fichier, sep=args.sep, dtype=str,
+                                  keep_default_na=False)[args.colonne]
+            for classe, nombre in normaliseur.profil(colonne).items():
+                total[classe] = total.get(classe, 0) + nombre
+
+    print(f"📅 Formats de '{args.colonne}':")
+    for classe, nombre in sorted(total.items(), key=lambda x: -x[1]):
+        print(f"   {classe:>12}: {nombre}")
+
+
+if __name__ == "__main__":
+    main()
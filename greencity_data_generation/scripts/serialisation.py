@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# serialisation.py - Sérialiseurs JSON interchangeables (orjson si installé, sinon json)
+
+import json
+
+try:
+    import orjson
+except ImportError:  # Sérialiseur rapide optionnel
+    orjson = None
+
+# Tampon des fichiers écrits en binaire: peu d'appels système par fichier
+TAILLE_TAMPON = 1024 * 1024
+
+
+class SerialiseurJSON:
+    """Bibliothèque standard: même sortie que json.dump(indent=2, ensure_ascii=False)"""
+    nom = 'json'
+
+    def dumps(self, objet, indent=False):
+        if indent:
+            texte = json.dumps(objet, indent=2, ensure_ascii=False)
+        else:
+            texte = json.dumps(objet, ensure_ascii=False, separators=(',', ':'))
+        return texte.encode('utf-8')
+
+
+class SerialiseurOrjson:
+    """orjson: produit directement des octets UTF-8, identiques à SerialiseurJSON"""
+    nom = 'orjson'
+
+    def dumps(self, objet, indent=False):
+        return orjson.dumps(objet, option=orjson.OPT_INDENT_2 if indent else 0)
+
+
+SERIALISEURS = {
+    'json': SerialiseurJSON,
+    'orjson': SerialiseurOrjson,
+}
+
+
+def choisir_serialiseur(nom=None):
+    """Sérialiseur demandé, ou le plus rapide disponible si nom est None"""
+    if nom is None:
+        nom = 'orjson' if orjson is not None else 'json'
+    if nom not in SERIALISEURS:
+        raise ValueError(f"Sérialiseur inconnu: {nom}")
+    if nom == 'orjson' and orjson is None:
+        raise ImportError("Le sérialiseur 'orjson' nécessite le paquet orjson")
+    return SERIALISEURS[nom]()
@@ -0,0 +1,420 @@
+# -*- coding: utf-8 -*-
+# simulateur_flux.py - Flux IoT temps réel (pas de 1 à 15 min) pour tester la chaîne de consommation
+#
+# Un producteur asyncio tire, à chaque pas de temps simulé, une mesure par compteur
+# avec les modèles de JSONConsommationGenerator (tirer_mesure) et dépose des lots
+# JSON Lines dans une file bornée. Un consommateur les écrit dans un puits: fichiers
+# avec rotation, socket TCP (serveur local de substitution intégré) ou tube nommé.
+# File pleine = backpressure: le producteur attend (ou perd le lot, selon la politique).
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from config import *
+from generate_json_files import JSONConsommationGenerator
+from generate_mysql_data import JeuDeDonnees
+from instrumentation import Instrumentation
+from serialisation import SERIALISEURS, TAILLE_TAMPON
+
+# id_type_energie -> type d'énergie des modèles de consommation
+TYPES_FLUX = {1: 'electricite', 2: 'eau', 3: 'gaz'}
+
+POLITIQUES = ['bloquer', 'ignorer']
+
+# Pas des lectures accepté, en minutes (infra-horaire)
+INTERVALLE_MIN, INTERVALLE_MAX = 1, 60
+
+# ============================================
+# PUITS
+# ============================================
+
+class PuitFichiers:
+    """Fichiers JSON Lines avec rotation à partir de `taille_max_mo`"""
+    nom = 'fichiers'
+
+    def __init__(self, dossier='output/flux', taille_max_mo=64):
+        self.dossier = dossier
+        self.taille_max = int(taille_max_mo * 1024 * 1024)
+        self.numero = 0
+        self.taille = 0
+        self.f = None
+
+    async def ouvrir(self):
+        os.makedirs(self.dossier, exist_ok=True)
+        self._rotation()
+
+    def _rotation(self):
+        if self.f:
+            self.f.close()
+        self.numero += 1
+        horodatage = datetime.now().strftime('%Y%m%d_%H%M%S')
+        chemin = os.path.join(self.dossier, f"flux_{horodatage}_{str(self.numero).zfill(4)}.jsonl")
+        self.f = open(chemin, 'wb', buffering=TAILLE_TAMPON)
+        self.taille = 0
+
+    async def ecrire(self, bloc):
+        if self.taille and self.taille + len(bloc) > self.taille_max:
+            self._rotation()
+        self.f.write(bloc)
+        self.taille += len(bloc)
+
+    async def fermer(self):
+        if self.f:
+            self.f.close()
+
+
+class PuitTCP:
+    """Socket TCP: drain() suspend l'écriture tant que le lecteur ne suit pas"""
+    nom = 'tcp'
+
+    def __init__(self, hote, port):
+        self.hote = hote
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def ouvrir(self):
+        self.reader, self.writer = await asyncio.open_connection(self.hote, self.port)
+
+    async def ecrire(self, bloc):
+        self.writer.write(bloc)
+        await self.writer.drain()
+
+    async def fermer(self):
+        if self.writer:
+            # Fin d'envoi, puis attente que le lecteur ait tout consommé et ferme à son tour
+            self.writer.write_eof()
+            await self.reader.read()
+            self.writer.close()
+            await self.writer.wait_closed()
+
+
+class PuitTube:
+    """Tube nommé (POSIX): les écritures bloquantes passent par un thread"""
+    nom = 'tube'
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self.f = None
+
+    async def ouvrir(self):
+        if not os.path.exists(self.chemin):
+            os.mkfifo(self.chemin)
+        print(f"   En attente d'un lecteur sur {self.chemin} (ex: cat {self.chemin} > /dev/null)")
+        # L'ouverture bloque jusqu'à ce qu'un lecteur se connecte
+        self.f = await asyncio.to_thread(open, self.chemin, 'wb', 0)
+
+    async def ecrire(self, bloc):
+        await asyncio.to_thread(self.f.write, bloc)
+
+    async def fermer(self):
+        if self.f:
+            self.f.close()
+
+
+async def demarrer_serveur_local(hote='127.0.0.1', port=0, debit_max_mo=None):
+    """Consommateur TCP de substitution: lit et compte les octets, à débit limité si demandé
+
+    Retourne (serveur, port, statistiques).
+    """
+    statistiques = {'octets': 0, 'connexions': 0}
+
+    async def lire(reader, writer):
+        statistiques['connexions'] += 1
+        debut = time.perf_counter()
+        while True:
+            donnees = await reader.read(TAILLE_TAMPON)
+            if not donnees:
+                break
+            statistiques['octets'] += len(donnees)
+            if debit_max_mo:
+                # Lecteur lent: le tampon TCP se remplit et drain() bloque le simulateur
+                retard = statistiques['octets'] / (debit_max_mo * 1024 * 1024) - (time.perf_counter() - debut)
+                if retard > 0:
+                    await asyncio.sleep(retard)
+        writer.close()
+
+    serveur = await asyncio.start_server(lire, hote, port)
+    return serveur, serveur.sockets[0].getsockname()[1], statistiques
+
+
+# ============================================
+# SIMULATEUR
+# ============================================
+
+class MetriquesFlux:
+    """Compteurs du flux et débit sur une fenêtre glissante"""
+
+    def __init__(self):
+        self.debut = time.perf_counter()
+        self.emises = 0
+        self.ecrites = 0
+        self.octets = 0
+        self.pertes = 0
+        self.attentes = 0
+        self.attente_s = 0.0
+        self.retard_max_s = 0.0
+        self.profondeur_max = 0
+        self._fenetre = (self.debut, 0)
+
+    def instantane(self, file):
+        """Débit depuis le dernier instantané, et état de la file"""
+        maintenant = time.perf_counter()
+        t0, ecrites0 = self._fenetre
+        self._fenetre = (maintenant, self.ecrites)
+        return {
+            'lectures_par_s': round((self.ecrites - ecrites0) / (maintenant - t0)) if maintenant > t0 else 0,
+            'file': file.qsize(),
+        }
+
+    def resume(self):
+        duree = time.perf_counter() - self.debut
+        return {
+            'duree_s': round(duree, 2),
+            'lectures_emises': self.emises,
+            'lectures_ecrites': self.ecrites,
+            'lectures_perdues': self.pertes,
+            'lectures_par_s': round(self.ecrites / duree) if duree else None,
+            'octets_envoyes': self.octets,
+            'mo_par_s': round(self.octets / (1024 * 1024) / duree, 2) if duree else None,
+            'attentes_backpressure': self.attentes,
+            'attente_backpressure_s': round(self.attente_s, 2),
+            'retard_max_s': round(self.retard_max_s, 2),
+            'profondeur_max_file': self.profondeur_max,
+        }
+
+
+class SimulateurFlux:
+    """Émet une lecture par compteur à chaque pas de `intervalle_min` minutes simulées
+
+    acceleration: minutes simulées par minute réelle (None = aussi vite que possible)
+    taille_file: nombre maximal de lots en attente entre producteur et puits
+    politique: 'bloquer' (le producteur attend le puits) ou 'ignorer' (lot perdu, compté)
+    """
+
+    def __init__(self, generateur, intervalle_min=15, acceleration=None, taille_file=64,
+                 politique='bloquer', taille_lot=5000):
+        if not INTERVALLE_MIN <= intervalle_min <= INTERVALLE_MAX:
+            raise ValueError(f"L'intervalle doit être compris entre {INTERVALLE_MIN} et "
+                             f"{INTERVALLE_MAX} minutes")
+        if politique not in POLITIQUES:
+            raise ValueError(f"Politique inconnue: {politique}")
+        self.generateur = generateur
+        self.intervalle = timedelta(minutes=intervalle_min)
+        self.facteur = intervalle_min / 60
+        self.acceleration = acceleration
+        self.taille_file = taille_file
+        self.politique = politique
+        self.taille_lot = taille_lot
+        self.metriques = MetriquesFlux()
+        # Compteurs actifs d'un type connu, dans l'ordre de la table compteurs
+        self.compteurs = [
+            (c['id_compteur'], c['id_batiment'], TYPES_FLUX[c['id_type_energie']])
+            for c in generateur.compteurs
+            if c.get('statut', 'Actif') == 'Actif' and c.get('id_type_energie') in TYPES_FLUX
+        ]
+        # Probabilité de renvoi d'une lecture: 5% de doublons par compteur et par jour, comme les fichiers
+        self.taux_renvoi = DEFAUTS_QUALITE['taux_doublons'] * 5 * self.facteur / 24
+
+    def lots_intervalle(self, instant):
+        """Lectures JSON Lines de tous les compteurs pour un pas, par lots de `taille_lot`"""
+        tirer = self.generateur.tirer_mesure
+        aleatoire = self.generateur.aleatoire
+        dumps = self.generateur.serialiseur.dumps
+        date_iso = instant.isoformat()
+        heure, mois = instant.hour, instant.month
+
+        lignes = []
+        for compteur_id, id_batiment, type_energie in self.compteurs:
+            cle_conso, valeur = tirer(type_energie, heure, mois, self.facteur)
+            ligne = dumps({
+                'compteur_id': compteur_id,
+                'id_batiment': id_batiment,
+                'type_energie': type_energie,
+                'date_mesure': date_iso,
+                cle_conso: valeur,
+            })
+            lignes.append(ligne)
+            if aleatoire.random() < self.taux_renvoi:
+                lignes.append(ligne)
+            if len(lignes) >= self.taille_lot:
+                yield lignes
+                lignes = []
+        if lignes:
+            yield lignes
+
+    async def produire(self, file, debut, nb_intervalles):
+        m = self.metriques
+        depart = time.perf_counter()
+        for k in range(nb_intervalles):
+            if self.acceleration:
+                # Cadence réelle: le pas k part à k x intervalle / accélération
+                cible = depart + k * self.intervalle.total_seconds() / self.acceleration
+                attente = cible - time.perf_counter()
+                if attente > 0:
+                    await asyncio.sleep(attente)
+                else:
+                    m.retard_max_s = max(m.retard_max_s, -attente)
+
+            for lignes in self.lots_intervalle(debut + k * self.intervalle):
+                lot = (len(lignes), b'\n'.join(lignes) + b'\n')
+                m.emises += lot[0]
+                if self.politique == 'ignorer':
+                    try:
+                        file.put_nowait(lot)
+                    except asyncio.QueueFull:
+                        m.pertes += lot[0]
+                elif file.full():
+                    m.attentes += 1
+                    t = time.perf_counter()
+                    await file.put(lot)
+                    m.attente_s += time.perf_counter() - t
+                else:
+                    file.put_nowait(lot)
+                m.profondeur_max = max(m.profondeur_max, file.qsize())
+                # Laisse le consommateur avancer entre deux lots
+                await asyncio.sleep(0)
+        await file.put(None)
+
+    async def consommer(self, file, puits):
+        m = self.metriques
+        while True:
+            lot = await file.get()
+            if lot is None:
+                break
+            nb, bloc = lot
+            await puits.ecrire(bloc)
+            m.ecrites += nb
+            m.octets += len(bloc)
+
+    async def rapporter(self, file, periode):
+        while True:
+            await asyncio.sleep(periode)
+            etat = self.metriques.instantane(file)
+            print(f"   {self.metriques.ecrites:>12,} lectures | {etat['lectures_par_s']:>10,}/s | "
+                  f"file {etat['file']:>3}/{self.taille_file} | "
+                  f"attentes {self.metriques.attentes} | pertes {self.metriques.pertes}")
+
+    async def executer(self, puits, debut, nb_intervalles, periode_rapport=5):
+        """Lance producteur, consommateur et rapport périodique; retourne le résumé des métriques"""
+        file = asyncio.Queue(maxsize=self.taille_file)
+        await puits.ouvrir()
+        self.metriques = MetriquesFlux()
+        rapport = asyncio.create_task(self.rapporter(file, periode_rapport))
+        try:
+            await asyncio.gather(
+                self.produire(file, debut, nb_intervalles),
+                self.consommer(file, puits),
+            )
+        finally:
+            rapport.cancel()
+            await puits.fermer()
+        return self.metriques.resume()
+
+
+# ============================================
+# LIGNE DE COMMANDE
+# ============================================
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Simulateur de flux IoT infra-horaire (asyncio)")
+    parser.add_argument('--scale', type=float, default=1,
+                        help="Facteur d'échelle des volumes (nombre de compteurs)")
+    parser.add_argument('--intervalle', type=int, default=15,
+                        help=f"Pas des lectures en minutes, de {INTERVALLE_MIN} à {INTERVALLE_MAX} "
+                             f"(1 à 15 pour un compteur communicant)")
+    parser.add_argument('--duree', type=float, default=24,
+                        help="Durée simulée en heures")
+    parser.add_argument('--debut', type=lambda d: datetime.strptime(d, '%Y-%m-%d'),
+                        default=datetime(2025, 1, 1), metavar='AAAA-MM-JJ',
+                        help="Date de début simulée")
+    parser.add_argument('--acceleration', type=float, default=None,
+                        help="Minutes simulées par minute réelle (par défaut: débit maximal)")
+    parser.add_argument('--puits', choices=['fichiers', 'tcp', 'tube'], default='fichiers',
+                        help="Destination des lectures")
+    parser.add_argument('--sortie', default='output/flux',
+                        help="Dossier des fichiers (puits fichiers) ou chemin du tube nommé")
+    parser.add_argument('--rotation-mo', type=float, default=64,
+                        help="Taille maximale d'un fichier avant rotation (Mo)")
+    parser.add_argument('--adresse', default=None, metavar='HOTE:PORT',
+                        help="Consommateur TCP (par défaut: serveur local de substitution)")
+    parser.add_argument('--debit-serveur', type=float, default=None, metavar='MO_S',
+                        help="Débit maximal du serveur local, pour exercer la backpressure")
+    parser.add_argument('--taille-file', type=int, default=64,
+                        help="Nombre maximal de lots en attente avant backpressure")
+    parser.add_argument('--politique', choices=POLITIQUES, default='bloquer',
+                        help="File pleine: attendre le puits ou perdre le lot")
+    parser.add_argument('--serialiseur', choices=list(SERIALISEURS), default=None,
+                        help="Sérialiseur JSON (par défaut orjson s'il est installé, sinon json)")
+    parser.add_argument('--graine', type=int, default=42)
+    parser.add_argument('--metriques', default=None, metavar='FICHIER',
+                        help="Ajoute le résumé du flux (JSON Lines, comme main.py --metriques)")
+    args = parser.parse_args()
+    if not INTERVALLE_MIN <= args.intervalle <= INTERVALLE_MAX:
+        parser.error(f"--intervalle doit être compris entre {INTERVALLE_MIN} et {INTERVALLE_MAX} minutes")
+    return args
+
+
+async def simuler(args, simulateur):
+    serveur = None
+    if args.puits == 'fichiers':
+        puits = PuitFichiers(args.sortie, args.rotation_mo)
+    elif args.puits == 'tube':
+        puits = PuitTube(args.sortie)
+    else:
+        if args.adresse:
+            hote, port = args.adresse.rsplit(':', 1)
+        else:
+            hote = '127.0.0.1'
+            serveur, port, _ = await demarrer_serveur_local(hote, debit_max_mo=args.debit_serveur)
+            print(f"   Serveur TCP local de substitution sur {hote}:{port}")
+        puits = PuitTCP(hote, int(port))
+
+    nb_intervalles = int(args.duree * 60 // args.intervalle)
+    try:
+        return await simulateur.executer(puits, args.debut, nb_intervalles)
+    finally:
+        if serveur:
+            serveur.close()
+            await serveur.wait_closed()
+
+
+def main():
+    args = parse_arguments()
+    appliquer_facteur_echelle(args.scale)
+
+    # Seules les tables des compteurs et de leurs dépendances sont générées
+    donnees = JeuDeDonnees()
+    with contextlib.redirect_stdout(io.StringIO()):
+        donnees.charger('compteurs')
+    json_generator = JSONConsommationGenerator(
+        donnees.batiments, donnees.compteurs, donnees.regions, serialiseur=args.serialiseur
+    )
+    json_generator.aleatoire = random.Random(args.graine)
+
+    simulateur = SimulateurFlux(json_generator, args.intervalle, args.acceleration,
+                                args.taille_file, args.politique)
+    print("="*70)
+    print("📡 SIMULATEUR DE FLUX IOT")
+    print("="*70)
+    print(f"   {len(simulateur.compteurs)} compteurs, une lecture toutes les {args.intervalle} min, "
+          f"{args.duree:g} h simulées -> puits {args.puits}")
+
+    instrumentation = Instrumentation(args.metriques)
+    with instrumentation.etape('flux_iot') as mesure:
+        resume = asyncio.run(simuler(args, simulateur))
+        mesure['lignes'] = resume['lectures_ecrites']
+        mesure.update({k: v for k, v in resume.items() if k != 'duree_s'})
+
+    print("\n📊 Résumé du flux:")
+    for cle, valeur in resume.items():
+        print(f"   • {cle:<24} {valeur:,}" if isinstance(valeur, int) else f"   • {cle:<24} {valeur}")
+
+
+if __name__ == "__main__":
+    main()
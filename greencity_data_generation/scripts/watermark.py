@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# watermark.py - Point de reprise de la génération incrémentale
+
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+# Fichier de reprise, à la manière du .last_run de run_dm3.sh
+FICHIER_WATERMARK = 'output/.watermark.json'
+
+# Format des dates de reprise par source
+FORMATS = {
+    'factures': '%Y-%m-%d',
+    'paiements': '%Y-%m-%d',
+    'temperatures': '%Y-%m-%d',
+    'json': '%Y-%m-%d',
+    'csv': '%Y-%m',
+}
+
+
+def charger_watermark(chemin=FICHIER_WATERMARK):
+    """Lit le watermark; None si aucune génération n'a encore été faite"""
+    if not os.path.exists(chemin):
+        return None
+    with open(chemin, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def sauvegarder_watermark(watermark, chemin=FICHIER_WATERMARK):
+    """Écrit le watermark (fichier temporaire puis renommage: jamais à moitié écrit)"""
+    watermark['genere_le'] = datetime.now().isoformat(timespec='seconds')
+    os.makedirs(os.path.dirname(chemin) or '.', exist_ok=True)
+    temporaire = chemin + '.tmp'
+    with open(temporaire, 'w', encoding='utf-8') as f:
+        json.dump(watermark, f, indent=2)
+    os.replace(temporaire, chemin)
+
+
+def jusqua(watermark, source):
+    """Dernière date (ou dernier mois pour 'csv') déjà générée pour une source"""
+    return datetime.strptime(watermark[source]['jusqua'], FORMATS[source])
+
+
+def reprises_factures(watermark):
+    """Début de la prochaine période à facturer par contrat (None: watermark sans ce suivi)"""
+    reprises = watermark['factures'].get('reprises')
+    if reprises is None:
+        return None
+    return {contrat: datetime.strptime(date, FORMATS['factures']) for contrat, date in reprises.items()}
+
+
+def avancer_factures(watermark, reprises, fin, derniere_facture, dernier_paiement):
+    """Enregistre la reprise de chaque contrat et avance factures/paiements
+    
+    'jusqua' est la veille de la plus ancienne reprise (toutes les périodes qui
+    commencent jusque-là sont générées), au plus fin.
+    """
+    premiere = min(reprises.values(), default=None)
+    date = min(premiere - timedelta(days=1), fin) if premiere else fin
+    avancer(watermark, 'factures', date, dernier_id=derniere_facture,
+            reprises={contrat: debut.strftime(FORMATS['factures']) for contrat, debut in reprises.items()})
+    avancer(watermark, 'paiements', date, dernier_id=dernier_paiement)
+
+
+def avancer(watermark, source, date, **compteurs):
+    """Avance le watermark d'une source à `date` (jamais en arrière) et met à jour ses compteurs"""
+    entree = watermark.setdefault(source, {})
+    if 'jusqua' not in entree or date > jusqua(watermark, source):
+        entree['jusqua'] = date.strftime(FORMATS[source])
+    entree.update(compteurs)
+
+
+def etat_aleatoire():
+    """État du générateur global random, sérialisable en JSON"""
+    version, etat, gauss = random.getstate()
+    return [version, list(etat), gauss]
+
+
+def restaurer_etat_aleatoire(etat):
+    """Reprend la séquence aléatoire là où la génération précédente s'est arrêtée"""
+    version, valeurs, gauss = etat
+    random.setstate((version, tuple(valeurs), gauss))
+
+
+def mois_suivant(date):
+    """Premier jour du mois suivant"""
+    if date.month == 12:
+        return datetime(date.year + 1, 1, 1)
+    return datetime(date.year, date.month + 1, 1)
+
+
+def dernier_mois_complet(date):
+    """Premier jour du dernier mois entièrement écoulé au `date` inclus"""
+    lendemain = date + timedelta(days=1)
+    fin_mois = datetime(lendemain.year, lendemain.month, 1) - timedelta(days=1)
+    return datetime(fin_mois.year, fin_mois.month, 1)
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+# agregats.py - Cumuls journaliers / mensuels des faits pour les tableaux de bord
+#
+# Tables créées par datawarehouse/create_agregats.sql. Après chaque chargement,
+# seules les périodes (jours ou mois) dont un fait a été inséré ou modifié depuis
+# le dernier rafraîchissement (date_modification, suivi dans etl_control), ou dont
+# un jour est signalé dans agg_periodes_a_recalculer (faits supprimés ou déplacés,
+# partitions échangées), sont recalculées: DELETE puis INSERT ... SELECT ... GROUP BY
+# sur ces périodes.
+#   rafraichir   - mise à jour incrémentale (par défaut)
+#   reconstruire - recalcul complet depuis les faits
+#   verifier     - compare chaque agrégat à un GROUP BY des faits de base
+
+import argparse
+import os
+import re
+import sys
+import time
+
+import mysql.connector
+
+from config_dw import DW_CONFIG
+
+
+MESURES_CONSOMMATION = [
+    ('consommation_totale', 'SUM(f.consommation)'),
+    ('nb_mesures', 'COUNT(*)'),
+    ('somme_temperature', 'SUM(f.temperature_moyenne)'),
+    ('nb_temperatures', 'COUNT(f.temperature_moyenne)'),
+]
+
+# Agrégat -> fait source, colonnes de période (granularité du recalcul), autres
+# clés et mesures. Alias: f = fait, t = dim_temps.
+AGREGATS = {
+    'agg_conso_jour_batiment': {
+        'source': 'fait_consommation',
+        'periode': [('id_temps_fk', 'f.id_temps_fk')],
+        'cles': [('id_batiment_fk', 'f.id_batiment_fk'), ('id_region_fk', 'f.id_region_fk'),
+                 ('id_type_energie_fk', 'f.id_type_energie_fk')],
+        'mesures': MESURES_CONSOMMATION,
+    },
+    'agg_conso_mois_region': {
+        'source': 'fait_consommation',
+        'periode': [('annee', 't.annee'), ('mois', 't.mois')],
+        'cles': [('id_region_fk', 'f.id_region_fk'),
+                 ('id_type_energie_fk', 'f.id_type_energie_fk')],
+        'mesures': MESURES_CONSOMMATION,
+    },
+    'agg_rentabilite_mois_client': {
+        'source': 'fait_rentabilite',
+        'periode': [('annee', 't.annee'), ('mois', 't.mois')],
+        'cles': [('id_client_fk', 'f.id_client_fk'), ('id_region_fk', 'f.id_region_fk')],
+        'mesures': [
+            ('chiffre_affaires', 'SUM(f.montant_ttc)'),
+            ('montant_ht', 'SUM(f.montant_ht)'),
+            ('cout_energie', 'SUM(f.cout_energie)'),
+            ('marge', 'SUM(f.marge)'),
+            ('consommation_totale', 'SUM(f.consommation)'),
+            ('nb_factures', 'COUNT(DISTINCT f.id_facture)'),
+        ],
+    },
+    'agg_environnement_mois_batiment': {
+        'source': 'fait_environnement',
+        'periode': [('annee', 't.annee'), ('mois', 't.mois')],
+        'cles': [('id_batiment_fk', 'f.id_batiment_fk'), ('id_region_fk', 'f.id_region_fk')],
+        'mesures': [
+            ('emissions_co2_totales', 'SUM(f.emission_co2_kg)'),
+            ('somme_taux_recyclage', 'SUM(f.taux_recyclage)'),
+            ('nb_taux_recyclage', 'COUNT(f.taux_recyclage)'),
+            ('consommation_totale_kwh', 'SUM(f.consommation_totale_kwh)'),
+            ('nb_rapports', 'COUNT(*)'),
+        ],
+    },
+}
+
+
+def agregats_de(fait):
+    """Agrégats alimentés par une table de faits"""
+    return [nom for nom, definition in AGREGATS.items() if definition['source'] == fait]
+
+
+def source_sql(definition, table=None):
+    """FROM du fait (ou de `table`, avec id_temps_fk), avec dim_temps seulement si une expression l'utilise"""
+    expressions = definition['periode'] + definition['cles'] + definition['mesures']
+    jointure = (" JOIN dim_temps t ON f.id_temps_fk = t.id_temps"
+                if any(re.search(r'\bt\.', e) for _, e in expressions) else '')
+    return f"FROM {table or definition['source']} f{jointure}"
+
+
+def selection_sql(definition, condition=''):
+    """SELECT ... GROUP BY qui calcule l'agrégat (sur `condition` si donnée)"""
+    groupes = ', '.join(e for _, e in definition['periode'] + definition['cles'])
+    mesures = ', '.join(e for _, e in definition['mesures'])
+    where = f" WHERE {condition}" if condition else ''
+    return f"SELECT {groupes}, {mesures} {source_sql(definition)}{where} GROUP BY {groupes}"
+
+
+def colonnes(definition):
+    """Colonnes de la table d'agrégat, dans l'ordre de selection_sql"""
+    return [c for c, _ in definition['periode'] + definition['cles'] + definition['mesures']]
+
+
+def condition_periodes(expressions, nb_periodes):
+    """(a, b) IN ((%s, %s), ...) pour une liste de périodes"""
+    ligne = f"({', '.join(['%s'] * len(expressions))})"
+    return f"({', '.join(expressions)}) IN ({', '.join([ligne] * nb_periodes)})"
+
+
+def lire_watermark(curseur, nom):
+    curseur.execute("SELECT derniere_extraction FROM etl_control WHERE nom_source = %s", (nom,))
+    ligne = curseur.fetchone()
+    return ligne[0] if ligne else '1900-01-01 00:00:00'
+
+
+def ecrire_watermark(curseur, nom, horodatage, nb_lignes, statut='SUCCESS'):
+    curseur.execute(
+        "INSERT INTO etl_control (nom_source, derniere_extraction, nb_lignes_extraites, statut) "
+        "VALUES (%s, %s, %s, %s) ON DUPLICATE KEY UPDATE derniere_extraction = VALUES(derniere_extraction), "
+        "nb_lignes_extraites = VALUES(nb_lignes_extraites), statut = VALUES(statut)",
+        (nom, horodatage, nb_lignes, statut)
+    )
+
+
+def signaler_periodes(curseur, source, debut, fin):
+    """Signale à rafraichir les jours id_temps de [debut, fin) de `source`; retourne leur nombre
+
+    Pour les changements invisibles dans date_modification (EXCHANGE PARTITION).
+    Sans create_agregats.sql (pas d'agrégats), ne fait rien.
+    """
+    curseur.execute("SHOW TABLES LIKE 'agg_periodes_a_recalculer'")
+    if not curseur.fetchall():
+        return 0
+    curseur.execute(
+        "INSERT INTO agg_periodes_a_recalculer (source, id_temps_fk) "
+        "SELECT %s, id_temps FROM dim_temps WHERE id_temps >= %s AND id_temps < %s "
+        "ON DUPLICATE KEY UPDATE date_signalement = CURRENT_TIMESTAMP",
+        (source, debut, fin)
+    )
+    return curseur.rowcount
+
+
+def rafraichir(connexion, nom, taille_lot=500):
+    """Recalcule les périodes touchées depuis le dernier rafraîchissement; retourne (périodes, lignes)
+
+    Périodes des faits modifiés depuis le dernier passage, et périodes des jours
+    signalés depuis (agg_periodes_a_recalculer): la période quittée par un fait
+    supprimé ou déplacé, ou remplacée par partitions.py echanger, est recalculée.
+    L'horodatage de reprise est lu sur le serveur avant la recherche des périodes:
+    un fait modifié pendant le rafraîchissement sera repris au suivant.
+    """
+    definition = AGREGATS[nom]
+    curseur = connexion.cursor()
+    try:
+        curseur.execute("SELECT NOW()")
+        debut = curseur.fetchone()[0]
+        watermark = lire_watermark(curseur, nom)
+        expressions = [e for _, e in definition['periode']]
+        curseur.execute(f"SELECT {', '.join(expressions)} {source_sql(definition)} "
+                        f"WHERE f.date_modification >= %s "
+                        f"UNION SELECT {', '.join(expressions)} "
+                        f"{source_sql(definition, 'agg_periodes_a_recalculer')} "
+                        f"WHERE f.source = %s AND f.date_signalement >= %s",
+                        (watermark, definition['source'], watermark))
+        periodes = curseur.fetchall()
+
+        nb_lignes = 0
+        cles_periode = [c for c, _ in definition['periode']]
+        for i in range(0, len(periodes), taille_lot):
+            lot = periodes[i:i + taille_lot]
+            valeurs = [v for periode in lot for v in periode]
+            curseur.execute(f"DELETE FROM {nom} WHERE {condition_periodes(cles_periode, len(lot))}",
+                            valeurs)
+            curseur.execute(f"INSERT INTO {nom} ({', '.join(colonnes(definition))}) "
+                            f"{selection_sql(definition, condition_periodes(expressions, len(lot)))}",
+                            valeurs)
+            nb_lignes += curseur.rowcount
+        ecrire_watermark(curseur, nom, debut, nb_lignes)
+        connexion.commit()
+    except Exception:
+        connexion.rollback()
+        raise
+    finally:
+        curseur.close()
+    return len(periodes), nb_lignes
+
+
+def reconstruire(connexion, nom):
+    """Vide l'agrégat et le recalcule entièrement depuis les faits; retourne le nombre de lignes"""
+    definition = AGREGATS[nom]
+    curseur = connexion.cursor()
+    try:
+        curseur.execute("SELECT NOW()")
+        debut = curseur.fetchone()[0]
+        curseur.execute(f"DELETE FROM {nom}")
+        curseur.execute(f"INSERT INTO {nom} ({', '.join(colonnes(definition))}) "
+                        f"{selection_sql(definition)}")
+        nb_lignes = curseur.rowcount
+        ecrire_watermark(curseur, nom, debut, nb_lignes)
+        connexion.commit()
+    except Exception:
+        connexion.rollback()
+        raise
+    finally:
+        curseur.close()
+    return nb_lignes
+
+
+def verifier(connexion, nom):
+    """Compare l'agrégat au GROUP BY des faits; retourne (manquantes, en trop, différentes)"""
+    definition = AGREGATS[nom]
+    nb_cles = len(definition['periode']) + len(definition['cles'])
+    curseur = connexion.cursor()
+    curseur.execute(selection_sql(definition))
+    attendu = {ligne[:nb_cles]: ligne[nb_cles:] for ligne in curseur.fetchall()}
+    curseur.execute(f"SELECT {', '.join(colonnes(definition))} FROM {nom}")
+    stocke = {ligne[:nb_cles]: ligne[nb_cles:] for ligne in curseur.fetchall()}
+    curseur.close()
+
+    manquantes = len(attendu.keys() - stocke.keys())
+    en_trop = len(stocke.keys() - attendu.keys())
+    differentes = sum(1 for cle in attendu.keys() & stocke.keys() if attendu[cle] != stocke[cle])
+    return manquantes, en_trop, differentes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agrégats des tableaux de bord (greencity_dw)")
+    parser.add_argument('action', nargs='?', default='rafraichir',
+                        choices=['rafraichir', 'reconstruire', 'verifier'])
+    parser.add_argument('--agregats', nargs='+', choices=list(AGREGATS), default=list(AGREGATS),
+                        help="Agrégats à traiter (tous par défaut)")
+    args = parser.parse_args()
+
+    connexion = mysql.connector.connect(**DW_CONFIG)
+    identiques = True
+    try:
+        for nom in args.agregats:
+            debut = time.perf_counter()
+            if args.action == 'rafraichir':
+                nb_periodes, nb_lignes = rafraichir(connexion, nom)
+                print(f"✓ {nom}: {nb_periodes} périodes recalculées, {nb_lignes} lignes "
+                      f"en {time.perf_counter() - debut:.2f} s")
+            elif args.action == 'reconstruire':
+                nb_lignes = reconstruire(connexion, nom)
+                print(f"✓ {nom}: {nb_lignes} lignes en {time.perf_counter() - debut:.2f} s")
+            else:
+                manquantes, en_trop, differentes = verifier(connexion, nom)
+                identique = not (manquantes or en_trop or differentes)
+                identiques &= identique
+                print(f"   {'✓' if identique else '✗'} {nom}: {manquantes} manquantes, "
+                      f"{en_trop} en trop, {differentes} différentes")
+    finally:
+        connexion.close()
+    sys.exit(0 if identiques else 1)
+
+
+if __name__ == "__main__":
+    main()
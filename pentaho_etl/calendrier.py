@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+# calendrier.py - Génération complète de dim_temps en une passe vectorisée
+#
+# Remplace sp_generer_dim_temps (une boucle WHILE, un INSERT par jour) et le
+# remplissage au fil des dates rencontrées:
+#   - toutes les colonnes de dim_temps calculées sur une plage de dates (pandas)
+#   - jours fériés marocains (civils fixes + religieux du calendrier hégirien
+#     tabulaire, corrigés par feries.txt selon les dates observées)
+#   - id_temps = nombre de jours depuis l'origine + 1: la clé d'une date se
+#     calcule sans lookup (voir CacheDimensions dans charger_faits.py)
+
+import argparse
+import os
+import time
+from datetime import date, timedelta
+
+import mysql.connector
+import numpy as np
+import pandas as pd
+
+from config_dw import DW_CONFIG
+
+
+# Premier jour de CALL sp_generer_dim_temps('2022-01-01', ...): id_temps = 1
+ORIGINE = date(2022, 1, 1)
+
+NOMS_MOIS = ['Janvier', 'Février', 'Mars', 'Avril', 'Mai', 'Juin', 'Juillet', 'Août',
+             'Septembre', 'Octobre', 'Novembre', 'Décembre']
+# Indexé par DAYOFWEEK - 1 (1 = dimanche, comme MySQL)
+NOMS_JOURS = ['Dimanche', 'Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi']
+
+# Fêtes civiles à date fixe: (mois, jour) -> (nom, première année fériée)
+FERIES_FIXES = {
+    (1, 1): ("Nouvel An", None),
+    (1, 11): ("Manifeste de l'Indépendance", None),
+    (1, 14): ("Nouvel An amazigh", 2024),
+    (5, 1): ("Fête du Travail", None),
+    (7, 30): ("Fête du Trône", None),
+    (8, 14): ("Allégeance Oued Eddahab", None),
+    (8, 20): ("Révolution du Roi et du Peuple", None),
+    (8, 21): ("Fête de la Jeunesse", None),
+    (11, 6): ("Marche Verte", None),
+    (11, 18): ("Fête de l'Indépendance", None),
+}
+
+# Fêtes religieuses: (mois hégirien, jour) -> nom
+FERIES_HEGIRIENS = {
+    (1, 1): "1er Moharram",
+    (3, 12): "Aïd al-Mawlid",
+    (3, 13): "Aïd al-Mawlid",
+    (10, 1): "Aïd al-Fitr",
+    (10, 2): "Aïd al-Fitr",
+    (12, 10): "Aïd al-Adha",
+    (12, 11): "Aïd al-Adha",
+}
+
+# Jour julien du 1er Moharram de l'an 1 (calendrier hégirien tabulaire)
+EPOQUE_HEGIRIENNE = 1948439.5
+
+# Corrections des jours fériés (lu par défaut s'il existe, voir lire_feries)
+FICHIER_FERIES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'feries.txt')
+
+COLONNES = ['id_temps', 'date_complete', 'annee', 'trimestre', 'mois', 'nom_mois', 'semaine',
+            'jour', 'jour_semaine', 'nom_jour', 'est_weekend', 'est_ferie']
+
+
+def dates_hegiriennes(dates):
+    """(mois, jour) hégiriens de chaque date, par le calendrier tabulaire (30 ans / 11 abondantes)
+
+    Le calendrier observé au Maroc dépend de l'observation du croissant: les
+    dates peuvent différer d'un ou deux jours (par exemple Aïd al-Mawlid 2023:
+    27-28 septembre ici, 28-29 observés), à corriger dans feries.txt.
+    """
+    jd = np.floor(dates.to_julian_date().values) + 0.5
+
+    def debut_mois(annee, mois):
+        return (np.ceil(29.5 * (mois - 1)) + (annee - 1) * 354
+                + np.floor((3 + 11 * annee) / 30) + EPOQUE_HEGIRIENNE)
+
+    annee = np.floor((30 * (jd - EPOQUE_HEGIRIENNE) + 10646) / 10631)
+    mois = np.minimum(12, np.ceil((jd - (29 + debut_mois(annee, 1))) / 29.5) + 1)
+    jour = jd - debut_mois(annee, mois) + 1
+    return mois.astype(int), jour.astype(int)
+
+
+def jours_feries(dates, feries_supplementaires=(), feries_retires=()):
+    """Masque des jours fériés marocains (fixes, hégiriens et dates ajoutées, moins les retirées)"""
+    mois, jour, annee = dates.month.values, dates.day.values, dates.year.values
+    ferie = np.zeros(len(dates), dtype=bool)
+    for (m, j), (_, depuis) in FERIES_FIXES.items():
+        ferie |= (mois == m) & (jour == j) & (annee >= (depuis or 0))
+    mois_h, jour_h = dates_hegiriennes(dates)
+    for m, j in FERIES_HEGIRIENS:
+        ferie |= (mois_h == m) & (jour_h == j)
+    if len(feries_supplementaires):
+        ferie |= dates.isin(pd.to_datetime(list(feries_supplementaires)))
+    if len(feries_retires):
+        ferie &= ~dates.isin(pd.to_datetime(list(feries_retires)))
+    return ferie
+
+
+def id_temps(dates, origine=ORIGINE):
+    """Clé de dim_temps calculée: jours écoulés depuis l'origine + 1"""
+    return (pd.DatetimeIndex(dates) - pd.Timestamp(origine)).days.values + 1
+
+
+def generer_calendrier(debut, fin, origine=ORIGINE, feries_supplementaires=(), feries_retires=()):
+    """Lignes de dim_temps de `debut` à `fin` inclus (mêmes valeurs que sp_generer_dim_temps)"""
+    if pd.Timestamp(debut) < pd.Timestamp(origine):
+        raise ValueError(f"Début {debut} antérieur à l'origine des clés ({origine})")
+    dates = pd.date_range(debut, fin, freq='D')
+    jour_semaine = (dates.dayofweek.values + 1) % 7 + 1  # DAYOFWEEK: 1 = dimanche
+    return pd.DataFrame({
+        'id_temps': id_temps(dates, origine),
+        'date_complete': dates.strftime('%Y-%m-%d'),
+        'annee': dates.year.values,
+        'trimestre': dates.quarter.values,
+        'mois': dates.month.values,
+        'nom_mois': np.array(NOMS_MOIS, dtype=object)[dates.month.values - 1],
+        'semaine': dates.isocalendar().week.values.astype(int),  # WEEKOFYEAR (ISO 8601)
+        'jour': dates.day.values,
+        'jour_semaine': jour_semaine,
+        'nom_jour': np.array(NOMS_JOURS, dtype=object)[jour_semaine - 1],
+        'est_weekend': np.isin(jour_semaine, [1, 7]),
+        'est_ferie': jours_feries(dates, feries_supplementaires, feries_retires),
+    })
+
+
+# ============================================
+# CHARGEMENT
+# ============================================
+
+def etat_calendrier(connexion):
+    """dim_temps chargée: {'debut', 'fin', 'origine', 'contigu'}; None si vide
+
+    'origine' vaut None si les id_temps ne suivent pas les dates (table remplie
+    par un autre moyen): les clés doivent alors être recherchées.
+    """
+    curseur = connexion.cursor()
+    curseur.execute("SELECT MIN(date_complete), MAX(date_complete), COUNT(*), "
+                    "MIN(id_temps - DATEDIFF(date_complete, '1970-01-01')), "
+                    "MAX(id_temps - DATEDIFF(date_complete, '1970-01-01')) FROM dim_temps")
+    debut, fin, nb_jours, decalage_min, decalage_max = curseur.fetchone()
+    curseur.close()
+    if not nb_jours:
+        return None
+    origine = None
+    if decalage_min == decalage_max:
+        origine = date(1970, 1, 1) + timedelta(days=1 - int(decalage_min))
+    return {'debut': debut, 'fin': fin, 'origine': origine,
+            'contigu': nb_jours == (fin - debut).days + 1}
+
+
+def charger_calendrier(connexion, calendrier, origine=ORIGINE, taille_lot=5000):
+    """INSERT ... ON DUPLICATE KEY UPDATE par lots: ajoute les dates, recalcule les attributs
+
+    Refuse une dim_temps dont les clés ne suivent pas `origine`: les faits
+    existants référencent ses id_temps, qui ne peuvent pas être renumérotés.
+    """
+    etat = etat_calendrier(connexion)
+    if etat and etat['origine'] != pd.Timestamp(origine).date():
+        raise ValueError(f"dim_temps déjà chargée avec des id_temps incompatibles avec "
+                         f"l'origine {origine} (origine actuelle: {etat['origine']})")
+
+    mises_a_jour = ', '.join(f"{c} = VALUES({c})" for c in COLONNES[2:])
+    requete = (f"INSERT INTO dim_temps ({', '.join(COLONNES)}) "
+               f"VALUES ({', '.join(['%s'] * len(COLONNES))}) "
+               f"ON DUPLICATE KEY UPDATE {mises_a_jour}")
+    lignes = list(zip(*(calendrier[c].tolist() for c in COLONNES)))
+    curseur = connexion.cursor()
+    try:
+        for debut in range(0, len(lignes), taille_lot):
+            curseur.executemany(requete, lignes[debut:debut + taille_lot])
+        connexion.commit()
+    except Exception:
+        connexion.rollback()
+        raise
+    finally:
+        curseur.close()
+    return len(lignes)
+
+
+def lire_feries(chemin=FICHIER_FERIES):
+    """(dates ajoutées, dates retirées) d'un fichier de corrections; ([], []) s'il n'existe pas
+
+    Une date par ligne: AAAA-MM-JJ ajoute un jour férié, -AAAA-MM-JJ en retire un
+    (fête hégirienne décalée par l'observation du croissant); # pour les commentaires.
+    """
+    ajouts, retraits = [], []
+    if not chemin or not os.path.exists(chemin):
+        return ajouts, retraits
+    with open(chemin, encoding='utf-8') as f:
+        for ligne in f:
+            ligne = ligne.split('#')[0].strip()
+            if ligne.startswith('-'):
+                retraits.append(ligne[1:].strip())
+            elif ligne:
+                ajouts.append(ligne)
+    return ajouts, retraits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génération de la dimension temps (dim_temps)")
+    parser.add_argument('--debut', default=ORIGINE.isoformat(), help="Première date (AAAA-MM-JJ)")
+    parser.add_argument('--fin', default='2030-12-31', help="Dernière date (AAAA-MM-JJ)")
+    parser.add_argument('--origine', default=ORIGINE.isoformat(),
+                        help="Date dont l'id_temps vaut 1")
+    parser.add_argument('--feries', default=FICHIER_FERIES,
+                        help="Corrections des jours fériés (AAAA-MM-JJ ajoute, -AAAA-MM-JJ retire)")
+    parser.add_argument('--csv', help="Écrit aussi le calendrier dans ce fichier CSV")
+    parser.add_argument('--charger', action='store_true', help="Charge dim_temps dans greencity_dw")
+    parser.add_argument('--lot', type=int, default=5000, help="Lignes par executemany")
+    args = parser.parse_args()
+    if args.feries != FICHIER_FERIES and not os.path.exists(args.feries):
+        parser.error(f"fichier de jours fériés introuvable: {args.feries}")
+
+    debut = time.perf_counter()
+    calendrier = generer_calendrier(args.debut, args.fin, args.origine, *lire_feries(args.feries))
+    print(f"📅 {len(calendrier)} jours générés en {time.perf_counter() - debut:.3f} s "
+          f"({int(calendrier['est_ferie'].sum())} fériés, "
+          f"id_temps {calendrier['id_temps'].iloc[0]} à {calendrier['id_temps'].iloc[-1]})")
+
+    if args.csv:
+        calendrier.to_csv(args.csv, sep=';', index=False, encoding='utf-8')
+        print(f"   ✓ {args.csv}")
+    if args.charger:
+        connexion = mysql.connector.connect(**DW_CONFIG)
+        try:
+            nb_lignes = charger_calendrier(connexion, calendrier, args.origine, args.lot)
+        finally:
+            connexion.close()
+        print(f"   ✓ dim_temps: {nb_lignes} lignes chargées")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,516 @@
+# -*- coding: utf-8 -*-
+# charger_faits.py - Chargement des faits DM1/DM2 avec cache mémoire des clés de substitution
+#
+# Remplace les DBLookup de tr_load_fact_consommation.ktr et tr_load_fait_rentabilite.ktr
+# (une requête par ligne et par dimension) par un préchargement des dimensions:
+#   - une requête SELECT par dimension et par exécution -> dictionnaires en mémoire
+#   - résolution des clés une fois par valeur distincte, redistribuée sur les lignes
+#   - InsertUpdate par lots (executemany) dans fait_consommation / fait_rentabilite
+#   - lignes sans correspondance -> staging/rejected/rejets_<fait>_<AAAAMMJJ_HHMMSS>.csv
+
+import argparse
+import os
+import tempfile
+import time
+import unicodedata
+from collections import Counter
+from datetime import date, datetime
+
+import mysql.connector
+import numpy as np
+import pandas as pd
+
+from config_dw import DW_CONFIG
+
+from agregats import agregats_de, rafraichir
+from calendrier import etat_calendrier, id_temps
+
+
+DOSSIER_DM1 = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           'dm1_consommation_energetique', 'staging')
+DOSSIER_DM2 = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           'dm2_Rentabilite', 'staging')
+
+# Recherche -> (requête de préchargement, colonnes retournées après la clé naturelle).
+# ORDER BY sur la clé de substitution: en cas de doublon, la première ligne est gardée,
+# comme le DBLookup (fail_on_multiple=N) sur un parcours de la clé primaire.
+RECHERCHES = {
+    'dim_temps': ("SELECT date_complete, id_temps FROM dim_temps ORDER BY id_temps",
+                  ['id_temps']),
+    'dim_region': ("SELECT id_region, id_region_sk FROM dim_region ORDER BY id_region_sk",
+                   ['id_region_sk']),
+    'dim_batiment': ("SELECT id_batiment, id_batiment_sk, id_region FROM dim_batiment "
+                     "ORDER BY id_batiment_sk", ['id_batiment_sk', 'id_region']),
+    'dim_type_energie': ("SELECT libelle, id_type_energie_sk FROM dim_type_energie "
+                         "ORDER BY id_type_energie_sk", ['id_type_energie_sk']),
+    'dim_type_energie_id': ("SELECT id_type_energie, id_type_energie_sk FROM dim_type_energie "
+                            "ORDER BY id_type_energie_sk", ['id_type_energie_sk']),
+    'dim_compteur': ("SELECT id_compteur, id_compteur_sk, id_batiment, id_type_energie "
+                     "FROM dim_compteur ORDER BY id_compteur_sk",
+                     ['id_compteur_sk', 'id_batiment', 'id_type_energie']),
+    'dim_client': ("SELECT id_client, id_client_sk FROM dim_client ORDER BY id_client_sk",
+                   ['id_client_sk']),
+    'dim_contrat': ("SELECT id_contrat, id_contrat_sk FROM dim_contrat ORDER BY id_contrat_sk",
+                    ['id_contrat_sk']),
+    'dim_statut_paiement': ("SELECT code_statut, id_statut_sk FROM dim_statut_paiement "
+                            "ORDER BY id_statut_sk", ['id_statut_sk']),
+}
+
+# Tables de faits: clés de l'InsertUpdate Pentaho (et leur index), colonnes écrites
+FAITS = {
+    'consommation': {
+        'table': 'fait_consommation',
+        'id': 'id_consommation',
+        'cles': ['id_compteur_fk', 'id_temps_fk', 'heure_mesure'],
+        'index_cles': 'idx_fait_conso_cle',
+        'colonnes': ['id_temps_fk', 'id_batiment_fk', 'id_region_fk', 'id_type_energie_fk',
+                     'id_compteur_fk', 'consommation', 'heure_mesure', 'temperature_moyenne'],
+    },
+    'rentabilite': {
+        'table': 'fait_rentabilite',
+        'id': 'id_rentabilite',
+        'cles': ['id_facture'],
+        'index_cles': 'idx_fait_rent_facture',
+        'colonnes': ['id_temps_fk', 'id_client_fk', 'id_batiment_fk', 'id_region_fk',
+                     'id_type_energie_fk', 'id_contrat_fk', 'id_statut_paiement_fk',
+                     'id_facture', 'montant_ht', 'tva', 'montant_ttc', 'cout_energie',
+                     'consommation', 'marge', 'periode_debut', 'periode_fin', 'date_echeance'],
+    },
+}
+
+
+def normaliser_cle(valeur):
+    """Clé de comparaison équivalente à utf8mb4_unicode_ci: sans accents, casse ni espaces de bord"""
+    texte = unicodedata.normalize('NFKD', str(valeur).strip())
+    return ''.join(c for c in texte if not unicodedata.combining(c)).casefold()
+
+
+class CacheDimensions:
+    """Dimensions du DW en mémoire: clé naturelle normalisée -> clé de substitution (+ attributs)
+
+    Chaque dimension n'est lue qu'une fois par exécution, même si plusieurs faits
+    l'utilisent. Les clés absentes sont comptées par dimension dans `manquants`.
+    Si dim_temps a été chargée par calendrier.py (id_temps contigus depuis une
+    origine), id_temps est calculé depuis la date au lieu d'être recherché.
+    """
+
+    def __init__(self):
+        self.tables = {}
+        self.calendrier = None
+        self.manquants = Counter()
+
+    def ajouter(self, recherche, lignes):
+        """Remplit une recherche à partir de tuples (clé naturelle, *valeurs)"""
+        table = {}
+        for cle, *valeurs in lignes:
+            table.setdefault(normaliser_cle(cle), tuple(valeurs))
+        self.tables[recherche] = table
+        return len(table)
+
+    def precharger(self, connexion, recherches):
+        """Une requête par dimension non encore chargée; retourne le nombre de requêtes"""
+        a_charger = [r for r in recherches if r not in self.tables
+                     and not (r == 'dim_temps' and self.calendrier)]
+        curseur = connexion.cursor()
+        for recherche in a_charger:
+            if recherche == 'dim_temps':
+                etat = etat_calendrier(connexion)
+                if etat and etat['origine'] and etat['contigu']:
+                    self.calendrier = etat
+                    print(f"   ✓ dim_temps: id_temps calculé ({etat['debut']} au {etat['fin']}, "
+                          f"origine {etat['origine']})")
+                    continue
+            curseur.execute(RECHERCHES[recherche][0])
+            nb_cles = self.ajouter(recherche, curseur.fetchall())
+            print(f"   ✓ {recherche}: {nb_cles} clés en mémoire")
+        curseur.close()
+        return len(a_charger)
+
+    def resoudre(self, recherche, serie):
+        """Valeurs de la dimension pour chaque ligne, et masque des clés introuvables
+
+        Une valeur NaN (clé amont déjà introuvable) n'est pas recomptée comme manquante.
+        """
+        if recherche == 'dim_temps' and self.calendrier:
+            return self._resoudre_dates(serie)
+        colonnes = RECHERCHES[recherche][1]
+        table = self.tables[recherche]
+        codes, distinctes = pd.factorize(pd.Series(serie, dtype=object))
+        vide = (None,) * len(colonnes)
+        valeurs = [table.get(normaliser_cle(v), vide) for v in distinctes] + [vide]
+        resultat = pd.DataFrame(valeurs, columns=colonnes, dtype=object).iloc[codes]
+        resultat.index = serie.index
+        manque = pd.Series(codes >= 0, index=serie.index) & resultat[colonnes[0]].isna()
+        if manque.any():
+            self.manquants[recherche] += int(manque.sum())
+        return resultat, manque
+
+    def _resoudre_dates(self, serie):
+        """id_temps arithmétique des dates AAAA-MM-JJ du calendrier (calcul par valeur distincte)"""
+        codes, distinctes = pd.factorize(pd.Series(serie, dtype=object))
+        dates = pd.to_datetime(pd.Series(distinctes, dtype=object), format='%Y-%m-%d',
+                               errors='coerce')
+        valide = ((dates >= pd.Timestamp(self.calendrier['debut']))
+                  & (dates <= pd.Timestamp(self.calendrier['fin']))).values
+        ids = np.full(len(distinctes) + 1, None, dtype=object)
+        ids[:-1][valide] = id_temps(dates[valide], self.calendrier['origine'])
+        resultat = pd.DataFrame({'id_temps': ids[codes]}, index=serie.index)
+        manque = pd.Series((codes >= 0) & ~np.append(valide, True)[codes], index=serie.index)
+        if manque.any():
+            self.manquants['dim_temps'] += int(manque.sum())
+        return resultat, manque
+
+
+def separer_rejets(source, faits, manques):
+    """Sépare les faits complets des lignes sources dont au moins une clé est introuvable"""
+    masques = pd.DataFrame(manques)
+    rejete = masques.any(axis=1)
+    rejets = source[rejete].copy()
+    rejets['dimensions_manquantes'] = masques[rejete].apply(
+        lambda ligne: ','.join(ligne.index[ligne]), axis=1
+    ) if rejete.any() else ''
+    return faits[~rejete], rejets
+
+
+# ============================================
+# PRÉPARATION DES FAITS
+# ============================================
+
+def lire_staging(chemin):
+    """Lit un fichier clean_*.csv (séparateur ';', tout en texte)"""
+    return pd.read_csv(chemin, sep=';', quotechar='"', dtype=str, keep_default_na=False)
+
+
+def preparer_consommation(conso, temperatures, cache):
+    """Règles de tr_load_fact_consommation.ktr; retourne (faits, rejets)"""
+    # Fusion - Info Météo: StreamLookup (id_region, date_mesure) -> temperature_moyenne
+    meteo = temperatures[['id_region', 'date_mesure', 'temperature_moyenne']].drop_duplicates(
+        ['id_region', 'date_mesure'], keep='last'
+    )
+    temperature = conso[['id_region', 'date_mesure']].merge(
+        meteo, how='left', on=['id_region', 'date_mesure']
+    )['temperature_moyenne'].values
+
+    faits = pd.DataFrame(index=conso.index)
+    manques = {}
+    for colonne, recherche, source in [
+        ('id_region_fk', 'dim_region', 'id_region'),
+        ('id_batiment_fk', 'dim_batiment', 'id_batiment'),
+        ('id_compteur_fk', 'dim_compteur', 'compteur_id'),
+        ('id_type_energie_fk', 'dim_type_energie', 'type_energie'),
+        ('id_temps_fk', 'dim_temps', 'date_mesure'),
+    ]:
+        valeurs, manques[recherche] = cache.resoudre(recherche, conso[source])
+        faits[colonne] = valeurs.iloc[:, 0]
+
+    faits['consommation'] = pd.to_numeric(conso['consommation'], errors='coerce')
+    faits['heure_mesure'] = pd.to_numeric(conso['heure_mesure'], errors='coerce')
+    faits['temperature_moyenne'] = pd.to_numeric(pd.Series(temperature, index=conso.index),
+                                                 errors='coerce')
+    manques['mesure'] = faits['consommation'].isna() | faits['heure_mesure'].isna()
+    return separer_rejets(conso, faits, manques)
+
+
+def preparer_rentabilite(factures, cache):
+    """Règles de tr_load_fait_rentabilite.ktr; retourne (faits, rejets)
+
+    Lookup_compteur lit la table OLTP compteurs: dim_compteur porte les mêmes
+    attributs (id_batiment, id_type_energie) et évite une seconde connexion.
+    """
+    faits = pd.DataFrame(index=factures.index)
+    manques = {}
+
+    compteurs, manques['dim_compteur'] = cache.resoudre('dim_compteur', factures['id_compteur'])
+    batiments, manques['dim_batiment'] = cache.resoudre('dim_batiment', compteurs['id_batiment'])
+    for colonne, recherche, source in [
+        ('id_temps_fk', 'dim_temps', factures['date_emission'].str[:10].str.replace('/', '-')),
+        ('id_client_fk', 'dim_client', factures['id_client']),
+        ('id_batiment_fk', None, batiments['id_batiment_sk']),
+        ('id_region_fk', 'dim_region', batiments['id_region']),
+        ('id_type_energie_fk', 'dim_type_energie_id', compteurs['id_type_energie']),
+        ('id_contrat_fk', 'dim_contrat', factures['id_contrat']),
+        ('id_statut_paiement_fk', 'dim_statut_paiement', factures['statut_paiement']),
+    ]:
+        if recherche is None:
+            faits[colonne] = source
+            continue
+        valeurs, manques[recherche] = cache.resoudre(recherche, source)
+        faits[colonne] = valeurs.iloc[:, 0]
+
+    faits['id_facture'] = factures['id_facture']
+    for colonne in ['montant_ht', 'tva', 'montant_ttc', 'cout_energie', 'consommation']:
+        faits[colonne] = pd.to_numeric(factures[colonne], errors='coerce')
+    # Calcul_marge
+    faits['marge'] = faits['montant_ttc'] - faits['cout_energie']
+    for colonne in ['periode_debut', 'periode_fin', 'date_echeance']:
+        faits[colonne] = pd.to_datetime(factures[colonne], format='%Y/%m/%d %H:%M:%S.%f',
+                                        errors='coerce').dt.strftime('%Y-%m-%d')
+    manques['mesure'] = faits[['montant_ht', 'tva', 'montant_ttc', 'cout_energie',
+                               'consommation']].isna().any(axis=1)
+    return separer_rejets(factures, faits, manques)
+
+
+# ============================================
+# CHARGEMENT
+# ============================================
+
+def tuples_sql(faits, colonnes):
+    """Lignes du DataFrame en tuples de types Python (NaN -> NULL)"""
+    valeurs = [faits[c].astype(object).where(faits[c].notna(), None).tolist() for c in colonnes]
+    return list(zip(*valeurs))
+
+
+def est_entiere(colonne):
+    """Clés étrangères et heure de mesure: entières dans le DW (comparées telles quelles)"""
+    return colonne.endswith('_fk') or colonne == 'heure_mesure'
+
+
+def cle_comparable(valeurs, texte):
+    """Seules les clés texte (id_facture) passent par normaliser_cle"""
+    if not any(texte):
+        return tuple(valeurs)
+    return tuple(normaliser_cle(v) if t else v for v, t in zip(valeurs, texte))
+
+
+def cles_existantes(curseur, definition, table, faits, taille_lot=1000):
+    """Clés déjà chargées -> identifiant, recherchées par clé métier
+
+    Une requête par paquet de `taille_lot` clés du lot (id_facture, ou compteur,
+    jour et heure), lue par idx_fait_rent_facture / idx_fait_conso_cle: le nombre
+    de requêtes et de lignes lues suit le nombre de faits chargés, pas la taille de
+    la table. Une facture dont la date d'émission a été corrigée est retrouvée malgré
+    son nouvel id_temps_fk, et mise à jour au lieu d'être insérée une seconde fois.
+    """
+    cles = definition['cles']
+    texte = [not est_entiere(c) for c in cles]
+    valeurs = tuples_sql(faits, cles)
+    colonnes = cles[0] if len(cles) == 1 else f"({', '.join(cles)})"
+    marque = '%s' if len(cles) == 1 else f"({', '.join(['%s'] * len(cles))})"
+    existants = {}
+    for debut in range(0, len(valeurs), taille_lot):
+        paquet = valeurs[debut:debut + taille_lot]
+        curseur.execute(f"SELECT {', '.join(cles)}, {definition['id']} FROM {table} "
+                        f"WHERE {colonnes} IN ({', '.join([marque] * len(paquet))})",
+                        [v for cle in paquet for v in cle])
+        for ligne in curseur.fetchall():
+            existants.setdefault(cle_comparable(ligne[:-1], texte), ligne[-1])
+    return existants
+
+
+def repartir(faits, definition, existants):
+    """Sépare les lignes à insérer de celles à mettre à jour (identifiant ajouté en fin de tuple)"""
+    texte = [not est_entiere(c) for c in definition['cles']]
+    nouveaux, mises_a_jour = [], []
+    for ligne, cle in zip(tuples_sql(faits, definition['colonnes']),
+                          tuples_sql(faits, definition['cles'])):
+        identifiant = existants.get(cle_comparable(cle, texte))
+        if identifiant is None:
+            nouveaux.append(ligne)
+        else:
+            mises_a_jour.append(ligne + (identifiant,))
+    return nouveaux, mises_a_jour
+
+
+def typer_faits(faits, definition):
+    """Dernière ligne de chaque clé, colonnes entières en int64"""
+    faits = faits.drop_duplicates(definition['cles'], keep='last')
+    return faits.astype({c: 'int64' for c in definition['colonnes'] if est_entiere(c)})
+
+
+def charger_faits(connexion, fait, faits, taille_lot=1000, table=None):
+    """InsertUpdate par lots: lecture des clés métier déjà chargées, puis INSERT / UPDATE executemany
+
+    Une clé présente plusieurs fois dans le lot garde sa dernière ligne, comme
+    l'insertion puis la mise à jour successives de l'InsertUpdate Pentaho.
+    `table` remplace la table de faits (table d'échange de partitions.py).
+    """
+    definition = FAITS[fait]
+    table, colonnes = table or definition['table'], definition['colonnes']
+    faits = typer_faits(faits, definition)
+
+    curseur = connexion.cursor()
+    nouveaux, mises_a_jour = repartir(faits, definition,
+                                      cles_existantes(curseur, definition, table, faits, taille_lot))
+
+    requete_insert = (f"INSERT INTO {table} ({', '.join(colonnes)}) "
+                      f"VALUES ({', '.join(['%s'] * len(colonnes))})")
+    requete_update = (f"UPDATE {table} SET {', '.join(f'{c} = %s' for c in colonnes)} "
+                      f"WHERE {definition['id']} = %s")
+    try:
+        for requete, lignes in [(requete_insert, nouveaux), (requete_update, mises_a_jour)]:
+            for debut in range(0, len(lignes), taille_lot):
+                curseur.executemany(requete, lignes[debut:debut + taille_lot])
+                connexion.commit()
+    except Exception:
+        connexion.rollback()
+        raise
+    finally:
+        curseur.close()
+    return len(nouveaux), len(mises_a_jour)
+
+
+def ecrire_rejets(rejets, dossier, fait, horodatage):
+    """Écrit les lignes rejetées avec les dimensions introuvables (';', UTF-8)"""
+    os.makedirs(os.path.join(dossier, 'rejected'), exist_ok=True)
+    chemin = os.path.join(dossier, 'rejected', f"rejets_{FAITS[fait]['table']}_{horodatage}.csv")
+    rejets.to_csv(chemin, sep=';', index=False, encoding='utf-8')
+    return chemin
+
+
+def executer(connexion, fait, cache, dossier, horodatage=None, taille_lot=1000,
+             table=None, periode=None):
+    """Préchargement, résolution, rejets et chargement d'un fait; retourne les statistiques
+
+    `periode` (id_temps min, id_temps max exclu) ne charge que les faits de cet
+    intervalle; les autres sont comptés dans 'hors_periode'.
+    """
+    debut = time.perf_counter()
+    transformed = os.path.join(dossier, 'transformed')
+    if fait == 'consommation':
+        recherches = ['dim_region', 'dim_batiment', 'dim_compteur', 'dim_type_energie', 'dim_temps']
+        cache.precharger(connexion, recherches)
+        source = lire_staging(os.path.join(transformed, 'clean_consommation.csv'))
+        faits, rejets = preparer_consommation(
+            source, lire_staging(os.path.join(transformed, 'clean_temperatures.csv')), cache
+        )
+    else:
+        recherches = ['dim_compteur', 'dim_batiment', 'dim_temps', 'dim_client', 'dim_region',
+                      'dim_type_energie_id', 'dim_contrat', 'dim_statut_paiement']
+        cache.precharger(connexion, recherches)
+        source = lire_staging(os.path.join(transformed, 'clean_factures.csv'))
+        faits, rejets = preparer_rentabilite(source, cache)
+
+    horodatage = horodatage or datetime.now().strftime('%Y%m%d_%H%M%S')
+    fichier_rejets = ecrire_rejets(rejets, dossier, fait, horodatage)
+    nb_faits = len(faits)
+    if periode:
+        id_temps_fk = faits['id_temps_fk'].astype('int64')
+        faits = faits[(id_temps_fk >= periode[0]) & (id_temps_fk < periode[1])]
+    inseres, mis_a_jour = charger_faits(connexion, fait, faits, taille_lot, table)
+    return {'lus': len(source), 'inseres': inseres, 'mis_a_jour': mis_a_jour,
+            'rejetes': len(rejets), 'hors_periode': nb_faits - len(faits),
+            'fichier_rejets': fichier_rejets,
+            'duree_s': time.perf_counter() - debut}
+
+
+# ============================================
+# BENCHMARK
+# ============================================
+
+def dimensions_synthetiques(nb_compteurs, graine=42):
+    """Cache rempli comme un DW à `nb_compteurs` compteurs, sans base MySQL"""
+    rng = np.random.default_rng(graine)
+    cache = CacheDimensions()
+    cache.calendrier = {'debut': date(2022, 1, 1), 'fin': date(2026, 12, 31),
+                        'origine': date(2022, 1, 1), 'contigu': True}
+    cache.ajouter('dim_region', ((f"REG{i:02d}", i) for i in range(1, 9)))
+    nb_batiments = max(nb_compteurs // 3, 1)
+    cache.ajouter('dim_batiment', ((f"BAT{i:03d}", i, f"REG{rng.integers(1, 9):02d}")
+                                   for i in range(1, nb_batiments + 1)))
+    cache.ajouter('dim_type_energie', [('Électricité', 1), ('Eau', 2), ('Gaz', 3)])
+    prefixes = ['ELEC', 'EAU', 'GAZ']
+    cache.ajouter('dim_compteur', ((f"{prefixes[i % 3]}_{i:04d}", i,
+                                    f"BAT{i % nb_batiments + 1:03d}", i % 3 + 1)
+                                   for i in range(1, nb_compteurs + 1)))
+    return cache
+
+
+def consommation_synthetique(nb_lignes, nb_compteurs, graine=42):
+    """clean_consommation.csv aléatoire (~1 % de compteurs inconnus) et ses températures"""
+    rng = np.random.default_rng(graine)
+    nb_batiments = max(nb_compteurs // 3, 1)
+    energies = np.array(['electricite', 'eau', 'gaz'])
+    prefixes = np.array(['ELEC', 'EAU', 'GAZ'])
+    compteurs = rng.integers(1, nb_compteurs + 1, nb_lignes)
+    inconnus = rng.random(nb_lignes) < 0.01
+    compteurs[inconnus] += nb_compteurs
+    dates = pd.date_range('2024-01-01', '2024-12-31').strftime('%Y-%m-%d')
+    date_mesure = dates[rng.integers(0, len(dates), nb_lignes)]
+    regions = np.array([f"REG{i:02d}" for i in range(1, 9)])
+    conso = pd.DataFrame({
+        'id_region': regions[rng.integers(0, 8, nb_lignes)],
+        'id_batiment': [f"BAT{i % nb_batiments + 1:03d}" for i in compteurs],
+        'type_energie': energies[compteurs % 3],
+        'compteur_id': [f"{p}_{i:04d}" for p, i in zip(prefixes[compteurs % 3], compteurs)],
+        'consommation': np.round(rng.uniform(0, 50, nb_lignes), 1).astype(str),
+        'date_mesure': date_mesure,
+        'heure_mesure': rng.integers(0, 24, nb_lignes).astype(str),
+    })
+    temperatures = pd.DataFrame([(r, d, str(rng.integers(-5, 35))) for r in regions for d in dates],
+                                columns=['id_region', 'date_mesure', 'temperature_moyenne'])
+    return conso, temperatures
+
+
+def benchmark(tailles, nb_compteurs=1000):
+    """Débit côté Python (lecture CSV, résolution des clés, répartition INSERT / UPDATE)
+
+    Sans base MySQL: les requêtes (préchargement, SELECT des clés métier,
+    executemany) ne sont pas mesurées. La moitié des faits est supposée déjà chargée.
+    """
+    print(f"{'lignes':>10} {'faits':>10} {'rejets':>8} {'résol. (s)':>10} {'répart. (s)':>11} "
+          f"{'lignes/s':>12} {'requêtes':>9} {'DBLookup':>10}")
+    definition = FAITS['consommation']
+    for nb_lignes in tailles:
+        conso, temperatures = consommation_synthetique(nb_lignes, nb_compteurs)
+        cache = dimensions_synthetiques(nb_compteurs)
+        with tempfile.TemporaryDirectory() as dossier:
+            conso.to_csv(os.path.join(dossier, 'clean_consommation.csv'), sep=';', index=False)
+            debut = time.perf_counter()
+            faits, rejets = preparer_consommation(
+                lire_staging(os.path.join(dossier, 'clean_consommation.csv')), temperatures, cache
+            )
+            resolution = time.perf_counter() - debut
+        faits = typer_faits(faits, definition)
+        existants = {cle: i for i, cle in enumerate(tuples_sql(faits.iloc[::2], definition['cles']))}
+        debut = time.perf_counter()
+        repartir(faits, definition, existants)
+        repartition = time.perf_counter() - debut
+        duree = resolution + repartition
+        # 5 requêtes de préchargement, contre 5 requêtes par ligne pour les DBLookup
+        print(f"{nb_lignes:>10} {len(faits):>10} {len(rejets):>8} {resolution:>10.2f} "
+              f"{repartition:>11.2f} {nb_lignes / duree:>12,.0f} {5:>9} {5 * nb_lignes:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chargement des faits DM1/DM2 (cache des dimensions)")
+    parser.add_argument('action', choices=['consommation', 'rentabilite', 'tous', 'benchmark'])
+    parser.add_argument('--dm1', default=DOSSIER_DM1, help="Dossier staging du DM1")
+    parser.add_argument('--dm2', default=DOSSIER_DM2, help="Dossier staging du DM2")
+    parser.add_argument('--lot', type=int, default=1000, help="Lignes par executemany / commit")
+    parser.add_argument('--agregats', action='store_true',
+                        help="Rafraîchit les agrégats des faits chargés (create_agregats.sql)")
+    parser.add_argument('--tailles', type=int, nargs='+', default=[100000, 1000000],
+                        help="Nombres de lignes du benchmark")
+    args = parser.parse_args()
+
+    if args.action == 'benchmark':
+        benchmark(args.tailles)
+        return
+
+    faits = ['consommation', 'rentabilite'] if args.action == 'tous' else [args.action]
+    dossiers = {'consommation': args.dm1, 'rentabilite': args.dm2}
+    cache = CacheDimensions()
+    horodatage = datetime.now().strftime('%Y%m%d_%H%M%S')
+    connexion = mysql.connector.connect(**DW_CONFIG)
+    try:
+        for fait in faits:
+            print(f"\n📥 {FAITS[fait]['table']}...")
+            stats = executer(connexion, fait, cache, dossiers[fait], horodatage, args.lot)
+            print(f"✓ {stats['lus']} lignes lues: {stats['inseres']} insérées, "
+                  f"{stats['mis_a_jour']} mises à jour, {stats['rejetes']} rejetées "
+                  f"({os.path.basename(stats['fichier_rejets'])}) en {stats['duree_s']:.2f} s")
+            if args.agregats:
+                for nom in agregats_de(FAITS[fait]['table']):
+                    nb_periodes, nb_lignes = rafraichir(connexion, nom)
+                    print(f"   ✓ {nom}: {nb_periodes} périodes recalculées, {nb_lignes} lignes")
+    finally:
+        connexion.close()
+
+    if cache.manquants:
+        print("\n⚠️  Clés introuvables par dimension:")
+        for recherche, nombre in cache.manquants.most_common():
+            print(f"   {recherche:>20}: {nombre}")
+
+
+if __name__ == "__main__":
+    main()
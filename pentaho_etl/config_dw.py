@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+# config_dw.py - Configuration commune des scripts pentaho_etl
+#
+# Seul module qui complète sys.path: la configuration MySQL et le normaliseur de
+# dates viennent de greencity_data_generation/scripts, le nettoyage DM3 de
+# dm3_environnement. Les scripts importent MYSQL_CONFIG / DW_CONFIG d'ici.
+
+import os
+import sys
+
+RACINE = os.path.dirname(os.path.abspath(__file__))
+
+for _dossier in (os.path.join(RACINE, '..', 'greencity_data_generation', 'scripts'),
+                 os.path.join(RACINE, 'dm3_environnement')):
+    _dossier = os.path.normpath(_dossier)
+    if _dossier not in sys.path:
+        sys.path.insert(0, _dossier)
+
+from config import MYSQL_CONFIG  # noqa: E402
+
+DW_CONFIG = dict(MYSQL_CONFIG, database='greencity_dw')
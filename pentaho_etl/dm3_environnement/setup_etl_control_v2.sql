@@ -16,6 +16,8 @@ CREATE TABLE etl_control (
     derniere_extraction DATETIME DEFAULT '1900-01-01 00:00:00' COMMENT 'Date de la dernière extraction réussie',
     nb_lignes_extraites INT DEFAULT 0 COMMENT 'Nombre de lignes extraites lors de la dernière exécution',
     statut VARCHAR(50) DEFAULT 'PENDING' COMMENT 'Statut de la dernière exécution (SUCCESS, FAILED, PENDING, RUNNING)',
+    duree_s DECIMAL(10,2) DEFAULT NULL COMMENT 'Durée de la dernière exécution (secondes)',
+    id_execution VARCHAR(20) DEFAULT NULL COMMENT 'Exécution de l''orchestrateur (AAAAMMJJ_HHMMSS)',
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT 'Date de dernière modification',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT 'Date de création'
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='Table de contrôle ETL';
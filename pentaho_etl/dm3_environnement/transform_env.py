@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+# transform_env.py - Nettoyage DM3 en Python (mêmes règles que 2_transform_env.ktr)
+#
+# Remplace l'étape 2 du pipeline DM3 (run_dm3.sh avec DM3_TRANSFORM=python):
+#   staging/staging_env_raw.csv -> staging/staging_env_clean.csv
+#                                + staging/errors_env_<AAAAMMJJ_HHMMSS>.csv
+# en une seule passe vectorisée (pandas), sans lancer de JVM.
+
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Normaliseur de dates partagé avec les générateurs (chemins: pentaho_etl/config_dw.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import config_dw  # noqa: F401
+from normalisation_dates import NormaliseurDates
+
+DOSSIER_STAGING = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'staging')
+
+# Champs lus par "Read Staging Raw" et écrits par "Output Clean Data" / "Output Errors"
+COLONNES = ['id_region', 'id_batiment', 'date_rapport', 'emission_CO2_kg',
+            'taux_recyclage', 'date_extraction']
+COLONNES_ERREURS = ['id_region', 'id_batiment', 'date_rapport', 'emission_CO2_kg',
+                    'taux_recyclage', 'date_valide', 'date_extraction']
+
+# Masques Pentaho des champs numériques en sortie (#.## et #.####)
+DECIMALES = {'emission_CO2_kg': 2, 'taux_recyclage': 4}
+
+
+def lire_staging(chemin):
+    """Lit le staging brut (séparateur ';', tout en texte, champs absents = vides)"""
+    df = pd.read_csv(chemin, sep=';', quotechar='"', dtype=str, keep_default_na=False)
+    for colonne in COLONNES:
+        if colonne not in df:
+            df[colonne] = ''
+    return df[COLONNES]
+
+
+def parser_dates(dates):
+    """Parse Date Multi-Format: yyyy-MM-dd ou dd/MM/yyyy, sinon invalide (NaT)"""
+    return NormaliseurDates(formats=['aaaa-mm-jj', 'jj/mm/aaaa']).normaliser(dates)
+
+
+def formater_nombres(valeurs, decimales):
+    """Formate comme le masque Pentaho #.##: au plus N décimales, sans zéros inutiles"""
+    return valeurs.map(
+        lambda v: '' if v != v else f"{v:.{decimales}f}".rstrip('0').rstrip('.')
+    )
+
+
+def nettoyer(brut):
+    """Applique les règles de 2_transform_env.ktr; retourne (lignes propres, lignes en erreur)"""
+    # Trim Fields
+    df = brut.apply(lambda colonne: colonne.str.strip())
+
+    # Parse Date Multi-Format + Convert Types
+    dates = parser_dates(df['date_rapport'])
+    emission = pd.to_numeric(df['emission_CO2_kg'], errors='coerce')
+    taux = pd.to_numeric(df['taux_recyclage'], errors='coerce')
+
+    # Filter Invalid Rows: date valide, émission >= 0, 0 <= taux <= 1 (NULL rejetés)
+    valide = (dates.notna()
+              & emission.notna() & (emission >= 0)
+              & taux.notna() & (taux >= 0) & (taux <= 1))
+
+    sortie = pd.DataFrame({
+        'id_region': df['id_region'],
+        'id_batiment': df['id_batiment'],
+        'date_rapport': dates.dt.strftime('%Y-%m-%d').fillna(''),
+        'emission_CO2_kg': formater_nombres(emission, DECIMALES['emission_CO2_kg']),
+        'taux_recyclage': formater_nombres(taux, DECIMALES['taux_recyclage']),
+        'date_valide': np.where(dates.notna(), 'Y', 'N'),
+        'date_extraction': df['date_extraction'],
+    })
+
+    # Sort by Key + Remove Duplicates: clé composite, région/bâtiment sans casse
+    propres = sortie[valide]
+    cle = pd.DataFrame({
+        'id_region': propres['id_region'].str.lower(),
+        'id_batiment': propres['id_batiment'].str.lower(),
+        'date_rapport': propres['date_rapport'],
+    })
+    cle = cle.sort_values(list(cle.columns), kind='stable')
+    cle = cle[~cle.duplicated()]
+    propres = propres.loc[cle.index, COLONNES]
+
+    erreurs = sortie.loc[~valide, COLONNES_ERREURS]
+    return propres, erreurs
+
+
+def ecrire_staging(df, chemin):
+    """Écrit comme TextFileOutput: ';', en-tête, fins de ligne DOS, UTF-8"""
+    df.to_csv(chemin, sep=';', index=False, lineterminator='\r\n', encoding='utf-8')
+
+
+def transformer(dossier=DOSSIER_STAGING, horodatage=None):
+    """Étape 2 du pipeline DM3: retourne (nb lignes propres, nb erreurs, fichier d'erreurs)"""
+    brut = lire_staging(os.path.join(dossier, 'staging_env_raw.csv'))
+    propres, erreurs = nettoyer(brut)
+
+    horodatage = horodatage or datetime.now().strftime('%Y%m%d_%H%M%S')
+    fichier_erreurs = os.path.join(dossier, f"errors_env_{horodatage}.csv")
+    ecrire_staging(propres, os.path.join(dossier, 'staging_env_clean.csv'))
+    ecrire_staging(erreurs, fichier_erreurs)
+    return len(propres), len(erreurs), fichier_erreurs
+
+
+# ============================================
+# PARITÉ AVEC LA TRANSFORMATION PENTAHO
+# ============================================
+
+def verifier(dossier=DOSSIER_STAGING):
+    """Rejoue le staging brut et compare aux sorties Pentaho présentes dans le dossier"""
+    brut = lire_staging(os.path.join(dossier, 'staging_env_raw.csv'))
+    propres, erreurs = nettoyer(brut)
+
+    fichiers_erreurs = sorted(glob.glob(os.path.join(dossier, 'errors_env_*.csv')))
+    references = [('staging_env_clean.csv', propres, os.path.join(dossier, 'staging_env_clean.csv'))]
+    if fichiers_erreurs:
+        # Le plus récent correspond au dernier staging brut
+        references.append((os.path.basename(fichiers_erreurs[-1]), erreurs, fichiers_erreurs[-1]))
+
+    identiques = True
+    with tempfile.TemporaryDirectory() as dossier_temp:
+        for nom, df, reference in references:
+            chemin = os.path.join(dossier_temp, nom)
+            ecrire_staging(df, chemin)
+            with open(chemin, 'rb') as f_python, open(reference, 'rb') as f_pentaho:
+                identique = f_python.read() == f_pentaho.read()
+            identiques &= identique
+            print(f"   {'✓' if identique else '✗'} {nom}: {len(df)} lignes "
+                  f"{'identiques' if identique else 'DIFFÉRENTES'} à la sortie Pentaho")
+    return identiques
+
+
+# ============================================
+# BENCHMARK
+# ============================================
+
+def staging_synthetique(nb_lignes, graine=42):
+    """Staging brut aléatoire avec les défauts des rapports CSV (espaces, dates, valeurs)"""
+    rng = np.random.default_rng(graine)
+    fins_de_mois = pd.date_range('2024-01-31', periods=13, freq='ME')
+    dates = fins_de_mois[rng.integers(0, len(fins_de_mois), nb_lignes)]
+
+    id_batiment = pd.Series([f"BAT{i:03d}" for i in rng.integers(1, 500, nb_lignes)])
+    espaces = rng.random(nb_lignes) < 0.03
+    id_batiment[espaces] = '  ' + id_batiment[espaces] + '  '
+
+    date_rapport = pd.Series(dates.strftime('%d/%m/%Y'))
+    iso = rng.random(nb_lignes) < 0.98
+    date_rapport[iso] = dates[iso].strftime('%Y-%m-%d')
+
+    emission = np.round(rng.uniform(100, 6000, nb_lignes), 2)
+    emission[rng.random(nb_lignes) < 0.01] *= -1
+    taux = np.round(rng.uniform(0.45, 0.85, nb_lignes), 2)
+    taux[rng.random(nb_lignes) < 0.01] += 1
+    emission_texte = pd.Series(emission).astype(str)
+    emission_texte[rng.random(nb_lignes) < 0.02] = ''
+
+    return pd.DataFrame({
+        'id_region': [f"REG{i:02d}" for i in rng.integers(1, 9, nb_lignes)],
+        'id_batiment': id_batiment,
+        'date_rapport': date_rapport,
+        'emission_CO2_kg': emission_texte,
+        'taux_recyclage': pd.Series(taux).astype(str),
+    })
+
+
+def benchmark(tailles):
+    """Débit lecture + nettoyage + écriture sur des staging bruts synthétiques"""
+    print(f"{'lignes':>10} {'propres':>10} {'erreurs':>9} {'durée (s)':>10} {'lignes/s':>12}")
+    for nb_lignes in tailles:
+        with tempfile.TemporaryDirectory() as dossier:
+            staging_synthetique(nb_lignes).to_csv(
+                os.path.join(dossier, 'staging_env_raw.csv'), sep=';', index=False
+            )
+            debut = time.perf_counter()
+            nb_propres, nb_erreurs, _ = transformer(dossier)
+            duree = time.perf_counter() - debut
+        print(f"{nb_lignes:>10} {nb_propres:>10} {nb_erreurs:>9} {duree:>10.2f} "
+              f"{nb_lignes / duree:>12,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nettoyage DM3 environnement (étape 2)")
+    parser.add_argument('action', nargs='?', default='nettoyer',
+                        choices=['nettoyer', 'verifier', 'benchmark'])
+    parser.add_argument('--staging', default=DOSSIER_STAGING,
+                        help="Dossier contenant staging_env_raw.csv")
+    parser.add_argument('--tailles', type=int, nargs='+', default=[100000, 1000000],
+                        help="Nombres de lignes du benchmark")
+    args = parser.parse_args()
+
+    if args.action == 'verifier':
+        print("🔎 Parité avec la transformation Pentaho...")
+        sys.exit(0 if verifier(args.staging) else 1)
+    elif args.action == 'benchmark':
+        benchmark(args.tailles)
+    else:
+        debut = time.perf_counter()
+        nb_propres, nb_erreurs, fichier_erreurs = transformer(args.staging)
+        print(f"✓ {nb_propres} lignes propres, {nb_erreurs} erreurs ({os.path.basename(fichier_erreurs)}) "
+              f"en {time.perf_counter() - debut:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,455 @@
+# -*- coding: utf-8 -*-
+# orchestrateur.py - Exécution du DAG extract -> clean -> load des trois data marts
+#
+# Remplace les jobs Kitchen (job_etl_dm1_consommation.kjb, JOB_DM_Rentabilite_COMPLET.kjb)
+# et run_dm3.sh, qui enchaînent toutes les transformations l'une après l'autre:
+#   - chaque étape ne dépend que des fichiers staging / tables qu'elle lit
+#   - les branches indépendantes (extractions, DM1 / DM2 / DM3) tournent en parallèle
+#     dans un pool borné (--workers)
+#   - les étapes portées en Python (transform_env, calendrier, charger_faits, agregats)
+#     s'exécutent dans le processus, sans JVM; les autres via pan.sh
+#   - durée et lignes de chaque étape dans etl_control (nom_source = 'etape:<étape>')
+#   - --reprendre relance la dernière exécution à partir des étapes échouées
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, datetime
+
+import mysql.connector
+
+from config_dw import DW_CONFIG, RACINE
+
+from agregats import agregats_de, rafraichir
+from calendrier import (ORIGINE, charger_calendrier, etat_calendrier, generer_calendrier,
+                        lire_feries)
+from charger_faits import DOSSIER_DM1, DOSSIER_DM2, FAITS, CacheDimensions, executer
+from transform_env import DOSSIER_STAGING as DOSSIER_DM3_STAGING, transformer
+
+
+TRANSFORMATIONS_DM1 = os.path.join(RACINE, 'dm1_consommation_energetique', 'pentaho', 'transformations')
+TRANSFORMATIONS_DM2 = os.path.join(RACINE, 'dm2_Rentabilite', 'pentaho', 'transformations')
+DOSSIER_DM3 = os.path.join(RACINE, 'dm3_environnement')
+FICHIER_LAST_RUN = os.path.join(DOSSIER_DM3, '.last_run')
+DOSSIER_LOGS = os.path.join(RACINE, 'logs')
+FICHIER_ETAT = os.path.join(DOSSIER_LOGS, 'orchestrateur_etat.json')
+
+# Dernière date de dim_temps garantie avant le chargement des faits
+FIN_CALENDRIER = '2030-12-31'
+
+# Colonnes ajoutées à etl_control (setup_etl_control_v2.sql) pour le suivi des étapes
+COLONNES_CONTROLE = {
+    'duree_s': "DECIMAL(10,2) DEFAULT NULL COMMENT 'Durée de la dernière exécution (secondes)'",
+    'id_execution': "VARCHAR(20) DEFAULT NULL COMMENT 'Exécution de l''orchestrateur (AAAAMMJJ_HHMMSS)'",
+}
+
+
+# ============================================
+# ÉTAPES PENTAHO
+# ============================================
+
+def commande_pan():
+    """pan.sh (pan.bat sous Windows) de $PENTAHO_HOME"""
+    pentaho = os.environ.get('PENTAHO_HOME')
+    if not pentaho:
+        raise RuntimeError("PENTAHO_HOME non défini: impossible de lancer les transformations .ktr")
+    return os.path.join(pentaho, 'pan.bat' if os.name == 'nt' else 'pan.sh')
+
+
+def lancer_pan(nom, transformation, contexte, parametres=None):
+    """Lance une transformation; retourne les lignes écrites par son step le plus actif (W=)
+
+    La sortie complète est gardée dans logs/<exécution>/<étape>.log.
+    """
+    commande = [commande_pan(), f'-file={transformation}', '-level=Basic']
+    commande += [f'-param:{cle}={valeur}' for cle, valeur in (parametres or {}).items()]
+    resultat = subprocess.run(commande, capture_output=True, text=True)
+
+    dossier_log = os.path.join(DOSSIER_LOGS, contexte['execution'])
+    os.makedirs(dossier_log, exist_ok=True)
+    with open(os.path.join(dossier_log, f"{nom}.log"), 'w', encoding='utf-8') as f:
+        f.write(resultat.stdout + resultat.stderr)
+    if resultat.returncode != 0:
+        erreurs = [l for l in (resultat.stdout + resultat.stderr).splitlines() if 'ERROR' in l]
+        raise RuntimeError(f"pan.sh a échoué (code {resultat.returncode}): "
+                           f"{erreurs[-1].strip() if erreurs else os.path.basename(transformation)}")
+    ecrites = [int(w) for w in re.findall(r'\bW=(\d+)', resultat.stdout)]
+    return max(ecrites, default=0)
+
+
+def pan(transformation):
+    """Action d'une étape qui exécute une transformation .ktr"""
+    def action(nom, contexte):
+        return lancer_pan(nom, transformation, contexte)
+    return action
+
+
+# ============================================
+# ÉTAPES PYTHON
+# ============================================
+
+def connecter():
+    """Une connexion par étape: les connexions MySQL ne se partagent pas entre threads"""
+    return mysql.connector.connect(**DW_CONFIG)
+
+
+def etape_calendrier(nom, contexte):
+    """dim_temps complète jusqu'à FIN_CALENDRIER (rien à faire si déjà couverte)"""
+    connexion = connecter()
+    try:
+        etat = etat_calendrier(connexion)
+        if etat and etat['contigu'] and str(etat['fin']) >= FIN_CALENDRIER:
+            return 0
+        origine = etat['origine'] if etat and etat['origine'] else ORIGINE
+        calendrier = generer_calendrier(origine, FIN_CALENDRIER, origine, *lire_feries())
+        return charger_calendrier(connexion, calendrier, origine)
+    finally:
+        connexion.close()
+
+
+def charger(fait, dossier):
+    """Action d'une étape qui charge un fait avec charger_faits.executer"""
+    def action(nom, contexte):
+        connexion = connecter()
+        try:
+            stats = executer(connexion, fait, CacheDimensions(), dossier,
+                             contexte['execution'], contexte['lot'])
+        finally:
+            connexion.close()
+        if stats['rejetes']:
+            print(f"   ⚠️  {nom}: {stats['rejetes']} lignes rejetées "
+                  f"({os.path.basename(stats['fichier_rejets'])})")
+        return stats['inseres'] + stats['mis_a_jour']
+    return action
+
+
+def rafraichir_agregats(table):
+    """Action d'une étape qui rafraîchit les agrégats alimentés par `table`"""
+    def action(nom, contexte):
+        connexion = connecter()
+        try:
+            return sum(rafraichir(connexion, agregat)[1] for agregat in agregats_de(table))
+        finally:
+            connexion.close()
+    return action
+
+
+def etape_transform_dm3(nom, contexte):
+    """Étape 2 du DM3 (mêmes règles que 2_transform_env.ktr, voir transform_env.py)"""
+    nb_propres, nb_erreurs, _ = transformer(DOSSIER_DM3_STAGING, contexte['execution'])
+    if nb_erreurs:
+        print(f"   ⚠️  {nom}: {nb_erreurs} lignes en erreur")
+    return nb_propres
+
+
+def etape_load_dm3(nom, contexte):
+    """3_load_dm3.ktr depuis la dernière exécution, puis mise à jour de .last_run (run_dm3.sh)"""
+    derniere = '1900-01-01'
+    if os.path.exists(FICHIER_LAST_RUN):
+        with open(FICHIER_LAST_RUN, encoding='utf-8') as f:
+            derniere = f.read().strip() or derniere
+    nb_lignes = lancer_pan(nom, os.path.join(DOSSIER_DM3, '3_load_dm3.ktr'), contexte,
+                           {'LAST_RUN_DATE': derniere})
+    with open(FICHIER_LAST_RUN, 'w', encoding='utf-8') as f:
+        f.write(date.today().isoformat() + '\n')
+    return nb_lignes
+
+
+# ============================================
+# DAG
+# ============================================
+
+# Étape -> data mart, dépendances et action(nom, contexte) -> nombre de lignes.
+# Les chargements de dimensions DM1 puis DM2 sont sérialisés: ils écrivent dans les
+# mêmes tables (dim_region, dim_batiment, dim_type_energie).
+ETAPES = {
+    'commun.dim_temps': {'dm': 'commun', 'apres': [], 'action': etape_calendrier},
+}
+
+for _source, _extract, _clean in [
+    ('regions', 'tr_extract_regions.ktr', 'tr_clean_regions.ktr'),
+    ('batiments', 'tr_extract_batiments.ktr', 'tr_clean_batiments.ktr'),
+    ('compteurs', 'tr_extract_compteurs.ktr', 'tr_clean_compteurs.ktr'),
+    ('types_energie', 'tr_extract_types_energie.ktr', 'tr_clean_types_energie.ktr'),
+    ('temperatures', 'tr_extract_temperatures.ktr', 'tr_clean_temperatures.ktr'),
+    ('consommation', 'tr_extract_json_consommation.ktr', 'tr_clean_consommation.ktr'),
+]:
+    ETAPES[f'dm1.extract_{_source}'] = {
+        'dm': 'dm1', 'apres': [], 'action': pan(os.path.join(TRANSFORMATIONS_DM1, _extract))}
+    ETAPES[f'dm1.clean_{_source}'] = {
+        'dm': 'dm1', 'apres': [f'dm1.extract_{_source}'],
+        'action': pan(os.path.join(TRANSFORMATIONS_DM1, _clean))}
+
+ETAPES.update({
+    'dm1.load_dimensions': {
+        'dm': 'dm1',
+        'apres': ['dm1.clean_regions', 'dm1.clean_batiments', 'dm1.clean_compteurs',
+                  'dm1.clean_types_energie'],
+        'action': pan(os.path.join(TRANSFORMATIONS_DM1, 'tr_load_dim_dm1.ktr')),
+    },
+    'dm1.load_fait_consommation': {
+        'dm': 'dm1',
+        'apres': ['dm1.load_dimensions', 'dm1.clean_consommation', 'dm1.clean_temperatures',
+                  'commun.dim_temps'],
+        'action': charger('consommation', DOSSIER_DM1),
+    },
+    'dm1.agregats': {
+        'dm': 'dm1', 'apres': ['dm1.load_fait_consommation'],
+        'action': rafraichir_agregats(FAITS['consommation']['table']),
+    },
+})
+
+for _source, _extract, _clean in [
+    ('clients', 'tr_extract_clients.ktr', 'tr_clean_dim_client .ktr'),
+    ('contrat', 'tr_extract_contrat.ktr', 'tr_clean_dim_contrat .ktr'),
+    ('batiments', 'tr_extract_batiments.ktr', 'tr_clean_batiments.ktr'),
+    ('regions', 'tr_extract_regions.ktr', 'tr_clean_regions.ktr'),
+    ('types_energie', 'tr_extract_types_energie.ktr', 'tr_clean_types_energie.ktr'),
+    ('factures', 'tr_extract_fait_rentabilite.ktr', 'tr_clean_fait_rentabilite.ktr'),
+    ('paiements', 'tr_extract_fait_paiement .ktr', 'tr_clean_fait_paiement.ktr'),
+]:
+    ETAPES[f'dm2.extract_{_source}'] = {
+        'dm': 'dm2', 'apres': [], 'action': pan(os.path.join(TRANSFORMATIONS_DM2, _extract))}
+    ETAPES[f'dm2.clean_{_source}'] = {
+        'dm': 'dm2', 'apres': [f'dm2.extract_{_source}'],
+        'action': pan(os.path.join(TRANSFORMATIONS_DM2, _clean))}
+
+ETAPES.update({
+    'dm2.load_dimensions': {
+        'dm': 'dm2',
+        'apres': ['dm2.clean_clients', 'dm2.clean_contrat', 'dm2.clean_batiments',
+                  'dm2.clean_regions', 'dm2.clean_types_energie', 'dm1.load_dimensions'],
+        'action': pan(os.path.join(TRANSFORMATIONS_DM2, 'tr_load_dim_dm1.ktr')),
+    },
+    'dm2.load_fait_rentabilite': {
+        'dm': 'dm2',
+        'apres': ['dm2.load_dimensions', 'dm2.clean_factures', 'commun.dim_temps'],
+        'action': charger('rentabilite', DOSSIER_DM2),
+    },
+    'dm2.load_fait_paiement': {
+        'dm': 'dm2',
+        'apres': ['dm2.load_dimensions', 'dm2.clean_paiements', 'commun.dim_temps'],
+        'action': pan(os.path.join(TRANSFORMATIONS_DM2, 'tr_load_fait_paiement.ktr')),
+    },
+    'dm2.agregats': {
+        'dm': 'dm2', 'apres': ['dm2.load_fait_rentabilite'],
+        'action': rafraichir_agregats(FAITS['rentabilite']['table']),
+    },
+    'dm3.extract': {
+        'dm': 'dm3', 'apres': [], 'action': pan(os.path.join(DOSSIER_DM3, '1_extract_csv.ktr')),
+    },
+    'dm3.transform': {'dm': 'dm3', 'apres': ['dm3.extract'], 'action': etape_transform_dm3},
+    'dm3.load': {
+        'dm': 'dm3', 'apres': ['dm3.transform', 'commun.dim_temps', 'dm1.load_dimensions'],
+        'action': etape_load_dm3,
+    },
+    'dm3.agregats': {
+        'dm': 'dm3', 'apres': ['dm3.load'], 'action': rafraichir_agregats('fait_environnement'),
+    },
+})
+
+
+def graphe(data_marts):
+    """Étapes des data marts choisis -> dépendances parmi ces étapes
+
+    Une dépendance vers un data mart non sélectionné est considérée satisfaite.
+    """
+    retenues = {nom for nom, etape in ETAPES.items() if etape['dm'] in data_marts}
+    return {nom: set(ETAPES[nom]['apres']) & retenues for nom in ETAPES if nom in retenues}
+
+
+def vagues(dependances):
+    """Étapes regroupées par niveau: chaque vague ne dépend que des précédentes"""
+    restantes = {nom: set(avant) for nom, avant in dependances.items()}
+    resultat = []
+    while restantes:
+        pretes = sorted(nom for nom, avant in restantes.items() if not avant)
+        if not pretes:
+            raise ValueError(f"Dépendances circulaires: {', '.join(sorted(restantes))}")
+        resultat.append(pretes)
+        for nom in pretes:
+            del restantes[nom]
+        for avant in restantes.values():
+            avant.difference_update(pretes)
+    return resultat
+
+
+def ordonnancer(dependances, workers, lancer, demarrer, terminer, deja_faites=()):
+    """Lance chaque étape dès que ses dépendances ont réussi, au plus `workers` à la fois
+
+    `lancer(nom)` s'exécute dans le pool; `demarrer(nom)` et `terminer(nom, resultat,
+    erreur)` dans le thread appelant. Une étape en échec bloque ses descendantes;
+    les branches indépendantes continuent. Retourne {étape: statut}.
+    """
+    statuts = {nom: 'SUCCESS' for nom in deja_faites if nom in dependances}
+    en_cours = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            for nom, avant in dependances.items():
+                if nom in statuts or nom in en_cours.values() or len(en_cours) >= workers:
+                    continue
+                if any(statuts.get(a) in ('FAILED', 'BLOQUEE') for a in avant):
+                    statuts[nom] = 'BLOQUEE'
+                elif all(statuts.get(a) == 'SUCCESS' for a in avant):
+                    demarrer(nom)
+                    en_cours[pool.submit(lancer, nom)] = nom
+            if not en_cours:
+                break
+            finies, _ = wait(en_cours, return_when=FIRST_COMPLETED)
+            for futur in finies:
+                nom = en_cours.pop(futur)
+                erreur = futur.exception()
+                statuts[nom] = 'FAILED' if erreur else 'SUCCESS'
+                terminer(nom, None if erreur else futur.result(), erreur)
+    # Descendantes d'une étape bloquée restées sans statut au dernier passage
+    return {nom: statuts.get(nom, 'BLOQUEE') for nom in dependances}
+
+
+# ============================================
+# SUIVI (etl_control, reprise)
+# ============================================
+
+def preparer_controle(connexion):
+    """Ajoute à etl_control les colonnes de suivi des étapes si elles manquent"""
+    curseur = connexion.cursor()
+    curseur.execute("SELECT COLUMN_NAME FROM information_schema.COLUMNS "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'etl_control'")
+    existantes = {ligne[0] for ligne in curseur.fetchall()}
+    for colonne, definition in COLONNES_CONTROLE.items():
+        if colonne not in existantes:
+            curseur.execute(f"ALTER TABLE etl_control ADD COLUMN {colonne} {definition}")
+    curseur.close()
+
+
+def ecrire_controle(connexion, nom, execution, debut, statut, nb_lignes=0, duree=None):
+    """Ligne 'etape:<nom>' de etl_control (RUNNING au lancement, puis SUCCESS / FAILED)"""
+    curseur = connexion.cursor()
+    curseur.execute(
+        "INSERT INTO etl_control (nom_source, derniere_extraction, nb_lignes_extraites, statut, "
+        "duree_s, id_execution) VALUES (%s, %s, %s, %s, %s, %s) ON DUPLICATE KEY UPDATE "
+        "derniere_extraction = VALUES(derniere_extraction), "
+        "nb_lignes_extraites = VALUES(nb_lignes_extraites), statut = VALUES(statut), "
+        "duree_s = VALUES(duree_s), id_execution = VALUES(id_execution)",
+        (f"etape:{nom}", debut, nb_lignes, statut, duree, execution)
+    )
+    connexion.commit()
+    curseur.close()
+
+
+def lire_etat(chemin=FICHIER_ETAT):
+    if not os.path.exists(chemin):
+        return None
+    with open(chemin, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def ecrire_etat(etat, chemin=FICHIER_ETAT):
+    """Réécrit l'état de l'exécution (fichier temporaire puis remplacement)"""
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    with open(chemin + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(etat, f, indent=2, ensure_ascii=False)
+    os.replace(chemin + '.tmp', chemin)
+
+
+# ============================================
+# EXÉCUTION
+# ============================================
+
+def executer_pipeline(data_marts, workers=4, lot=1000, reprendre=False, controle=True):
+    """Exécute (ou reprend) le DAG; retourne l'état final {'execution', 'data_marts', 'etapes'}"""
+    etat = lire_etat() if reprendre else None
+    if reprendre and not etat:
+        raise ValueError(f"Aucune exécution à reprendre ({FICHIER_ETAT} absent)")
+    if etat:
+        data_marts = etat['data_marts']
+    else:
+        etat = {'execution': datetime.now().strftime('%Y%m%d_%H%M%S'),
+                'data_marts': data_marts, 'etapes': {}}
+    deja_faites = [nom for nom, e in etat['etapes'].items() if e['statut'] == 'SUCCESS']
+    contexte = {'execution': etat['execution'], 'lot': lot}
+    dependances = graphe(data_marts)
+
+    connexion = connecter() if controle else None
+    if connexion:
+        preparer_controle(connexion)
+    debuts = {}
+
+    def demarrer(nom):
+        debuts[nom] = (datetime.now().replace(microsecond=0), time.perf_counter())
+        if connexion:
+            ecrire_controle(connexion, nom, etat['execution'], debuts[nom][0], 'RUNNING')
+        print(f"   ▶ {nom}")
+
+    def lancer(nom):
+        return ETAPES[nom]['action'](nom, contexte)
+
+    def terminer(nom, nb_lignes, erreur):
+        duree = time.perf_counter() - debuts[nom][1]
+        statut = 'FAILED' if erreur else 'SUCCESS'
+        etat['etapes'][nom] = {'statut': statut, 'lignes': nb_lignes or 0,
+                               'duree_s': round(duree, 2), 'erreur': str(erreur) if erreur else None}
+        ecrire_etat(etat)
+        if connexion:
+            ecrire_controle(connexion, nom, etat['execution'], debuts[nom][0], statut,
+                            nb_lignes or 0, round(duree, 2))
+        if erreur:
+            print(f"   ✗ {nom}: {erreur}")
+        else:
+            print(f"   ✓ {nom}: {nb_lignes} lignes en {duree:.2f} s")
+
+    print(f"🚀 Exécution {etat['execution']} ({', '.join(data_marts)}, {workers} workers"
+          f"{f', {len(deja_faites)} étapes déjà faites' if deja_faites else ''})")
+    try:
+        statuts = ordonnancer(dependances, workers, lancer, demarrer, terminer, deja_faites)
+    finally:
+        if connexion:
+            connexion.close()
+
+    for nom, statut in statuts.items():
+        if statut == 'BLOQUEE':
+            etat['etapes'][nom] = {'statut': statut, 'lignes': 0, 'duree_s': 0, 'erreur': None}
+    ecrire_etat(etat)
+    return etat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Orchestrateur ETL des data marts (DAG parallèle)")
+    parser.add_argument('action', nargs='?', default='executer', choices=['executer', 'plan'])
+    parser.add_argument('--dm', nargs='+', choices=['dm1', 'dm2', 'dm3'], default=['dm1', 'dm2', 'dm3'],
+                        help="Data marts à traiter (tous par défaut)")
+    parser.add_argument('--workers', type=int, default=4, help="Étapes exécutées en parallèle")
+    parser.add_argument('--lot', type=int, default=1000, help="Lignes par executemany (faits)")
+    parser.add_argument('--reprendre', action='store_true',
+                        help="Reprend la dernière exécution (mêmes data marts) sans refaire les étapes réussies")
+    parser.add_argument('--sans-controle', action='store_true',
+                        help="N'écrit pas le suivi des étapes dans etl_control")
+    args = parser.parse_args()
+
+    data_marts = ['commun'] + args.dm
+    if args.action == 'plan':
+        for i, vague in enumerate(vagues(graphe(data_marts)), 1):
+            print(f"[{i}] {', '.join(vague)}")
+        return
+
+    debut = time.perf_counter()
+    etat = executer_pipeline(data_marts, args.workers, args.lot, args.reprendre,
+                             not args.sans_controle)
+    print(f"\n{'ÉTAPE':<30} {'STATUT':>8} {'LIGNES':>10} {'DURÉE (s)':>10}")
+    for nom in sorted(etat['etapes']):
+        e = etat['etapes'][nom]
+        print(f"{nom:<30} {e['statut']:>8} {e['lignes']:>10} {e['duree_s']:>10.2f}")
+    echecs = [nom for nom, e in etat['etapes'].items() if e['statut'] != 'SUCCESS']
+    print(f"\n{'✗' if echecs else '✓'} {len(etat['etapes']) - len(echecs)}/{len(etat['etapes'])} "
+          f"étapes réussies en {time.perf_counter() - debut:.2f} s")
+    if echecs:
+        print(f"   Reprise: python {os.path.basename(__file__)} --reprendre")
+    sys.exit(1 if echecs else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,486 @@
+# -*- coding: utf-8 -*-
+# partitions.py - Tables de faits partitionnées par mois et chargements massifs
+#
+#   partitionner - PARTITION BY RANGE (id_temps_fk), une partition par mois
+#                  (bornes calculées: id_temps suit la date, voir calendrier.py)
+#   etendre      - ajoute les mois suivants en découpant la partition p_futur
+#   backfill     - charge un fait sans index secondaires ni FK, recréés à la fin
+#                  (FK revalidées: échec s'il reste des clés orphelines)
+#   echanger     - charge un mois complet dans une table d'échange, puis
+#                  ALTER TABLE ... EXCHANGE PARTITION (bascule instantanée)
+#   benchmark    - temps de chargement et latence des requêtes KPI, avant/après
+#
+# MySQL n'accepte pas de clé étrangère sur une table partitionnée et impose la
+# colonne de partitionnement dans chaque clé unique: partitionner supprime les
+# FK (l'intégrité est assurée par la résolution des clés de charger_faits.py)
+# et la clé primaire devient (id_<fait>, id_temps_fk).
+# Pour que MySQL n'ouvre que les partitions utiles, filtrer sur id_temps_fk
+# (calendrier.id_temps) plutôt que sur les colonnes de dim_temps.
+
+import argparse
+import os
+import re
+import statistics
+import time
+from contextlib import contextmanager
+
+import mysql.connector
+import pandas as pd
+
+from config_dw import DW_CONFIG, MYSQL_CONFIG
+
+from agregats import signaler_periodes
+from calendrier import ORIGINE, charger_calendrier, etat_calendrier, generer_calendrier, id_temps
+from charger_faits import (DOSSIER_DM1, DOSSIER_DM2, FAITS, CacheDimensions,
+                           charger_faits, consommation_synthetique, dimensions_synthetiques,
+                           executer, preparer_consommation)
+
+# Table de faits -> clé primaire auto-incrémentée
+CLES_PRIMAIRES = {
+    'fait_consommation': 'id_consommation',
+    'fait_rentabilite': 'id_rentabilite',
+    'fait_paiement': 'id_paiement_fait',
+    'fait_environnement': 'id_environnement',
+}
+
+PARTITION_FUTUR = 'p_futur'
+
+
+def nom_partition(mois):
+    """Période 2024-03 -> p2024_03"""
+    return f"p{mois.year}_{mois.month:02d}"
+
+
+def bornes_mois(debut, fin, origine=ORIGINE):
+    """[(partition, id_temps du 1er du mois suivant)] pour chaque mois de `debut` à `fin` (AAAA-MM)"""
+    mois = pd.period_range(debut, fin, freq='M')
+    bornes = id_temps((mois + 1).to_timestamp(), origine)
+    return [(nom_partition(m), int(b)) for m, b in zip(mois, bornes)]
+
+
+def bornes_periode(mois, origine=ORIGINE):
+    """(id_temps du 1er du mois, id_temps du 1er du mois suivant) pour AAAA-MM"""
+    periode = pd.Period(mois, freq='M')
+    premier, suivant = id_temps([periode.to_timestamp(), (periode + 1).to_timestamp()], origine)
+    return int(premier), int(suivant)
+
+
+def clause_partitions(bornes):
+    return ', '.join([f"PARTITION {nom} VALUES LESS THAN ({borne})" for nom, borne in bornes]
+                     + [f"PARTITION {PARTITION_FUTUR} VALUES LESS THAN MAXVALUE"])
+
+
+def origine_dw(connexion):
+    """Origine des id_temps de greencity_dw (refuse une dim_temps non arithmétique)"""
+    etat = etat_calendrier(connexion)
+    if etat is None:
+        return ORIGINE
+    if etat['origine'] is None:
+        raise ValueError("id_temps ne suit pas la date: recharger dim_temps avec calendrier.py")
+    return etat['origine']
+
+
+# ============================================
+# MÉTADONNÉES
+# ============================================
+
+def definitions(curseur, table):
+    """(index non uniques, FK) de SHOW CREATE TABLE: [(nom, définition)] telles que MySQL les écrit
+
+    La définition complète (préfixes de colonne, DESC, USING, FULLTEXT / SPATIAL,
+    ON DELETE / ON UPDATE) se recrée à l'identique par ALTER TABLE ... ADD <définition>.
+    """
+    curseur.execute(f"SHOW CREATE TABLE {table}")
+    ddl = curseur.fetchone()[1]
+    index = re.findall(r"^\s*((?:FULLTEXT |SPATIAL )?KEY `([^`]+)`.*?),?$", ddl, re.M)
+    cles = re.findall(r"^\s*(CONSTRAINT `([^`]+)` FOREIGN KEY.*?),?$", ddl, re.M)
+    return [(nom, d) for d, nom in index], [(nom, d) for d, nom in cles]
+
+
+def cles_etrangeres(curseur, table):
+    """[(contrainte, colonnes, table référencée, colonnes référencées)]"""
+    curseur.execute(
+        "SELECT CONSTRAINT_NAME, GROUP_CONCAT(COLUMN_NAME ORDER BY ORDINAL_POSITION), "
+        "REFERENCED_TABLE_NAME, GROUP_CONCAT(REFERENCED_COLUMN_NAME ORDER BY ORDINAL_POSITION) "
+        "FROM information_schema.KEY_COLUMN_USAGE WHERE TABLE_SCHEMA = DATABASE() "
+        "AND TABLE_NAME = %s AND REFERENCED_TABLE_NAME IS NOT NULL "
+        "GROUP BY CONSTRAINT_NAME, REFERENCED_TABLE_NAME ORDER BY CONSTRAINT_NAME",
+        (table,)
+    )
+    return curseur.fetchall()
+
+
+def partitions_existantes(curseur, table):
+    """[(partition, borne)] dans l'ordre; [] si la table n'est pas partitionnée"""
+    curseur.execute(
+        "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION",
+        (table,)
+    )
+    return curseur.fetchall()
+
+
+# ============================================
+# PARTITIONNEMENT
+# ============================================
+
+def sql_partitionner(table, bornes, cles=()):
+    """Instructions de conversion d'une table de faits en table partitionnée par mois"""
+    instructions = []
+    if cles:
+        instructions.append(f"ALTER TABLE {table} "
+                            + ', '.join(f"DROP FOREIGN KEY {nom}" for nom, *_ in cles))
+    instructions.append(f"ALTER TABLE {table} DROP PRIMARY KEY, "
+                        f"ADD PRIMARY KEY ({CLES_PRIMAIRES[table]}, id_temps_fk)")
+    instructions.append(f"ALTER TABLE {table} PARTITION BY RANGE (id_temps_fk) "
+                        f"({clause_partitions(bornes)})")
+    return instructions
+
+
+def partitionner(connexion, table, debut, fin, executer_sql=True):
+    """Convertit `table` (ou affiche le SQL); retourne les instructions"""
+    curseur = connexion.cursor()
+    if partitions_existantes(curseur, table):
+        curseur.close()
+        raise ValueError(f"{table} est déjà partitionnée: utiliser etendre")
+    instructions = sql_partitionner(table, bornes_mois(debut, fin, origine_dw(connexion)),
+                                    cles_etrangeres(curseur, table))
+    if executer_sql:
+        for instruction in instructions:
+            curseur.execute(instruction)
+    curseur.close()
+    return instructions
+
+
+def etendre(connexion, table, fin, executer_sql=True):
+    """Ajoute les mois jusqu'à `fin` (AAAA-MM) en réorganisant p_futur; retourne l'instruction"""
+    curseur = connexion.cursor()
+    existantes = [nom for nom, _ in partitions_existantes(curseur, table) if nom != PARTITION_FUTUR]
+    if not existantes:
+        curseur.close()
+        raise ValueError(f"{table} n'est pas partitionnée par mois")
+    dernier = pd.Period(existantes[-1][1:].replace('_', '-'), freq='M')
+    bornes = bornes_mois(dernier + 1, fin, origine_dw(connexion))
+    if not bornes:
+        curseur.close()
+        return None
+    instruction = (f"ALTER TABLE {table} REORGANIZE PARTITION {PARTITION_FUTUR} "
+                   f"INTO ({clause_partitions(bornes)})")
+    if executer_sql:
+        curseur.execute(instruction)
+    curseur.close()
+    return instruction
+
+
+# ============================================
+# CHARGEMENT MASSIF
+# ============================================
+
+def compter_orphelins(curseur, table, cles):
+    """{contrainte: nombre de lignes de `table` sans ligne référencée} pour les FK données"""
+    orphelins = {}
+    for nom, colonnes, reference, cibles in cles:
+        jointure = ' AND '.join(f"r.{cible} = f.{colonne}" for colonne, cible
+                                in zip(colonnes.split(','), cibles.split(',')))
+        non_nulles = ' AND '.join(f"f.{colonne} IS NOT NULL" for colonne in colonnes.split(','))
+        curseur.execute(f"SELECT COUNT(*) FROM {table} f WHERE {non_nulles} "
+                        f"AND NOT EXISTS (SELECT 1 FROM {reference} r WHERE {jointure})")
+        nombre = curseur.fetchone()[0]
+        if nombre:
+            orphelins[nom] = nombre
+    return orphelins
+
+
+@contextmanager
+def sans_index(connexion, table, garder=()):
+    """Supprime index secondaires et FK de `table` le temps d'un chargement, puis les recrée
+
+    InnoDB ne sait pas désactiver un index (DISABLE KEYS ne vaut que pour MyISAM):
+    les index sont recréés tels que SHOW CREATE TABLE les décrit, en une seule
+    instruction ALTER TABLE (tri puis construction en bloc). Les index de `garder`
+    restent en place (recherche des clés déjà chargées de charger_faits.py).
+    Les FK sont recréées avec foreign_key_checks = 1 après un comptage des clés
+    orphelines: s'il y en a, ValueError et les FK restent absentes (à corriger
+    avant de relancer). Index et FK sont recréés même si le chargement échoue.
+    """
+    curseur = connexion.cursor()
+    index, contraintes = definitions(curseur, table)
+    index = [(nom, definition) for nom, definition in index if nom not in garder]
+    cles = cles_etrangeres(curseur, table)
+    try:
+        if contraintes:
+            curseur.execute(f"ALTER TABLE {table} "
+                            + ', '.join(f"DROP FOREIGN KEY {nom}" for nom, _ in contraintes))
+        if index:
+            curseur.execute(f"ALTER TABLE {table} "
+                            + ', '.join(f"DROP INDEX {nom}" for nom, _ in index))
+        yield
+    finally:
+        try:
+            if index:
+                curseur.execute(f"ALTER TABLE {table} "
+                                + ', '.join(f"ADD {definition}" for _, definition in index))
+            if contraintes:
+                curseur.execute("SET SESSION foreign_key_checks = 1")
+                orphelins = compter_orphelins(curseur, table, cles)
+                if orphelins:
+                    raise ValueError(f"{table}: clés orphelines "
+                                     + ', '.join(f"{nom}={n}" for nom, n in orphelins.items())
+                                     + ", FK non recréées")
+                curseur.execute(f"ALTER TABLE {table} "
+                                + ', '.join(f"ADD {definition}" for _, definition in contraintes))
+        finally:
+            curseur.close()
+
+
+def preparer_echange(curseur, table):
+    """<table>_echange: même structure que `table`, non partitionnée, identifiants à la suite"""
+    echange = f"{table}_echange"
+    curseur.execute(f"DROP TABLE IF EXISTS {echange}")
+    curseur.execute(f"CREATE TABLE {echange} LIKE {table}")
+    curseur.execute(f"ALTER TABLE {echange} REMOVE PARTITIONING")
+    # Identifiants au-delà de ceux de la table partitionnée
+    curseur.execute(f"SELECT COALESCE(MAX({CLES_PRIMAIRES[table]}), 0) + 1 FROM {table}")
+    curseur.execute(f"ALTER TABLE {echange} AUTO_INCREMENT = {curseur.fetchone()[0]}")
+    return echange
+
+
+def basculer(curseur, table, partition, echange):
+    """EXCHANGE PARTITION (MySQL 5.7+ / MariaDB 11.4+ pour WITH VALIDATION); retourne la durée"""
+    debut = time.perf_counter()
+    curseur.execute(f"ALTER TABLE {table} EXCHANGE PARTITION {partition} "
+                    f"WITH TABLE {echange} WITH VALIDATION")
+    return time.perf_counter() - debut
+
+
+def echanger(connexion, fait, cache, dossier, mois, taille_lot=1000, conserver=False):
+    """Charge le mois `mois` (AAAA-MM) complet dans une table d'échange et bascule la partition
+
+    La partition remplacée se retrouve dans <table>_echange (gardée si `conserver`).
+    Les jours du mois sont signalés aux agrégats avant la bascule: rafraichir
+    recalcule le mois même pour les faits disparus avec l'ancienne partition.
+    """
+    table = FAITS[fait]['table']
+    partition = nom_partition(pd.Period(mois, freq='M'))
+    curseur = connexion.cursor()
+    if partition not in [nom for nom, _ in partitions_existantes(curseur, table)]:
+        curseur.close()
+        raise ValueError(f"{table} n'a pas de partition {partition}")
+
+    echange = preparer_echange(curseur, table)
+    periode = bornes_periode(mois, origine_dw(connexion))
+    with sans_index(connexion, echange):
+        stats = executer(connexion, fait, cache, dossier, taille_lot=taille_lot, table=echange,
+                         periode=periode)
+    signaler_periodes(curseur, table, *periode)
+    connexion.commit()
+    stats['echange_s'] = basculer(curseur, table, partition, echange)
+    if not conserver:
+        curseur.execute(f"DROP TABLE {echange}")
+    curseur.close()
+    return stats
+
+
+# ============================================
+# BENCHMARK
+# ============================================
+
+FICHIER_DDL = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           '..', 'datawarehouse', 'create_datamarts.sql')
+
+# Requêtes KPI typiques, filtrées sur id_temps_fk (%(debut)s / %(fin)s: bornes d'un mois)
+REQUETES_KPI = {
+    'conso_region_mois': (
+        "SELECT id_region_fk, id_type_energie_fk, SUM(consommation) FROM fait_consommation "
+        "WHERE id_temps_fk >= %(debut)s AND id_temps_fk < %(fin)s "
+        "GROUP BY id_region_fk, id_type_energie_fk"
+    ),
+    'evolution_batiment': (
+        "SELECT id_temps_fk, SUM(consommation) FROM fait_consommation "
+        "WHERE id_batiment_fk = 1 AND id_temps_fk >= %(debut)s AND id_temps_fk < %(fin)s "
+        "GROUP BY id_temps_fk"
+    ),
+    'conso_temperature': (
+        "SELECT f.id_region_fk, t.jour, AVG(f.temperature_moyenne), SUM(f.consommation) "
+        "FROM fait_consommation f JOIN dim_temps t ON f.id_temps_fk = t.id_temps "
+        "WHERE f.id_temps_fk >= %(debut)s AND f.id_temps_fk < %(fin)s "
+        "GROUP BY f.id_region_fk, t.jour"
+    ),
+}
+
+
+def ddl_tables(tables):
+    """CREATE TABLE de create_datamarts.sql pour les tables demandées"""
+    with open(FICHIER_DDL, encoding='utf-8') as f:
+        ddl = f.read()
+    blocs = dict(re.findall(r'CREATE TABLE (\w+) (\(.*?\n\s*\));', ddl, re.S))
+    return [f"CREATE TABLE {table} {blocs[table]}" for table in tables]
+
+
+def preparer_base_benchmark(curseur, connexion, cache):
+    """Base greencity_bench: dimensions de DM1 remplies comme le cache synthétique"""
+    curseur.execute("DROP DATABASE IF EXISTS greencity_bench")
+    curseur.execute("CREATE DATABASE greencity_bench")
+    curseur.execute("USE greencity_bench")
+    for instruction in ddl_tables(['dim_temps', 'dim_region', 'dim_batiment',
+                                   'dim_type_energie', 'dim_compteur']):
+        curseur.execute(instruction)
+    charger_calendrier(connexion, generer_calendrier(cache.calendrier['debut'],
+                                                     cache.calendrier['fin']))
+    lignes = {
+        "INSERT INTO dim_region (id_region_sk, id_region, nom_region, ville, pays) "
+        "VALUES (%s, %s, %s, 'Tanger', 'Maroc')":
+            [(sk, cle, cle) for cle, (sk,) in cache.tables['dim_region'].items()],
+        "INSERT INTO dim_batiment (id_batiment_sk, id_batiment, nom_batiment, type_batiment, "
+        "id_region) VALUES (%s, %s, %s, 'Bureau', %s)":
+            [(sk, cle, cle, region) for cle, (sk, region) in cache.tables['dim_batiment'].items()],
+        "INSERT INTO dim_type_energie (id_type_energie_sk, id_type_energie, libelle, unite) "
+        "VALUES (%s, %s, %s, 'u')":
+            [(sk, sk, cle) for cle, (sk,) in cache.tables['dim_type_energie'].items()],
+        "INSERT INTO dim_compteur (id_compteur_sk, id_compteur, id_batiment, id_type_energie) "
+        "VALUES (%s, %s, %s, %s)":
+            [(sk, cle, bat, te) for cle, (sk, bat, te) in cache.tables['dim_compteur'].items()],
+    }
+    for requete, valeurs in lignes.items():
+        curseur.executemany(requete, valeurs)
+    connexion.commit()
+
+
+def mesurer_requetes(curseur, bornes, repetitions=5):
+    """Latence médiane (ms) de chaque requête KPI"""
+    latences = {}
+    for nom, requete in REQUETES_KPI.items():
+        durees = []
+        for _ in range(repetitions):
+            debut = time.perf_counter()
+            curseur.execute(requete, {'debut': bornes[0], 'fin': bornes[1]})
+            curseur.fetchall()
+            durees.append(time.perf_counter() - debut)
+        latences[nom] = statistics.median(durees) * 1000
+    return latences
+
+
+def benchmark(nb_lignes, nb_compteurs=1000, conserver=False):
+    """Chargement de fait_consommation et requêtes KPI: standard / sans index / partitionnée
+
+    Le dernier scénario recharge ensuite juin 2024 par table d'échange (REMOVE
+    PARTITIONING, index supprimés puis recréés, EXCHANGE PARTITION WITH VALIDATION).
+    """
+    cache = dimensions_synthetiques(nb_compteurs)
+    conso, temperatures = consommation_synthetique(nb_lignes, nb_compteurs)
+    faits, _ = preparer_consommation(conso, temperatures, cache)
+    bornes = bornes_periode('2024-06', cache.calendrier['origine'])
+    id_temps_fk = faits['id_temps_fk'].astype('int64')
+    faits_juin = faits[(id_temps_fk >= bornes[0]) & (id_temps_fk < bornes[1])]
+
+    connexion = mysql.connector.connect(**{k: v for k, v in MYSQL_CONFIG.items()
+                                           if k != 'database'})
+    curseur = connexion.cursor()
+    curseur.execute("SELECT VERSION()")
+    version = curseur.fetchone()[0]
+    preparer_base_benchmark(curseur, connexion, cache)
+
+    resultats = []
+    for scenario in ['standard', 'sans_index', 'partitionnee']:
+        curseur.execute("DROP TABLE IF EXISTS fait_consommation")
+        curseur.execute(ddl_tables(['fait_consommation'])[0])
+        if scenario == 'partitionnee':
+            partitionner(connexion, 'fait_consommation', '2022-01', '2026-12')
+        debut = time.perf_counter()
+        if scenario == 'standard':
+            charger_faits(connexion, 'consommation', faits, taille_lot=5000)
+        else:
+            with sans_index(connexion, 'fait_consommation'):
+                charger_faits(connexion, 'consommation', faits, taille_lot=5000)
+        duree = time.perf_counter() - debut
+        curseur.execute("ANALYZE TABLE fait_consommation")
+        curseur.fetchall()
+        resultats.append((scenario, len(faits), duree, mesurer_requetes(curseur, bornes)))
+
+    debut = time.perf_counter()
+    echange = preparer_echange(curseur, 'fait_consommation')
+    with sans_index(connexion, echange):
+        charger_faits(connexion, 'consommation', faits_juin, taille_lot=5000, table=echange)
+    bascule = basculer(curseur, 'fait_consommation', nom_partition(pd.Period('2024-06', freq='M')),
+                       echange)
+    duree = time.perf_counter() - debut
+    curseur.execute("SELECT COUNT(*) FROM fait_consommation PARTITION (p2024_06)")
+    if curseur.fetchone()[0] != len(faits_juin):
+        raise RuntimeError("p2024_06 ne contient pas les faits basculés")
+    resultats.append(('echange_juin', len(faits_juin), duree, mesurer_requetes(curseur, bornes)))
+
+    if not conserver:
+        curseur.execute("DROP DATABASE greencity_bench")
+    curseur.close()
+    connexion.close()
+
+    print(f"{version}: {len(faits)} faits, requêtes KPI sur juin 2024 (médiane de 5, ms)")
+    print(f"{'scénario':>14} {'lignes':>9} {'chargement (s)':>15} {'lignes/s':>10} "
+          + ' '.join(f"{nom:>20}" for nom in REQUETES_KPI))
+    for scenario, lignes, duree, latences in resultats:
+        print(f"{scenario:>14} {lignes:>9} {duree:>15.2f} {lignes / duree:>10,.0f} "
+              + ' '.join(f"{latences[nom]:>20.1f}" for nom in REQUETES_KPI))
+    print(f"EXCHANGE PARTITION seul: {bascule:.3f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partitionnement mensuel et chargements massifs des faits")
+    parser.add_argument('action', choices=['partitionner', 'etendre', 'backfill', 'echanger',
+                                           'benchmark'])
+    parser.add_argument('--tables', nargs='+', choices=list(CLES_PRIMAIRES),
+                        default=['fait_consommation', 'fait_rentabilite'],
+                        help="Tables de faits à partitionner / étendre")
+    parser.add_argument('--debut', default='2022-01', help="Premier mois partitionné (AAAA-MM)")
+    parser.add_argument('--fin', default='2026-12', help="Dernier mois partitionné (AAAA-MM)")
+    parser.add_argument('--sql', action='store_true', help="Affiche le SQL sans l'exécuter")
+    parser.add_argument('--fait', choices=list(FAITS), default='consommation',
+                        help="Fait chargé par backfill / echanger")
+    parser.add_argument('--mois', help="Mois basculé par echanger (AAAA-MM)")
+    parser.add_argument('--dm1', default=DOSSIER_DM1, help="Dossier staging du DM1")
+    parser.add_argument('--dm2', default=DOSSIER_DM2, help="Dossier staging du DM2")
+    parser.add_argument('--lot', type=int, default=5000, help="Lignes par executemany / commit")
+    parser.add_argument('--conserver', action='store_true',
+                        help="Garde la table d'échange (ou la base du benchmark)")
+    parser.add_argument('--lignes', type=int, default=1000000, help="Faits du benchmark")
+    args = parser.parse_args()
+
+    if args.action == 'benchmark':
+        benchmark(args.lignes, conserver=args.conserver)
+        return
+    if args.action == 'echanger' and not args.mois:
+        parser.error("echanger demande --mois AAAA-MM")
+
+    dossier = args.dm1 if args.fait == 'consommation' else args.dm2
+    connexion = mysql.connector.connect(**DW_CONFIG)
+    try:
+        if args.action in ('partitionner', 'etendre'):
+            for table in args.tables:
+                if args.action == 'partitionner':
+                    instructions = partitionner(connexion, table, args.debut, args.fin,
+                                                not args.sql)
+                else:
+                    instructions = [etendre(connexion, table, args.fin, not args.sql)]
+                for instruction in filter(None, instructions):
+                    print(f"{instruction};" if args.sql else f"✓ {instruction[:100]}")
+        elif args.action == 'backfill':
+            table = FAITS[args.fait]['table']
+            debut = time.perf_counter()
+            with sans_index(connexion, table, garder=[FAITS[args.fait]['index_cles']]):
+                stats = executer(connexion, args.fait, CacheDimensions(), dossier,
+                                 taille_lot=args.lot)
+            print(f"✓ {table}: {stats['inseres']} insérées, {stats['mis_a_jour']} mises à jour, "
+                  f"{stats['rejetes']} rejetées, index recréés en "
+                  f"{time.perf_counter() - debut:.2f} s au total")
+        else:
+            stats = echanger(connexion, args.fait, CacheDimensions(), dossier, args.mois,
+                             args.lot, args.conserver)
+            print(f"✓ {FAITS[args.fait]['table']} {args.mois}: {stats['inseres']} faits basculés "
+                  f"en {stats['echange_s']:.2f} s ({stats['hors_periode']} hors du mois, "
+                  f"{stats['rejetes']} rejetées)")
+    finally:
+        connexion.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 #!/bin/bash
 # Script pour lancer le pipeline ETL DM3 Environnement
+# (les trois data marts en parallèle, avec reprise: python3 pentaho_etl/orchestrateur.py)
 
 PENTAHO_HOME="/Users/kihlyouns/Desktop/GreenCity_ETL/Pentaho"
 DM3_DIR="/Users/kihlyouns/Desktop/GreenCity_ETL/pentaho_etl/dm3_environnement"
@@ -26,9 +27,13 @@ if [ $? -ne 0 ]; then
   exit 1
 fi
 
-# Étape 2: Transformation
+# Étape 2: Transformation (DM3_TRANSFORM=python: mêmes règles, sans JVM)
 echo "[2/3] Transformation..."
-"$PENTAHO_HOME/pan.sh" -file "$DM3_DIR/2_transform_env.ktr" 2>&1 | grep -E "ERROR|Finished|lines"
+if [ "${DM3_TRANSFORM:-pentaho}" = "python" ]; then
+  python3 "$DM3_DIR/transform_env.py" nettoyer --staging "$DM3_DIR/staging"
+else
+  "$PENTAHO_HOME/pan.sh" -file "$DM3_DIR/2_transform_env.ktr" 2>&1 | grep -E "ERROR|Finished|lines"
+fi
 if [ $? -ne 0 ]; then
   echo "ERREUR: Transformation échouée"
   exit 1
@@ -42,6 +47,15 @@ if [ $? -ne 0 ]; then
   exit 1
 fi
 
+# Agrégats des tableaux de bord (DM3_AGREGATS=1, tables de create_agregats.sql)
+if [ -n "$DM3_AGREGATS" ]; then
+  python3 "$DM3_DIR/../agregats.py" rafraichir --agregats agg_environnement_mois_batiment
+  if [ $? -ne 0 ]; then
+    echo "ERREUR: Rafraîchissement des agrégats échoué"
+    exit 1
+  fi
+fi
+
 # Mettre à jour la date de dernière exécution
 echo "$(date +'%Y-%m-%d')" > "$LAST_RUN_FILE"
 